@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks.suite import benchmark_packager_tree, benchmark_workload
+from benchmarks.workload import Workload
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def scale(value: str):
+    packages, pages = value.lower().split("x", maxsplit=1)
+    return int(packages), int(pages)
+
+
+def run():
+    parser = ArgumentParser(description="Benchmarks for docs packages build and packaging hot paths")
+    parser.add_argument(
+        "--scale",
+        action="append",
+        type=scale,
+        help="Workload scale as <packages>x<pages per package>. May be repeated. Default - 5x20, 20x50, 50x100",
+    )
+    parser.add_argument("--media", type=int, default=2, help="Media files per package")
+    parser.add_argument("--redirects", type=int, default=1, help="Pages with redirects per package")
+    parser.add_argument("--blog-posts", type=int, default=5, help="Blog posts per package")
+    parser.add_argument("--no-frontmatter", action="store_true", help="Generate pages without front matter")
+    parser.add_argument("--no-shared-index", action="store_true", help="Do not generate shared root index.md")
+    parser.add_argument(
+        "--pack-files", type=int, default=50000, help="Files in the single package tree packaging case. 0 - skip case"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, median is reported")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline json file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store results as new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Relative slowdown against baseline reported as regression"
+    )
+    args = parser.parse_args()
+
+    # Keep output readable - packager logs each packaged file
+    logging.basicConfig(level=logging.WARNING, format="{message}", style="{")
+
+    results = {}
+    for packages, pages in args.scale or [(5, 20), (20, 50), (50, 100)]:
+        workload = Workload(
+            packages=packages,
+            pages=pages,
+            with_frontmatter=not args.no_frontmatter,
+            media=args.media,
+            shared_index=not args.no_shared_index,
+            redirects=args.redirects,
+            blog_posts=args.blog_posts,
+        )
+        for case, seconds in benchmark_workload(workload, repeat=args.repeat).items():
+            results[f"{workload.name}/{case}"] = seconds
+    if args.pack_files > 0:
+        for case, seconds in benchmark_packager_tree(args.pack_files, repeat=args.repeat).items():
+            results[f"tree{args.pack_files}/{case}"] = seconds
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf8"))
+
+    regressions = []
+    print(f"{'case':<32} {'seconds':>10} {'baseline':>10} {'change':>8}")
+    for case, seconds in results.items():
+        base = baseline.get(case, None)
+        change = ""
+        if base:
+            ratio = seconds / base - 1
+            change = f"{ratio:+.0%}"
+            if ratio > args.threshold:
+                regressions.append(case)
+                change += " !"
+        print(f"{case:<32} {seconds:>10.4f} {'' if base is None else f'{base:.4f}':>10} {change:>8}")
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True), encoding="utf8")
+        print(f"Baseline is written to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
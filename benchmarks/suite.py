@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import Files
+from mkdocs.structure.nav import get_navigation
+
+from benchmarks.workload import Workload
+from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
+from mkdocs_partial.package_state import PackageState
+from mkdocs_partial.packages.packager import Packager
+from mkdocs_partial.search_fragments import FRAGMENT_FILE, build_search_fragment
+
+
+def measure(func: Callable, setup: Callable = None, repeat: int = 3) -> float:
+    """Returns median of `repeat` runs of `func` in seconds. `setup` result is passed to `func`, it is not timed."""
+    timings = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def age(root: str, seconds: int = 60):
+    """Moves mtime of generated files to the past, as if they were not modified right before the build."""
+    past = time.time() - seconds
+    for path, _, files in os.walk(root):
+        os.utime(path, (past, past))
+        for file in files:
+            os.utime(os.path.join(path, file), (past, past))
+
+
+class Site:
+    """Mkdocs config with synthetic docs packages loaded as `docs_package` plugins."""
+
+    def __init__(
+        self, root: str, packages: list[tuple[str, str]], plugins: list = None, command: str = "build", **extra_config
+    ):
+        docs_dir = os.path.join(root, "docs")
+        os.makedirs(docs_dir, exist_ok=True)
+        self.config = MkDocsConfig(config_file_path=os.path.join(root, "mkdocs.yml"))
+        self.config.load_dict(
+            {
+                "site_name": "benchmark",
+                "docs_dir": docs_dir,
+                "site_dir": os.path.join(root, "site"),
+                "plugins": (plugins or [])
+                + [
+                    {"docs_package": {"name": name, "docs_path": docs_path, "directory": ""}}
+                    for name, docs_path in packages
+                ],
+                **extra_config,
+            }
+        )
+        errors, _ = self.config.validate()
+        if errors:
+            raise ValueError(errors)
+        self.config.plugins.on_startup(command=command, dirty=False)
+        self.config = self.config.plugins.on_config(self.config)
+        self.files: Files | None = None
+        self.nav = None
+
+    @property
+    def docs_packages(self) -> list[DocsPackagePlugin]:
+        return [plugin for plugin in self.config.plugins.values() if isinstance(plugin, DocsPackagePlugin)]
+
+    def on_files(self):
+        self.files = self.config.plugins.on_files(Files([]), config=self.config)
+        return self.files
+
+    def on_nav(self):
+        self.nav = get_navigation(self.files, self.config)
+        self.nav = self.config.plugins.on_nav(self.nav, config=self.config, files=self.files)
+        return self.nav
+
+    def page_hooks(self):
+        plugins = self.config.plugins
+        for page in self.nav.pages:
+            plugins.on_pre_page(page, config=self.config, files=self.files)
+            plugins.on_page_context({}, page=page, config=self.config, nav=self.nav)
+            plugins.on_post_page("", page=page, config=self.config)
+
+    def render_pages(self) -> Site:
+        """Starts new build and renders all pages, so they are ready to be indexed by `search` plugin."""
+        self.config.plugins.on_pre_build(config=self.config)
+        self.on_files()
+        self.on_nav()
+        for page in self.nav.pages:
+            page.read_source(self.config)
+            page.render(self.config, self.files)
+            # Same as build, e.g. `docs_package` adds image attributes, search fragments are hashed from the result
+            page.content = self.config.plugins.on_page_content(
+                page.content, page=page, config=self.config, files=self.files
+            )
+        return self
+
+    def search_index(self):
+        plugins = self.config.plugins
+        for page in self.nav.pages:
+            plugins.on_page_context({}, page=page, config=self.config, nav=self.nav)
+        return plugins["search"].search_index.generate_search_index()
+
+    def shutdown(self):
+        self.config.plugins.on_shutdown()
+        # Plugins with `on_startup`/`on_shutdown` are cached by mkdocs between builds (for `serve`),
+        # each benchmarked site has to start with fresh instances
+        MkDocsConfig.plugins.plugin_cache.clear()
+
+
+def benchmark_workload(workload: Workload, repeat: int = 3) -> Dict[str, float]:
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        packages = workload.generate(os.path.join(root, "packages"))
+        age(os.path.join(root, "packages"))
+        site = Site(os.path.join(root, "site"), packages, command="serve")
+        try:
+            # Cold build, docs packages scan and parse all files
+            results["on_files"] = measure(lambda _: site.on_files(), setup=PackageState.store.clear, repeat=repeat)
+            # `serve` rebuild, files and pages scanned by the previous build are reused
+            results["on_files_rebuild"] = measure(site.on_files, repeat=repeat)
+            results["on_nav"] = measure(site.on_nav, repeat=repeat)
+            results["page_hooks"] = measure(site.page_hooks, repeat=repeat)
+        finally:
+            site.shutdown()
+
+        if workload.blog_posts > 0 and importlib.util.find_spec("material") is not None:
+            site = Site(os.path.join(root, "blog-site"), packages, plugins=["material/blog"], theme="material")
+            try:
+                results["blog_sync"] = measure(
+                    lambda: [package.blog_integration.sync() for package in site.docs_packages], repeat=repeat
+                )
+            finally:
+                site.shutdown()
+
+        name, docs_path = packages[0]
+        output_dir = os.path.join(root, "wheels")
+        os.makedirs(output_dir, exist_ok=True)
+        results["packager_pack"] = measure(
+            lambda: Packager("docs-package").pack(
+                package_name=name,
+                package_version="1.0.0",
+                package_description=None,
+                output_dir=output_dir,
+                resources_src_dir=docs_path,
+                resources_package_dir="docs",
+                directory=f'"{name}"',
+                edit_url_template="None",
+                title="None",
+                blog_categories="None",
+            ),
+            repeat=repeat,
+        )
+
+        results.update(benchmark_search_index(os.path.join(root, "search-site"), packages, repeat=repeat))
+    return results
+
+
+def benchmark_packager_tree(files: int, repeat: int = 3) -> Dict[str, float]:
+    """Times packaging of a single docs package with `files` small pages spread over directories of 100 files."""
+    with tempfile.TemporaryDirectory() as root:
+        docs_path = os.path.join(root, "docs")
+        for index in range(files):
+            path = Path(docs_path, f"section-{index // 100}", f"page-{index % 100}.md")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# Page {index}\n\nContent of page {index}\n", encoding="utf8")
+        output_dir = os.path.join(root, "wheels")
+        os.makedirs(output_dir, exist_ok=True)
+        seconds = measure(
+            lambda: Packager("docs-package").pack(
+                package_name="tree",
+                package_version="1.0.0",
+                package_description=None,
+                output_dir=output_dir,
+                resources_src_dir=docs_path,
+                resources_package_dir="docs",
+                directory='"tree"',
+                edit_url_template="None",
+                title="None",
+                blog_categories="None",
+            ),
+            repeat=repeat,
+        )
+    return {"packager_pack": seconds}
+
+
+def benchmark_search_index(root: str, packages: list[tuple[str, str]], repeat: int = 3) -> Dict[str, float]:
+    """Times search indexing of rendered pages without and with search index fragments stored in packages."""
+    results = {}
+    os.makedirs(root, exist_ok=True)
+    mkdocs_yaml_path = os.path.join(root, "mkdocs.yml")
+    Path(mkdocs_yaml_path).write_text("site_name: benchmark\nplugins:\n  - search\n", encoding="utf8")
+    for case, with_fragments in [("search_index", False), ("search_index_fragments", True)]:
+        if with_fragments:
+            for _, docs_path in packages:
+                fragment = build_search_fragment(docs_path, mkdocs_yaml_path)
+                Path(docs_path, FRAGMENT_FILE).write_text(json.dumps(fragment), encoding="utf8")
+        site = Site(root, packages, plugins=["search"])
+        try:
+            results[case] = measure(Site.search_index, setup=site.render_pages, repeat=repeat)
+        finally:
+            site.shutdown()
+    return results
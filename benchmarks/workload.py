@@ -0,0 +1,107 @@
+import os
+import random
+import struct
+import zlib
+from pathlib import Path
+
+import frontmatter
+
+WORDS = (
+    "package documentation site page section install configure deploy release build plugin content "
+    "version directory reference guide overview example option value service client server"
+).split()
+
+
+def png(width: int, height: int, seed: int) -> bytes:
+    def chunk(chunk_type: bytes, data: bytes):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    rnd = random.Random(seed)
+    raw = b"".join(b"\0" + bytes(rnd.getrandbits(8) for _ in range(width * 3)) for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+def text(rnd: random.Random, words: int):
+    return " ".join(rnd.choice(WORDS) for _ in range(words))
+
+
+class Workload:
+    """Synthetic set of docs packages used by benchmarks."""
+
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        packages=10,
+        pages=20,
+        with_frontmatter=True,
+        media=2,
+        media_size=64,
+        shared_index=True,
+        redirects=1,
+        blog_posts=0,
+        seed=42,
+    ):
+        self.packages = packages
+        self.pages = pages
+        self.with_frontmatter = with_frontmatter
+        self.media = media
+        self.media_size = media_size
+        self.shared_index = shared_index
+        self.redirects = redirects
+        self.blog_posts = blog_posts
+        self.seed = seed
+
+    @property
+    def name(self):
+        return f"{self.packages}x{self.pages}"
+
+    def generate(self, root: str) -> list[tuple[str, str]]:
+        """Writes packages to `root` and returns list of (package name, docs path)."""
+        rnd = random.Random(self.seed)
+        result = []
+        for package in range(self.packages):
+            name = f"pkg-{package}"
+            docs_path = os.path.join(root, name)
+            self.__generate_package(rnd, package, name, docs_path)
+            result.append((name, docs_path))
+        return result
+
+    def __generate_package(self, rnd: random.Random, package: int, name: str, docs_path: str):
+        # Packages are injected to the site root, so content is placed to the directory named after package
+        # while `index.md` is shared by all packages and merged
+        if self.shared_index:
+            self.__write_page(docs_path, "index.md", f"# Home\n\n## {name}\n\n{text(rnd, 50)}\n", {"title": "Home"})
+
+        for media in range(self.media):
+            path = Path(docs_path, name, "img", f"image-{media}.png")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(png(self.media_size, self.media_size, seed=package * 1000 + media))
+
+        for page in range(self.pages):
+            section = f"section-{page % 5}"
+            links = [f"[next](../section-{(page + 1) % 5}/page-{page + 1}.md)" if page + 1 < self.pages else ""]
+            if self.media > 0:
+                links.append(f"![image](../img/image-{page % self.media}.png)")
+            content = f"# Page {page}\n\n{text(rnd, 200)}\n\n" + "\n\n".join(links) + "\n\n## Details\n\n"
+            content += f"{text(rnd, 200)}\n\n```python\nprint('{name}')\n```\n"
+            meta = {"title": f"{name} page {page}", "tags": [section, name]}
+            if page < self.redirects:
+                meta["redirects"] = [f"{name}/old/page-{page}.md"]
+            self.__write_page(docs_path, f"{name}/{section}/page-{page}.md", content, meta)
+
+        for post in range(self.blog_posts):
+            meta = {"date": f"2024-01-{post % 28 + 1:02d}", "categories": [name]}
+            content = f"# Post {post} of {name}\n\n{text(rnd, 100)}\n"
+            self.__write_page(docs_path, f"blog/posts/{name}-post-{post}.md", content, meta)
+
+    def __write_page(self, docs_path: str, path: str, content: str, meta: dict):
+        post = frontmatter.Post(content)
+        if self.with_frontmatter:
+            post.metadata.update(meta)
+        path = Path(docs_path, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(frontmatter.dumps(post), encoding="utf8")
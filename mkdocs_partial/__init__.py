@@ -1,6 +1,13 @@
 import re
 
-from mkdocs_partial.mkdcos_helpers import replace_mkdocs_plugin_entrypoint
+from mkdocs_partial.plugin_registry import PluginRegistry
+
+# Frozen site package takes entry points from the registry bundled when it is built. Installed before mkdocs is imported
+PluginRegistry.install_frozen()
+
+from mkdocs_partial.mkdcos_helpers import (  # noqa: E402 pylint: disable=wrong-import-position
+    replace_mkdocs_plugin_entrypoint,
+)
 
 PACKAGE_NAME_RESTRICTED_CHARS = re.compile(r"[^A-Za-z0-9+_-]")
 MODULE_NAME_RESTRICTED_CHARS = re.compile(r"[^a-z0-9+_]")
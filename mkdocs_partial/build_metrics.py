@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+from abc import ABC
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+
+class BuildMetrics(ABC):
+    """Build statistics exposed as Prometheus/OpenMetrics text file for node-exporter textfile collector."""
+
+    PREFIX = "mkdocs_partial"
+    # Buckets of build duration histogram in seconds. Livereload rebuilds are observed by the same histogram
+    BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        # package -> (version, pages, media)
+        self.packages: Dict[str, Tuple[str | None, int, int]] = {}
+        # cache -> (hits, misses)
+        self.caches: Dict[str, Tuple[int, int]] = {}
+        self.bytes_written = 0
+        self.builds = 0
+        self.__bucket_counts: List[int] = [0] * len(self.BUCKETS)
+        self.__duration_sum = 0.0
+
+    def start_build(self):
+        self.phases = {}
+        self.packages = {}
+        self.caches = {}
+        self.bytes_written = 0
+
+    @classmethod
+    def combine(cls, shards: List[BuildMetrics]) -> BuildMetrics:
+        """Metrics of the build done by several processes. Duration and size of the build are set by the caller."""
+        metrics = cls()
+        for shard in shards:
+            # Processes run phases concurrently, so the slowest one is the duration of the phase
+            for phase, seconds in shard.phases.items():
+                metrics.phases[phase] = max(seconds, metrics.phases.get(phase, 0.0))
+            # Every process ingests all docs packages
+            metrics.packages.update(shard.packages)
+            for name, (hits, misses) in shard.caches.items():
+                total_hits, total_misses = metrics.caches.get(name, (0, 0))
+                metrics.caches[name] = (total_hits + hits, total_misses + misses)
+        return metrics
+
+    def observe_build(self, seconds: float):
+        self.builds += 1
+        self.__duration_sum += seconds
+        for i, bucket in enumerate(self.BUCKETS):
+            if seconds <= bucket:
+                self.__bucket_counts[i] += 1
+
+    def format(self) -> str:
+        lines = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List[Tuple[str, dict, float]]):
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {self.PREFIX}_{name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{escape(label)}"' for key, label in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{self.PREFIX}_{name}{suffix}{label_text} {value}")
+
+        metric(
+            "build_phase_seconds",
+            "gauge",
+            "Duration of build phases of the last build.",
+            [("", {"phase": phase}, seconds) for phase, seconds in self.phases.items()],
+        )
+        metric(
+            "build_seconds",
+            "histogram",
+            "Duration of builds including livereload rebuilds.",
+            [("_bucket", {"le": bucket}, count) for bucket, count in zip(self.BUCKETS, self.__bucket_counts)]
+            + [
+                ("_bucket", {"le": "+Inf"}, self.builds),
+                ("_sum", {}, self.__duration_sum),
+                ("_count", {}, self.builds),
+            ],
+        )
+        metric(
+            "package_info",
+            "gauge",
+            "Docs packages injected to the site.",
+            [("", {"package": name, "version": version or ""}, 1) for name, (version, _, _) in self.packages.items()],
+        )
+        metric(
+            "package_pages",
+            "gauge",
+            "Markdown pages injected by docs package.",
+            [("", {"package": name}, pages) for name, (_, pages, _) in self.packages.items()],
+        )
+        metric(
+            "package_media",
+            "gauge",
+            "Media files injected by docs package.",
+            [("", {"package": name}, media) for name, (_, _, media) in self.packages.items()],
+        )
+        metric(
+            "cache_hits",
+            "gauge",
+            "Cache hits of the last build.",
+            [("", {"cache": name}, hits) for name, (hits, _) in self.caches.items()],
+        )
+        metric(
+            "cache_misses",
+            "gauge",
+            "Cache misses of the last build.",
+            [("", {"cache": name}, misses) for name, (_, misses) in self.caches.items()],
+        )
+        metric(
+            "cache_hit_ratio",
+            "gauge",
+            "Cache hit ratio of the last build.",
+            [
+                ("", {"cache": name}, hits / (hits + misses))
+                for name, (hits, misses) in self.caches.items()
+                if hits + misses > 0
+            ],
+        )
+        metric("site_bytes", "gauge", "Total size of the built site.", [("", {}, self.bytes_written)])
+        metric("builds_total", "counter", "Builds since start including livereload rebuilds.", [("", {}, self.builds)])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        Path(os.path.dirname(os.path.abspath(path))).mkdir(parents=True, exist_ok=True)
+        # Textfile collector may read the file at any moment, so it is replaced atomically
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        Path(tmp_path).write_text(self.format(), encoding="utf8")
+        os.replace(tmp_path, path)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import os
+import time
+from abc import ABC
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from mkdocs.plugins import BasePlugin
+
+# Stats of the running build. `None` if stats collection is disabled
+current_build_stats: ContextVar[BuildStats | None] = ContextVar("current_build_stats", default=None)
+
+
+def format_table(rows: List[List[str]]) -> str:
+    """Aligns rows to columns. First column is aligned left, others right."""
+    widths = [max(len(row[i]) for row in rows if i < len(row)) for i in range(max(len(row) for row in rows))]
+    return "\n".join(
+        "  ".join(
+            value.ljust(width) if i == 0 else value.rjust(width) for i, (value, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+def timed_events(cls):
+    """Class decorator timing event handlers of the plugin class for stats of the running build (if they name the
+    plugin)."""
+    for attr in dir(cls):
+        method = getattr(cls, attr)
+        if attr.startswith("on_") and inspect.isfunction(method) and method is not getattr(BasePlugin, attr, None):
+            setattr(cls, attr, _timed_event(method))
+    return cls
+
+
+def _timed_event(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def timed(plugin, *args, **kwargs):
+        stats = current_build_stats.get()
+        name = None if stats is None else stats.names.get(plugin, None)
+        if name is None:
+            return method(plugin, *args, **kwargs)
+        with stats.timer(name, method.__name__):
+            return method(plugin, *args, **kwargs)
+
+    return timed
+
+
+class BuildStats(ABC):
+    """Per package timings of plugin hooks and counters collected during the build."""
+
+    def __init__(self):
+        # package -> hook -> [seconds, calls]
+        self.timings: Dict[str, Dict[str, List]] = {}
+        # package -> counter -> value
+        self.counters: Dict[str, Dict[str, int]] = {}
+        # plugin -> package name its events are timed for
+        self.names: Dict[BasePlugin, str] = {}
+
+    @staticmethod
+    def count(package: str, counter: str, value: int = 1):
+        stats = current_build_stats.get()
+        if stats is not None:
+            counters = stats.counters.setdefault(package, {})
+            counters[counter] = counters.get(counter, 0) + value
+
+    @staticmethod
+    def measure(package: str, hook: str):
+        stats = current_build_stats.get()
+        if stats is None:
+            return nullcontext()
+        return stats.timer(package, hook)
+
+    @contextmanager
+    def timer(self, package: str, hook: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = self.timings.setdefault(package, {}).setdefault(hook, [0.0, 0])
+            timing[0] += time.perf_counter() - start
+            timing[1] += 1
+
+    def total(self, package: str) -> float:
+        # Only event handlers are summed up, other timings are measured within them
+        return sum(seconds for hook, (seconds, _) in self.timings.get(package, {}).items() if hook.startswith("on_"))
+
+    def to_dict(self):
+        packages = sorted(set(self.timings) | set(self.counters), key=self.total, reverse=True)
+        return {
+            package: {
+                "total_seconds": self.total(package),
+                "hooks": {
+                    hook: {"seconds": seconds, "calls": calls}
+                    for hook, (seconds, calls) in self.timings.get(package, {}).items()
+                    if calls > 0
+                },
+                "counters": dict(self.counters.get(package, {})),
+            }
+            for package in packages
+        }
+
+    def merge(self, report: dict):
+        """Adds timings and counters of the report (see `to_dict`) collected by another process."""
+        for package, stats in report.items():
+            timings = self.timings.setdefault(package, {})
+            for hook, timing in stats["hooks"].items():
+                seconds, calls = timings.get(hook, [0.0, 0])
+                timings[hook] = [seconds + timing["seconds"], calls + timing["calls"]]
+            counters = self.counters.setdefault(package, {})
+            for counter, value in stats["counters"].items():
+                counters[counter] = counters.get(counter, 0) + value
+
+    def format_table(self) -> str:
+        report = self.to_dict()
+        hooks = sorted({hook for package in report.values() for hook in package["hooks"]})
+        counters = sorted({counter for package in report.values() for counter in package["counters"]})
+        header = ["package", "total ms"] + [f"{hook} ms" for hook in hooks] + counters
+        rows = [header]
+        for package, stats in report.items():
+            rows.append(
+                [package, f"{stats['total_seconds'] * 1000:.1f}"]
+                + [f"{stats['hooks'][hook]['seconds'] * 1000:.1f}" if hook in stats["hooks"] else "" for hook in hooks]
+                + [str(stats["counters"].get(counter, "")) for counter in counters]
+            )
+        return format_table(rows)
+
+    def write_json(self, path: str):
+        Path(os.path.dirname(os.path.abspath(path))).mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf8")
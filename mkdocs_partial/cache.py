@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import re
+from abc import ABC
+from pathlib import Path
+from typing import Any
+
+
+def hash_text(*values: str) -> str:
+    sha256 = hashlib.sha256()
+    for value in values:
+        sha256.update(value.encode("utf8"))
+        sha256.update(b"\0")
+    return sha256.hexdigest()
+
+
+def file_hash(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as stream:
+        while chunk := stream.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def hash_json(value: Any) -> str:
+    return hash_text(json.dumps(value, sort_keys=True, default=str))
+
+
+def stable_json(value: Any) -> str:
+    # Markdown extension configs may refer functions (e.g. superfences formatters), their repr contains address
+    return json.dumps(value, sort_keys=True, default=lambda item: ADDRESS.sub("", str(item)))
+
+
+class PersistentCache(ABC):
+    """Directory backed key/value cache. Each entry is stored as separate json file named by the key."""
+
+    def __init__(self, cache_dir: str):
+        self.__cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_dir(self):
+        return self.__cache_dir
+
+    def get(self, key: str) -> Any | None:
+        path = self.__get_path(key)
+        try:
+            value = json.loads(Path(path).read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        path = self.__get_path(key)
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+        # Write to temp file first so concurrent builds never read partially written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        Path(tmp_path).write_text(json.dumps(value), encoding="utf8")
+        os.replace(tmp_path, path)
+
+    def __get_path(self, key: str):
+        return os.path.join(self.__cache_dir, key[:2], f"{key}.json")
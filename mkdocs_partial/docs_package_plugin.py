@@ -1,12 +1,14 @@
 # pylint: disable=unused-argument
 from __future__ import annotations
 
-import glob
+import hashlib
 import inspect
+import json
 import logging
 import os
 import re
 import tempfile
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Callable
 
@@ -31,21 +33,31 @@ from mkdocs_partial import (
     SPELLCHECK_ENTRYPOINT_NAME,
     SPELLCHECK_ENTRYPOINT_SHIM,
 )
+from mkdocs_partial.build_stats import BuildStats, current_build_stats, timed_events
+from mkdocs_partial.image_size import IMAGE_EXTENSIONS, ImageSizes, add_image_attributes
 from mkdocs_partial.integrations.material_blog_integration import MaterialBlogsIntegration
+from mkdocs_partial.media_store import DIGESTS_FILE, current_media_store, fingerprint_uri
+from mkdocs_partial.memory_stats import MemoryStats, current_memory_stats
 from mkdocs_partial.mkdcos_helpers import get_mkdocs_plugin, get_mkdocs_plugin_name, normalize_path
+from mkdocs_partial.package_state import PackageState
+from mkdocs_partial.search_fragments import FRAGMENT_FILE, SearchFragments
 
 Loader.add_constructor("!docs_package_relative", lambda loader, node: DocsPackageDirPlaceholder())
 
+# Package of the page being rendered. Context local, so pages rendered concurrently resolve their own package
+current_package: ContextVar[DocsPackagePlugin | None] = ContextVar("current_docs_package", default=None)
+
 
 class DocsPackageDirPlaceholder(os.PathLike):
 
     def __fspath__(self) -> str:
         """Can be used as a path."""
-        if DocsPackagePlugin.current is None:
+        package = current_package.get()
+        if package is None:
             non_existing_path = os.path.join(tempfile.gettempdir(), "DefinitelyNonExistingDirectory_123456789")
             assert not os.path.exists(non_existing_path)  # Ensure it does not exist
             return non_existing_path
-        return DocsPackagePlugin.current.docs_path
+        return package.docs_path
 
     def __str__(self) -> str:
         """Can be converted to a string to obtain the current class."""
@@ -60,6 +72,8 @@ class DocsPackagePluginConfig(Config):
     name = config_options.Optional(config_options.Type(str))
     blog_categories = config_options.Optional(config_options.Type(str))
     title = config_options.Optional(config_options.Type(str))
+    fingerprint_media = config_options.Type(bool, default=False)
+    image_attributes = config_options.Type(bool, default=False)
 
     def patch(self, patch: DocsPackagePluginConfig):
         if patch.docs_path is not None:
@@ -68,12 +82,13 @@ class DocsPackagePluginConfig(Config):
             self.directory = patch.directory
 
 
-class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
+@timed_events
+class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):  # pylint: disable=too-many-public-methods
     supports_multiple_instances = True
     H1_TITLE = re.compile(r"^#[^#]", flags=re.MULTILINE)
     TITLE = re.compile(r"^#", flags=re.MULTILINE)
-
-    current: DocsPackagePlugin = None
+    PAGES_GLOB = "**/*.md"
+    MEDIA_GLOBS = ("**/*.png", "**/*.pdf")
 
     @property
     def directory(self):
@@ -89,6 +104,7 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
         self.__directory = directory
         self.__edit_url_template = edit_url_template
         self.__files: list[File] = []
+        self.__media_count = 0
         self.__blog_integration = MaterialBlogsIntegration()
         self.__plugin_name = ""
         self.__log = get_plugin_logger("partial_docs")
@@ -98,6 +114,15 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
         if self.__blog_categories is None:
             self.__blog_categories = self.__directory
         self.__index_file = None
+        self.__redirects_plugin = None
+        self.__search_fragments: SearchFragments | None = None
+        self.__search_fragment: dict[str, dict] | None = None
+        self.__media_digests: dict[str, list] = {}
+        self.__image_sizes: list[tuple[File, tuple[int, int]]] = []
+        self.__image_urls: dict[str, tuple[int, int]] | None = None
+        self.__known_image_sizes = ImageSizes()
+        self.__state: PackageState | None = None
+        self.__is_serve = False
 
     @property
     def version(self):
@@ -107,9 +132,25 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
     def docs_path(self):
         return self.__docs_path
 
+    @property
+    def name(self):
+        return self.__plugin_name
+
+    @property
+    def page_count(self):
+        return len(self.__files)
+
+    @property
+    def media_count(self):
+        return self.__media_count
+
+    @property
+    def blog_integration(self):
+        return self.__blog_integration
+
     def on_startup(self, *, command, dirty):
         # Mkdocs handles plugins with on_startup singletons
-        pass
+        self.__is_serve = command == "serve"
 
     def on_shutdown(self) -> None:
         # Disable shin in case mkdocs is rebuilding without doc_package plugins enabled
@@ -118,7 +159,8 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
 
     @plugins.event_priority(100)
     def on_pre_build(self, *, config: MkDocsConfig) -> None:
-        self.__blog_integration.sync()
+        with BuildStats.measure(self.__plugin_name, "blog sync"), MemoryStats.track(self.__plugin_name, "blog sync"):
+            self.__blog_integration.sync()
 
     @plugins.event_priority(-100)
     def on_config(self, config: MkDocsConfig) -> MkDocsConfig | None:
@@ -157,6 +199,8 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
             self.__log.info("Enabling `mkdocs_spellcheck` integration.")
             mkdocs_partial.SpellCheckShimActive = True
 
+        self.__redirects_plugin = get_mkdocs_plugin(REDIRECTS_ENTRYPOINT_NAME, REDIRECTS_ENTRYPOINT_SHIM, config)
+
         macros_plugin = get_mkdocs_plugin(MACROS_ENTRYPOINT_NAME, MACROS_ENTRYPOINT_SHIM, config)
         if macros_plugin is not None:
             self.__log.info("Detected configured mkdocs_macros plugin. Registering filters")
@@ -178,58 +222,128 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
             return files
 
         self.__files = []
+        self.__media_count = 0
+        self.__image_sizes = []
+        self.__image_urls = None
+        self.__known_image_sizes.start_build()
         if not os.path.isdir(self.__docs_path):
             return files
 
-        for file_path in glob.glob(os.path.join(self.__docs_path, "**/*.md"), recursive=True):
-            self.add_md_file(file_path, files, config)
-        for file_path in glob.glob(os.path.join(self.__docs_path, "**/*.png"), recursive=True):
-            self.add_media_file(file_path, files, config)
-        for file_path in glob.glob(os.path.join(self.__docs_path, "**/*.pdf"), recursive=True):
-            self.add_media_file(file_path, files, config)
-
-        if mkdocs_partial.SpellCheckShimActive:
-            known_words = os.path.join(self.__docs_path, "known_words.txt")
-            if os.path.isfile(known_words):
-                self.add_media_file(known_words, files, config)
+        with MemoryStats.track(self.__plugin_name, "on_files"):
+            self.load_search_fragment(config)
+            self.load_media_digests()
+            if self.__is_serve:
+                self.__state = PackageState.get(self.__plugin_name, self.__version, self.config.data)
+            else:
+                # Package is ingested once per `build`, state kept for the process lifetime is of no use
+                self.__state = PackageState()
+            index = self.__state.scan(self.__docs_path, (self.PAGES_GLOB,) + self.MEDIA_GLOBS)
+            for file_path in index[self.PAGES_GLOB]:
+                self.add_md_file(file_path, files, config)
+            for media_glob in self.MEDIA_GLOBS:
+                for file_path in index[media_glob]:
+                    self.add_media_file(file_path, files, config)
+
+            if mkdocs_partial.SpellCheckShimActive:
+                known_words = os.path.join(self.__docs_path, "known_words.txt")
+                if os.path.isfile(known_words):
+                    self.add_media_file(known_words, files, config)
 
         return files
 
+    def load_search_fragment(self, config: MkDocsConfig):
+        self.__search_fragments = None
+        self.__search_fragment = None
+        path = os.path.join(self.__docs_path, FRAGMENT_FILE)
+        if not os.path.isfile(path):
+            return
+        self.__search_fragments = SearchFragments.install(config)
+        if self.__search_fragments is None:
+            return
+        try:
+            self.__search_fragment = self.__search_fragments.load(path)
+        except (OSError, ValueError) as e:
+            self.__log.warning(f"Can not load search index fragment '{path}': {e}")
+            return
+        if self.__search_fragment is None:
+            self.__log.info("Search index fragment is built with different theme, markdown or search config. Ignoring")
+
+    def load_media_digests(self):
+        self.__media_digests = {}
+        path = os.path.join(self.__docs_path, DIGESTS_FILE)
+        if not os.path.isfile(path):
+            return
+        try:
+            self.__media_digests = json.loads(Path(path).read_text(encoding="utf8"))
+        except (OSError, ValueError) as e:
+            self.__log.warning(f"Can not load media digests '{path}': {e}")
+
+    def get_media_digest(self, path) -> str | None:
+        # Digest computed at package time is trusted while the file has size and modification time (whole seconds)
+        # it had when packaged. Manifest of older packages has no modification time, so their media is hashed
+        entry = self.__media_digests.get(normalize_path(os.path.relpath(path, self.__docs_path)), None)
+        if entry is None or len(entry) != 3:
+            return None
+        size, mtime, digest = entry
+        stat = os.stat(path)
+        if size == stat.st_size and int(stat.st_mtime) == mtime:
+            return digest
+        return None
+
     def add_md_file(self, file_path, files: Files, config):
         if self.__blog_integration.is_blog_related(file_path):
             return
 
-        md = frontmatter.loads(Path(file_path).read_text(encoding="utf8"))
+        md = self.__state.read_page(file_path)
+        BuildStats.count(self.__plugin_name, "files")
+        if current_build_stats.get() is not None:
+            BuildStats.count(self.__plugin_name, "bytes", os.path.getsize(file_path))
         src_uri, is_index = self.get_src_uri(file_path)
         existing_file = files.src_uris.get(src_uri, None)
         if existing_file is not None:
-            existing = frontmatter.loads(existing_file.content_string)
-            content = existing.content + "\n\n" + md.content
-            if len(self.H1_TITLE.findall(content)) > 1:
-                content = self.TITLE.sub("##", content)
-
-            meta = dict(existing.metadata)
-            meta.update(md.metadata)
-            md = frontmatter.Post(content)
-            md.metadata.update(meta)
+            BuildStats.count(self.__plugin_name, "merges")
+            with MemoryStats.track(self.__plugin_name, "merges"):
+                md = self.merge(existing_file, md)
             files.remove(existing_file)
         if is_index and self.__title is not None:
             md.metadata["title"] = self.__title
         md.metadata["partial"] = True
         md.metadata["docs_package"] = self.__plugin_name
-        file: File = File.generated(config=config, src_uri=src_uri, content=frontmatter.dumps(md))
+        # Merged page depends on pages of other packages, so it is not reused by the next rebuild
+        content = frontmatter.dumps(md) if existing_file is not None else self.__state.dump_page(file_path, md)
+        if current_memory_stats.get() is not None:
+            MemoryStats.count(self.__plugin_name, "files")
+            MemoryStats.count(self.__plugin_name, "markdown", len(content.encode("utf8")))
+        file: File = File.generated(config=config, src_uri=src_uri, content=content)
         files.append(file)
         if is_index and self.__title is not None and not existing_file:
             self.__index_file = file
         self.__files.append(file)
+        if self.__search_fragment is not None and existing_file is None:
+            # Merged pages are indexed as rendered within the site
+            page_fragment = self.__search_fragment.get(normalize_path(os.path.relpath(file_path, self.__docs_path)))
+            if page_fragment is not None:
+                self.__search_fragments.register(file, page_fragment)
 
-        redirects_plugin = get_mkdocs_plugin(REDIRECTS_ENTRYPOINT_NAME, REDIRECTS_ENTRYPOINT_SHIM, config)
-        if redirects_plugin is not None:
+        if self.__redirects_plugin is not None:
             normalized_redirects = [
                 f"{self.directory}/{redirect}".replace("\\", "/").replace("//", "/")
                 for redirect in md.metadata.get("redirects", [])
             ]
-            redirects_plugin.add_redirects(files, file, normalized_redirects, config)
+            BuildStats.count(self.__plugin_name, "redirects", len(normalized_redirects))
+            self.__redirects_plugin.add_redirects(file, normalized_redirects, self.__plugin_name)
+
+    def merge(self, existing_file: File, md: frontmatter.Post) -> frontmatter.Post:
+        existing = frontmatter.loads(existing_file.content_string)
+        content = existing.content + "\n\n" + md.content
+        if len(self.H1_TITLE.findall(content)) > 1:
+            content = self.TITLE.sub("##", content)
+
+        meta = dict(existing.metadata)
+        meta.update(md.metadata)
+        merged = frontmatter.Post(content)
+        merged.metadata.update(meta)
+        return merged
 
     def on_nav(self, nav: Navigation, /, *, config: MkDocsConfig, files: Files) -> Navigation | None:
         if self.__index_file is None:
@@ -264,9 +378,35 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
             self.__log.warning(
                 f"Can not register file '{src_uri}' as there is already file with same path.{plugin_info}"
             )
+            BuildStats.count(self.__plugin_name, "conflicts")
             return
-        file = File.generated(config=config, src_uri=src_uri, content=Path(path).read_bytes())
+        fingerprint = self.config.fingerprint_media
+        digest = self.get_media_digest(path)
+        store = current_media_store.get()
+        if store is not None:
+            # Content is not kept in memory, file is copied (or linked) from the source path
+            file = store.add(config, src_uri, path, self.__plugin_name, digest, fingerprint)
+            BuildStats.count(self.__plugin_name, "files")
+            if current_build_stats.get() is not None:
+                BuildStats.count(self.__plugin_name, "bytes", os.path.getsize(path))
+            MemoryStats.count(self.__plugin_name, "files")
+        else:
+            content = Path(path).read_bytes()
+            BuildStats.count(self.__plugin_name, "files")
+            BuildStats.count(self.__plugin_name, "bytes", len(content))
+            MemoryStats.count(self.__plugin_name, "files")
+            MemoryStats.count(self.__plugin_name, "media", len(content))
+            file = File.generated(config=config, src_uri=src_uri, content=content)
+            if fingerprint:
+                # Pages link media by `src_uri`, so links are resolved to the fingerprinted url by mkdocs
+                digest = hashlib.sha256(content).hexdigest() if digest is None else digest
+                file.dest_uri = fingerprint_uri(file.dest_uri, digest)
         files.append(file)
+        self.__media_count += 1
+        if self.config.image_attributes and path.lower().endswith(IMAGE_EXTENSIONS):
+            size = self.__known_image_sizes.get(path, digest)
+            if size is not None:
+                self.__image_sizes.append((file, size))
 
     def get_src_uri(self, file_path):
         is_index = False
@@ -285,10 +425,18 @@ class DocsPackagePlugin(BasePlugin[DocsPackagePluginConfig]):
 
     def on_pre_page(self, page: Page, /, *, config: MkDocsConfig, files: Files) -> Page | None:
         if page.file in self.__files:
-            DocsPackagePlugin.current = self
+            current_package.set(self)
         return page
 
+    def on_page_content(self, html: str, /, *, page: Page, config: MkDocsConfig, files: Files) -> str | None:
+        if len(self.__image_sizes) == 0 or page.file not in self.__files:
+            return html
+        if self.__image_urls is None:
+            # Urls are resolved after all files are registered, as fingerprints and deduplication change them
+            self.__image_urls = {file.url: size for file, size in self.__image_sizes}
+        return add_image_attributes(html, self.__image_urls, page.url)
+
     def on_post_page(self, output: str, /, *, page: Page, config: MkDocsConfig) -> str | None:
         if page.file in self.__files:
-            DocsPackagePlugin.current = None
+            current_package.set(None)
         return output
@@ -1,3 +1,4 @@
+import glob
 import logging
 import os
 import sys
@@ -5,6 +6,7 @@ from argparse import ArgumentParser, ArgumentTypeError
 
 from mkdocs_partial import PACKAGE_NAME, PACKAGE_NAME_RESTRICTED_CHARS
 from mkdocs_partial.argparse_types import directory, file
+from mkdocs_partial.packages.image_optimizer import default_cache_dir
 from mkdocs_partial.packages.packager import Packager
 from mkdocs_partial.version import __version__
 
@@ -57,6 +59,14 @@ def run():
         help="f-string template for page edit url with {path} as placeholder for markdown file  path "
         "relative to directory from --docs-dir",
     )
+    package_command.add_argument(
+        "--search-index-config",
+        required=False,
+        type=file,
+        help="mkdocs.yml of the target site. If provided, package pages are rendered with its theme, "
+        "markdown extensions and search plugin config and their search index entries are stored in the package, "
+        "so the site reuses them for unchanged pages instead of indexing",
+    )
 
     site_package_command = add_command_parser(
         subparsers, "site-package", "Creates documentation site-package package from  directory", func=site_package
@@ -72,9 +82,12 @@ def run():
         subparsers, "freeze", "Pins doc package versions in requirements.txt to currently installed", func=freeze
     )
     freeze_command.add_argument(
-        "path",
-        type=file,
-        help="path to requirements.txt",
+        "paths",
+        nargs="+",
+        help="Paths to requirements.txt files or globs (`**` matches any directories, e.g. `**/requirements.txt`)",
+    )
+    freeze_command.add_argument(
+        "--workers", type=int, required=False, default=None, help="Number of files rewritten concurrently"
     )
 
     args = parser.parse_args()
@@ -142,6 +155,25 @@ def add_packager_args(
         help="Pin doc package versions in requirements.txt to currently installed."
         " (if there is no requirements.txt in `--source-dir` directory, has no effect)",
     )
+    parser.add_argument(
+        "--optimize-images",
+        dest="optimize_images",
+        action="store_true",
+        help="Losslessly recompress PNG images and strip their text and time metadata before packaging",
+    )
+    parser.add_argument(
+        "--optimize-images-cache",
+        required=False,
+        default=default_cache_dir(),
+        help="Directory to cache optimized images by hash of the original image. "
+        "Default - `mkdocs-partial/images` in user cache directory",
+    )
+    parser.add_argument(
+        "--templates-cache",
+        required=False,
+        default=None,
+        help="Directory to cache compiled package templates between runs. Default - templates are compiled each run",
+    )
 
 
 def package(args):
@@ -161,6 +193,10 @@ def package(args):
         resources_package_dir="docs",
         requirements_path="requirements.txt",
         freeze=args.freeze,
+        optimize_images=args.optimize_images,
+        images_cache_dir=args.optimize_images_cache,
+        templates_cache_dir=args.templates_cache,
+        search_index_config=args.search_index_config,
         excludes=["requirements.txt", "requirements.txt.j2"] + args.exclude,
         directory="None" if args.directory is None else f'"{args.directory}"',
         edit_url_template="None" if args.edit_url_template is None else f'"{args.edit_url_template}"',
@@ -185,14 +221,34 @@ def site_package(args):
         resources_package_dir="site",
         requirements_path="requirements.txt",
         freeze=args.freeze,
+        optimize_images=args.optimize_images,
+        images_cache_dir=args.optimize_images_cache,
+        templates_cache_dir=args.templates_cache,
         excludes=["requirements.txt", "requirements.txt.j2"] + args.exclude,
     )
     return True, None
 
 
 def freeze(args):
-    Packager.freeze(args.__path)
-    return True, None
+    paths = []
+    for path in args.paths:
+        if glob.has_magic(path):
+            paths.extend(sorted(match for match in glob.glob(path, recursive=True) if os.path.isfile(match)))
+        elif os.path.isfile(path):
+            paths.append(path)
+        else:
+            return False, f"File {path} does not exist"
+    paths = list(dict.fromkeys(os.path.normpath(path) for path in paths))
+    if len(paths) == 0:
+        return False, f"No files match {' '.join(args.paths)}"
+
+    changes = {path: lines for path, lines in Packager.freeze_files(paths, workers=args.workers).items() if lines}
+    report = []
+    for path, lines in changes.items():
+        report.append(path)
+        report.extend(f"  {line}" for line in lines)
+    report.append(f"{len(changes)} of {len(paths)} files changed")
+    return True, "\n".join(report)
 
 
 if __name__ == "__main__":
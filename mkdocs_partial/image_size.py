@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import os
+import posixpath
+import re
+import struct
+from abc import ABC
+from typing import Any, BinaryIO, Dict, Tuple
+
+from mkdocs_partial.packages.image_optimizer import PNG_SIGNATURE
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".svg")
+# Start of frame markers of baseline, progressive, lossless and arithmetic coded jpeg
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Root element of svg is expected within the first bytes of the file (after xml declaration and comments)
+SVG_HEADER_SIZE = 4096
+SVG_TAG = re.compile(rb"<svg\b[^>]*>", flags=re.IGNORECASE)
+SVG_LENGTH = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:px)?\s*$")
+IMG_TAG = re.compile(r"<img\b[^>]*>", flags=re.IGNORECASE)
+SRC_ATTRIBUTE = re.compile(r"""\bsrc\s*=\s*(?:"([^"]*)"|'([^']*)')""", flags=re.IGNORECASE)
+# Urls with scheme, site root relative and fragment only urls
+ABSOLUTE_URL = re.compile(r"^(?:[a-z][a-z0-9+.-]*:|/|#)", flags=re.IGNORECASE)
+
+
+def svg_attribute(tag: bytes, name: str) -> str | None:
+    match = re.search(rf"""\s{name}\s*=\s*(?:"([^"]*)"|'([^']*)')""".encode("utf8"), tag)
+    if match is None:
+        return None
+    return (match.group(1) or match.group(2)).decode("utf8", errors="replace")
+
+
+def read_png_size(stream: BinaryIO) -> Tuple[int, int] | None:
+    header = stream.read(24)
+    if len(header) < 24 or not header.startswith(PNG_SIGNATURE) or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def read_jpeg_size(stream: BinaryIO) -> Tuple[int, int] | None:
+    if stream.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marker = stream.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            # Fill byte
+            stream.seek(-1, os.SEEK_CUR)
+            continue
+        if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD7:
+            # Markers without length
+            continue
+        length = stream.read(2)
+        if len(length) < 2:
+            return None
+        (length,) = struct.unpack(">H", length)
+        if marker[1] in JPEG_SOF_MARKERS:
+            frame = stream.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        stream.seek(length - 2, os.SEEK_CUR)
+
+
+def read_svg_size(stream: BinaryIO) -> Tuple[int, int] | None:
+    match = SVG_TAG.search(stream.read(SVG_HEADER_SIZE))
+    if match is None:
+        return None
+    tag = match.group(0)
+    width, height = svg_attribute(tag, "width"), svg_attribute(tag, "height")
+    if width is not None and height is not None:
+        width, height = SVG_LENGTH.match(width), SVG_LENGTH.match(height)
+        # Relative units (%, em) can not be resolved
+        if width is None or height is None:
+            return None
+        return round(float(width.group(1))), round(float(height.group(1)))
+    view_box = svg_attribute(tag, "viewBox")
+    if view_box is None:
+        return None
+    try:
+        _, _, width, height = (float(value) for value in view_box.replace(",", " ").split())
+    except ValueError:
+        return None
+    return round(width), round(height)
+
+
+def read_image_size(path: str) -> Tuple[int, int] | None:
+    """Reads dimensions of PNG, JPEG or SVG image from its header. Returns `None` if they can not be determined."""
+    readers = {".png": read_png_size, ".jpg": read_jpeg_size, ".jpeg": read_jpeg_size, ".svg": read_svg_size}
+    reader = readers.get(os.path.splitext(path)[1].lower(), None)
+    if reader is None:
+        return None
+    try:
+        with open(path, "rb") as stream:
+            size = reader(stream)
+    except (OSError, struct.error):
+        return None
+    if size is None or size[0] <= 0 or size[1] <= 0:
+        return None
+    return size
+
+
+def add_image_attributes(html: str, sizes: Dict[str, Tuple[int, int]], base_url: str) -> str:
+    """Adds `width`, `height`, `loading="lazy"` and `decoding="async"` to `<img>` tags referencing images
+    with known dimensions. `sizes` are keyed by url of the image, `base_url` is url of the page. Attributes
+    already defined for the tag are kept."""
+
+    def replace(match: re.Match) -> str:
+        tag = match.group(0)
+        src = SRC_ATTRIBUTE.search(tag)
+        if src is None:
+            return tag
+        size = sizes.get(resolve_url(base_url, src.group(1) or src.group(2) or ""), None)
+        if size is None:
+            return tag
+        attributes = ""
+        if re.search(r"\s(?:width|height)\s*=", tag, flags=re.IGNORECASE) is None:
+            attributes += f' width="{size[0]}" height="{size[1]}"'
+        if re.search(r"\sloading\s*=", tag, flags=re.IGNORECASE) is None:
+            attributes += ' loading="lazy"'
+        if re.search(r"\sdecoding\s*=", tag, flags=re.IGNORECASE) is None:
+            attributes += ' decoding="async"'
+        return tag[:4] + attributes + tag[4:]
+
+    return IMG_TAG.sub(replace, html)
+
+
+def resolve_url(base_url: str, url: str) -> str | None:
+    """Resolves url relative to the page url to the site root relative url. Returns `None` for absolute urls."""
+    if url == "" or ABSOLUTE_URL.match(url):
+        return None
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(f"/{base_url}"), url)).lstrip("/")
+
+
+class ImageSizes(ABC):
+    """Dimensions of media images of a docs package. Sizes read by the previous livereload build are reused,
+    so headers of unchanged images are not read again."""
+
+    def __init__(self):
+        # sha256 of the image or (path, size, mtime) if digest is not known -> (width, height)
+        self.sizes: Dict[Any, Tuple[int, int] | None] = {}
+        self.__previous_sizes: Dict[Any, Tuple[int, int] | None] = {}
+
+    def start_build(self):
+        # Only sizes of images added again are kept, so entries of removed or changed images are dropped
+        self.__previous_sizes, self.sizes = self.sizes, {}
+
+    def get(self, path: str, digest: str | None = None) -> Tuple[int, int] | None:
+        if digest is not None:
+            key = digest
+        else:
+            stat = os.stat(path)
+            key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self.sizes:
+            if key in self.__previous_sizes:
+                self.sizes[key] = self.__previous_sizes[key]
+            else:
+                self.sizes[key] = read_image_size(path)
+        return self.sizes[key]
@@ -1,58 +1,108 @@
 import os.path
-from typing import Dict
+import posixpath
+from functools import lru_cache
+from typing import Dict, Set
 
 from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.plugins import get_plugin_logger
+from mkdocs.structure.files import Files
 from mkdocs_macros.plugin import MacrosPlugin  # pylint: disable=import-error
 
+from mkdocs_partial.build_stats import timed_events
 from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
 
+log = get_plugin_logger("partial_docs")
+
 
 # NOTE: has to be replaced with register_filters implementation in PartialDocsPlugin
 #       once https://github.com/fralau/mkdocs-macros-plugin/issues/237 is released
+@timed_events
 class MacrosPluginShim(MacrosPlugin):
     def __init__(self):
         super().__init__()
         self.__docs_packages: Dict[str, DocsPackagePlugin] = {}
-        # self.__log = get_plugin_logger("partial_docs")
+        # Package directories normalized once at registration to be used as link prefixes
+        self.__directories: Dict[str, str] = {}
+        self.__files: Files | None = None
+        # Unknown package or dangling link target -> pages it was found on. Reported once at `on_post_build`
+        self.__problems: Dict[str, Set[str]] = {}
+        self.__resolve_link = lru_cache(maxsize=65536)(self.__resolve)
 
     def register_docs_package(self, name: str, package: DocsPackagePlugin):
         self.__docs_packages[name] = package
+        self.__directories[name] = package.directory.replace("\\", "/").strip("/")
+        self.__resolve_link.cache_clear()
 
     def package_link(self, value, name: str = None):
         page = self.page
         if name is None:
             name = page.meta.get("docs_package", None)
-
-        package = self.__docs_packages.get(name, None)
-        if package is not None:
-            link = os.path.relpath(
-                f"{package.directory.lstrip("/").lstrip("\\")}/{value}", os.path.dirname(page.file.src_path)
-            )
-            link = link.replace("\\", "/")
-            # self.__log.info(f"<package_link> package.directory: {package.directory}, file: {value}, link: {link}")
-            return link
         if name is None:
-            raise LookupError("`package_link` may be used only on pages managed with `docs_package` plugin")
-        raise LookupError(f"Package {name} is not installed")
+            self.__report("`package_link` may be used only on pages managed with `docs_package` plugin")
+            return value
+
+        link, problem = self.__resolve_link(os.path.dirname(page.file.src_path), name, value)
+        if problem is not None:
+            self.__report(problem)
+        return link
+
+    def __report(self, problem: str):
+        self.__problems.setdefault(problem, set()).add(self.page.file.src_path)
+
+    def __resolve(self, page_dir: str, name: str, value: str):
+        directory = self.__directories.get(name, None)
+        if directory is None:
+            return value, f"Package {name} is not installed"
+
+        target = posixpath.join(directory, value) if directory != "" else value
+        link = os.path.relpath(target, page_dir).replace("\\", "/")
+        if not self.__target_exists(target):
+            return link, f"Package {name} does not have '{value}' page"
+        return link, None
+
+    def __target_exists(self, target: str):
+        if self.__files is None:
+            return True
+        src_uris = self.__files.src_uris
+        target = posixpath.normpath(target.split("#", maxsplit=1)[0])
+        return target in src_uris or f"{target}/index.md" in src_uris or f"{target}/README.md" in src_uris
 
     def package_version(self, name: str = None):
         page = self.page
         if name is None or name == "":
             name = page.meta.get("docs_package", None)
         if name is None:
-            raise LookupError(
+            self.__report(
                 "name arg is mandatory for `package_version` when used on pages which are "
                 "not managed with `docs_package` plugin"
             )
+            return ""
 
         package = self.__docs_packages.get(name, None)
         if package is None:
-            raise LookupError(f"Package {name} is not installed")
+            self.__report(f"Package {name} is not installed")
+            return ""
 
         return package.version
 
     def on_config(self, config: MkDocsConfig):
+        self.__resolve_link.cache_clear()
+        self.__problems = {}
+        self.__files = None
         self.filter(self.package_link)
         self.filter(self.package_version)
         super().on_config(config)
         self.env.globals.update({"package_version": self.package_version})
+
+    def on_nav(self, nav, config, files):
+        # Targets are validated against final set of files, links resolved before it has to be resolved again
+        self.__files = files
+        self.__resolve_link.cache_clear()
+        return super().on_nav(nav, config, files)
+
+    def on_post_build(self, config: MkDocsConfig):
+        super().on_post_build(config)
+        problems, self.__problems = self.__problems, {}
+        if len(problems) > 0:
+            lines = [f"{problem} (used on {', '.join(sorted(pages))})" for problem, pages in sorted(problems.items())]
+            log.warning("Docs package macros issues:\n  " + "\n  ".join(lines))
@@ -3,9 +3,10 @@ import glob
 import os
 import posixpath
 import shutil
+import time
 from abc import ABC
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 import frontmatter
 import watchdog.events
@@ -13,6 +14,7 @@ from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.livereload import LiveReloadServer
 
 from mkdocs_partial.mkdcos_helpers import get_mkdocs_plugin, mkdocs_watch_ignore_path
+from mkdocs_partial.package_state import RACY_INTERVAL_NS
 
 
 class MaterialBlogsIntegration(ABC):
@@ -28,6 +30,8 @@ class MaterialBlogsIntegration(ABC):
         self.__docs_path: str | None = None
         self.__docs_dir: str | None = None
         self.__stop = lambda *args: None
+        # Post path -> (size, mtime) when it was synced. Kept between rebuilds, unchanged posts are not synced again
+        self.__synced: Dict[str, Tuple[int, int]] = {}
 
     def init(self, config: MkDocsConfig, docs_path: str, name: str, categories: str = ""):
         blog_plugin = get_mkdocs_plugin("material/blog", "material.plugins.blog.plugin:BlogPlugin", config)
@@ -39,8 +43,12 @@ class MaterialBlogsIntegration(ABC):
             self.__posts_dir = os.path.join(docs_path, blog_posts)
             self.__docs_dir = config.docs_dir
             self.__partial = os.path.join(self.__docs_dir, blog_posts, "partial")
-            self.__target = os.path.join(self.__partial, name)
-            self.__categories = [] if categories == "" or categories is None else categories.split("/")
+            target = os.path.join(self.__partial, name)
+            categories = [] if categories == "" or categories is None else categories.split("/")
+            if target != self.__target or categories != self.__categories:
+                self.__synced = {}
+            self.__target = target
+            self.__categories = categories
             self.__docs_path = docs_path
         return self.__enabled
 
@@ -95,8 +103,12 @@ class MaterialBlogsIntegration(ABC):
         posts = []
         for file_path in glob.glob(os.path.join(self.__posts_dir, "**/*.md"), recursive=True):
             if os.path.isfile(file_path):
-                md = frontmatter.loads(Path(file_path).read_text(encoding="utf8"))
                 abs_path = os.path.join(self.__target, os.path.relpath(file_path, self.__posts_dir))
+                stat = os.stat(file_path)
+                if self.__synced.get(file_path, None) == (stat.st_size, stat.st_mtime_ns) and os.path.isfile(abs_path):
+                    posts.append(os.path.normpath(abs_path))
+                    continue
+                md = frontmatter.loads(Path(file_path).read_text(encoding="utf8"))
                 Path(os.path.dirname(abs_path)).mkdir(parents=True, exist_ok=True)
                 categories: List[str] = md.metadata.setdefault("categories", [])
                 if not isinstance(categories, list):
@@ -105,6 +117,11 @@ class MaterialBlogsIntegration(ABC):
                     md.metadata["categories"] = self.__categories + categories
                 if not os.path.isfile(abs_path) or Path(abs_path).read_text(encoding="utf8") != frontmatter.dumps(md):
                     frontmatter.dump(md, abs_path)
+                if stat.st_mtime_ns < time.time_ns() - RACY_INTERVAL_NS:
+                    self.__synced[file_path] = (stat.st_size, stat.st_mtime_ns)
+                else:
+                    # Post may be changed again within the same mtime tick, so it is synced by the next build too
+                    self.__synced.pop(file_path, None)
                 posts.append(os.path.normpath(abs_path))
 
         for file_path in glob.glob(os.path.join(self.__target, "**/*.md"), recursive=True):
@@ -144,6 +161,7 @@ class MaterialBlogsIntegration(ABC):
 
     def stop(self):
         self.__stop()
+        self.__synced = {}
         if self.__enabled:
             shutil.rmtree(self.__target, ignore_errors=True)
             if os.path.isdir(self.__partial) and not os.listdir(self.__partial):
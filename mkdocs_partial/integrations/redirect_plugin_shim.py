@@ -1,23 +1,72 @@
 import frontmatter
 from mkdocs import plugins
 from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.plugins import get_plugin_logger
 from mkdocs.structure.files import File, Files, InclusionLevel
 from mkdocs_redirects.plugin import RedirectPlugin  # pylint: disable=import-error
 
+from mkdocs_partial.build_stats import timed_events
 
+log = get_plugin_logger("partial_docs")
+
+
+@timed_events
 class RedirectPluginShim(RedirectPlugin):
+    # Stub page registered for each redirect to avoid warnings about missing link targets. Content is same for all
+    # stubs, so it is rendered once and shared
+    STUB_CONTENT = frontmatter.dumps(frontmatter.Post("Redirect", layout="redirect"))
+
+    def __init__(self):
+        super().__init__()
+        self.__redirects: dict[str, tuple[str, str | None]] = {}
+        self.__conflicts: list[str] = []
 
     @plugins.event_priority(-100)
     def on_files(self, files, config, **kwargs):
+        self.register_redirects(files, config)
         return super().on_files(files, config, **kwargs)
 
-    def add_redirects(self, files: Files, file, redirect_from: list[str], config: MkDocsConfig):
+    def add_redirects(self, file: File, redirect_from: list[str], package: str | None = None):
+        """Collects redirects to `file`. They are registered at once by `on_files`."""
+        target = file.src_path.replace("\\", "/")
         for redirect in redirect_from:
-            self.config.setdefault("redirect_maps", {})[redirect] = file.src_path.replace("\\", "/")
-            # Register stub page to avoid warnings about missing link targets
-            stub = frontmatter.Post("Redirect")
-            stub.metadata["layout"] = "redirect"
-            file = File.generated(
-                config=config, src_uri=redirect, content=frontmatter.dumps(stub), inclusion=InclusionLevel.EXCLUDED
+            existing = self.__redirects.setdefault(redirect, (target, package))
+            if existing[0] != target:
+                self.__conflicts.append(
+                    f"'{redirect}' -> '{target}'{self.__from(package)} conflicts with redirect "
+                    f"to '{existing[0]}'{self.__from(existing[1])}"
+                )
+
+    def register_redirects(self, files: Files, config: MkDocsConfig):
+        """Registers redirects collected with `add_redirects` since the previous call."""
+        redirects, self.__redirects = self.__redirects, {}
+        conflicts, self.__conflicts = self.__conflicts, []
+
+        redirect_maps = self.config.setdefault("redirect_maps", {})
+        src_uris = files.src_uris
+        registered = {}
+        for redirect, (target, package) in redirects.items():
+            if redirect in src_uris:
+                conflicts.append(f"'{redirect}' -> '{target}'{self.__from(package)} conflicts with existing page")
+            elif redirect_maps.get(redirect, target) != target:
+                conflicts.append(
+                    f"'{redirect}' -> '{target}'{self.__from(package)} conflicts with `redirect_maps` entry "
+                    f"to '{redirect_maps[redirect]}'"
+                )
+            else:
+                registered[redirect] = target
+
+        redirect_maps.update(registered)
+        for redirect in registered:
+            files.append(
+                File.generated(
+                    config=config, src_uri=redirect, content=self.STUB_CONTENT, inclusion=InclusionLevel.EXCLUDED
+                )
             )
-            files.append(file)
+
+        if len(conflicts) > 0:
+            log.warning(f"{len(conflicts)} redirect(s) skipped due to conflicts:\n  " + "\n  ".join(conflicts))
+
+    @staticmethod
+    def __from(package):
+        return "" if package is None else f" from '{package}'"
@@ -1,20 +1,88 @@
 # pylint: disable=unused-argument
+import importlib.metadata
+import logging
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
 from typing import Any
 
 from mkdocs import plugins
+from mkdocs.config import config_options
 from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.structure.files import Files
 from mkdocs.structure.pages import Page
 from mkdocs_spellcheck.plugin import SpellCheckPlugin  # pylint: disable=import-error
 
 import mkdocs_partial
+from mkdocs_partial.build_stats import timed_events
+from mkdocs_partial.cache import PersistentCache, hash_json, hash_text
+from mkdocs_partial.mkdcos_helpers import collect_log_records, replay_log_records
 
+SPELLCHECK_LOGGER = "mkdocs.plugins.mkdocs_spellcheck"
 
+
+class SpellCheckShimConfig(SpellCheckPlugin.config_class):
+    cache_dir = config_options.Optional(config_options.Type(str))
+    workers = config_options.Type(int, default=0)
+
+
+def collect_spellcheck_warnings():
+    """Collects messages logged by spellcheck backends while keeping them logged as usual."""
+    return collect_log_records(SPELLCHECK_LOGGER)
+
+
+def replay_spellcheck_warnings(warnings: list[list]):
+    replay_log_records(warnings)
+
+
+# Spellcheck plugin instance of the worker process, created once per worker by `init_spellcheck_worker`
+_worker_plugin: SpellCheckPlugin | None = None  # pylint: disable=invalid-name
+
+
+def init_spellcheck_worker(options: dict, known_words: list[str], mkdocs_config: dict):
+    global _worker_plugin  # pylint: disable=global-statement
+    # Warnings are reported by the main process, worker only collects them
+    logging.getLogger(SPELLCHECK_LOGGER).propagate = False
+    plugin = SpellCheckPlugin()
+    plugin.load_config({**options, "known_words": known_words})
+    plugin.on_config(mkdocs_config)
+    _worker_plugin = plugin
+
+
+def spellcheck_in_worker(src_path: str, html: str) -> list[list]:
+    page = SimpleNamespace(file=SimpleNamespace(src_path=src_path), meta={})
+    with collect_spellcheck_warnings() as warnings:
+        _worker_plugin.on_page_content(html, page)
+    return warnings
+
+
+@timed_events
 class SpellCheckShim(SpellCheckPlugin):
+    config_class = SpellCheckShimConfig
     SKIP_SPELLCHECK = re.compile("<!-- *spellcheck: +disable *-->.*?($|<!-- *spellcheck: +enable *-->)", re.DOTALL)
 
+    def __init__(self):
+        super().__init__()
+        self.__cache: PersistentCache | None = None
+        self.__settings_hash = ""
+        self.__queue: list[tuple[str | None, str, str, list | None]] = []
+        self.__strict = False
+
+    @property
+    def cache(self) -> PersistentCache | None:
+        return self.__cache
+
+    def on_config(self, config: MkDocsConfig) -> MkDocsConfig | None:
+        result = super().on_config(config)
+        self.__cache = None
+        self.__queue = []
+        self.__strict = config.strict
+        if self.config.cache_dir is not None:
+            config_dir = os.getcwd() if config.config_file_path is None else os.path.dirname(config.config_file_path)
+            self.__cache = PersistentCache(os.path.join(config_dir, self.config.cache_dir))
+        return result
+
     def on_page_content(self, html: str, page: Page, **kwargs: Any) -> None:
         if not mkdocs_partial.SpellCheckShimActive:
             super().on_page_content(html, page, **kwargs)
@@ -22,15 +90,69 @@ class SpellCheckShim(SpellCheckPlugin):
 
         if page.meta.get("spellcheck", True):
             html_to_spellcheck = self.SKIP_SPELLCHECK.sub("", html)
-            if page.file.generated_by is None:
-                super().on_page_content(html_to_spellcheck, page, **kwargs)
-            else:
-                original_path = page.file.src_path
-                try:
-                    page.file.src_path = f"{page.file.generated_by}:{page.file.src_path}"
-                    super().on_page_content(html_to_spellcheck, page, **kwargs)
-                finally:
-                    page.file.src_path = original_path
+            src_path = page.file.src_path
+            if page.file.generated_by is not None:
+                src_path = f"{page.file.generated_by}:{page.file.src_path}"
+
+            if not getattr(self, "run", True):
+                return
+
+            key = None
+            if self.__cache is not None:
+                # Warnings contain page path, so it is the part of the key along with html and spellcheck settings
+                key = hash_text(self.__settings_hash, src_path, html_to_spellcheck)
+                warnings = self.__cache.get(key)
+                if warnings is not None:
+                    if self.config.workers > 1:
+                        self.__queue.append((key, src_path, html_to_spellcheck, warnings))
+                    else:
+                        replay_spellcheck_warnings(warnings)
+                    return
+
+            if self.config.workers > 1:
+                # Pages are checked in process pool at `on_post_build`
+                self.__queue.append((key, src_path, html_to_spellcheck, None))
+                return
+
+            with collect_spellcheck_warnings() as warnings:
+                self.spellcheck(html_to_spellcheck, page, src_path, **kwargs)
+            if key is not None:
+                self.__cache.set(key, warnings)
+
+    def spellcheck(self, html: str, page: Page, src_path: str, **kwargs: Any):
+        original_path = page.file.src_path
+        try:
+            page.file.src_path = src_path
+            super().on_page_content(html, page, **kwargs)
+        finally:
+            page.file.src_path = original_path
+
+    def on_post_build(self, *, config: MkDocsConfig) -> None:
+        queue, self.__queue = self.__queue, []
+        pending = [(src_path, html) for _, src_path, html, warnings in queue if warnings is None]
+        results = iter([])
+        if len(pending) > 0:
+            excluded_options = ["cache_dir", "workers", "known_words"]
+            options = {name: value for name, value in self.config.items() if name not in excluded_options}
+            mkdocs_config = {"strict": self.__strict, "docs_dir": config.docs_dir}
+            with ProcessPoolExecutor(
+                max_workers=self.config.workers,
+                initializer=init_spellcheck_worker,
+                initargs=(options, sorted(self.known_words), mkdocs_config),
+            ) as executor:
+                results = iter(
+                    executor.map(
+                        spellcheck_in_worker,
+                        *zip(*pending),
+                        chunksize=max(1, len(pending) // (self.config.workers * 4)),
+                    )
+                )
+        for key, _, _, warnings in queue:
+            if warnings is None:
+                warnings = next(results)
+                if key is not None:
+                    self.__cache.set(key, warnings)
+            replay_spellcheck_warnings(warnings)
 
     @plugins.event_priority(-100)
     def on_files(self, files: Files, /, *, config: MkDocsConfig) -> Files | None:
@@ -43,4 +165,14 @@ class SpellCheckShim(SpellCheckPlugin):
             self.known_words.update(file.content_string.splitlines())
             files.remove(file)
 
+        if self.__cache is not None:
+            settings = {name: value for name, value in self.config.items() if name not in ["cache_dir", "workers"]}
+            self.__settings_hash = hash_json(
+                {
+                    "version": importlib.metadata.version("mkdocs-spellcheck"),
+                    "settings": settings,
+                    "known_words": sorted(self.known_words),
+                }
+            )
+
         return files
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import posixpath
+from abc import ABC
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import File
+
+from mkdocs_partial.build_stats import format_table
+from mkdocs_partial.cache import file_hash
+
+MEDIA_DEDUP_MODES = ("hardlink", "url")
+# Manifest of docs package media digests written at package time: relative path -> [size, mtime, sha256]
+DIGESTS_FILE = ".media_digests.json"
+
+# Store of the running build. `None` if deduplication is disabled
+current_media_store: ContextVar[MediaStore | None] = ContextVar("current_media_store", default=None)
+
+
+def fingerprint_uri(uri: str, digest: str) -> str:
+    """Inserts content hash to the file name: `img/diagram.png` -> `img/diagram.3f2a9c1b.png`."""
+    base, ext = posixpath.splitext(uri)
+    return f"{base}.{digest[:8]}{ext}"
+
+
+class MediaFile(File):
+    """Media file of a docs package. Duplicate of the media already registered by another package
+    is hardlinked to the canonical copy instead of being written again."""
+
+    canonical: MediaFile | None = None
+
+    def copy_file(self, dirty: bool = False) -> None:
+        canonical = self.canonical
+        if canonical is None:
+            super().copy_file(dirty)
+            return
+        if self.abs_dest_path == canonical.abs_dest_path:
+            # `url` mode - file is written by the canonical copy, unless it is excluded (e.g. other shard)
+            if not os.path.exists(self.abs_dest_path):
+                super().copy_file(dirty)
+            return
+        if dirty and not self.is_modified():
+            return
+        if not os.path.isfile(canonical.abs_dest_path):
+            super().copy_file(dirty)
+            return
+        os.makedirs(os.path.dirname(self.abs_dest_path), exist_ok=True)
+        if os.path.lexists(self.abs_dest_path):
+            os.remove(self.abs_dest_path)
+        try:
+            os.link(canonical.abs_dest_path, self.abs_dest_path)
+        except OSError:
+            # Filesystem does not support hardlinks or site_dir spans devices
+            super().copy_file(dirty)
+
+
+class MediaStore(ABC):
+    """Build wide content addressed store of docs packages media. Identical media of different packages
+    is read and hashed once and written once: duplicates are hardlinked (`hardlink` mode)
+    or served from the url of the first registered copy (`url` mode)."""
+
+    def __init__(self, mode: str = "hardlink", previous: MediaStore | None = None):
+        self.mode = mode
+        self.__canonical: Dict[str, MediaFile] = {}
+        # package -> [duplicate files, duplicate bytes]
+        self.savings: Dict[str, List[int]] = {}
+        # (path, size, mtime) -> sha256 of media added by the build
+        self.digests: Dict[Tuple[str, int, int], str] = {}
+        # Digests of the previous livereload build, so unchanged media is not hashed again. Only media added
+        # by this build are carried over to the next one, so digests of removed or changed files are dropped
+        self.__previous_digests = {} if previous is None else previous.digests
+
+    def digest(self, path: str, stat: os.stat_result | None = None) -> str:
+        stat = os.stat(path) if stat is None else stat
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self.digests.get(key, None)
+        if digest is None:
+            digest = self.__previous_digests.get(key, None)
+            self.digests[key] = digest = file_hash(path) if digest is None else digest
+        return digest
+
+    def add(  # pylint: disable=too-many-positional-arguments
+        self,
+        config: MkDocsConfig,
+        src_uri: str,
+        path: str,
+        package: str,
+        digest: str | None = None,
+        fingerprint: bool = False,
+    ) -> MediaFile:
+        stat = os.stat(path)
+        digest = self.digest(path, stat) if digest is None else digest
+        file = MediaFile.generated(config, src_uri, abs_src_path=path)
+        if fingerprint:
+            file.dest_uri = fingerprint_uri(file.dest_uri, digest)
+        canonical = self.__canonical.setdefault(digest, file)
+        # Digest may come from the package manifest, so the file is a duplicate only if content hashes match
+        if canonical is not file and self.digest(path, stat) == self.digest(canonical.abs_src_path):
+            file.canonical = canonical
+            if self.mode == "url":
+                # Must be set before `url` of the file is resolved
+                file.dest_uri = canonical.dest_uri
+            savings = self.savings.setdefault(package, [0, 0])
+            savings[0] += 1
+            savings[1] += stat.st_size
+        return file
+
+    def format_table(self) -> str:
+        rows = [["package", "duplicate files", "bytes saved"]]
+        for package, (files, size) in sorted(self.savings.items()):
+            rows.append([package, str(files), str(size)])
+        rows.append(["total"] + [str(sum(values)) for values in zip(*self.savings.values())])
+        return format_table(rows)
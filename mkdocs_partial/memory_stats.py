@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tracemalloc
+from abc import ABC
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List
+
+from mkdocs_partial.build_stats import format_table
+
+# Stats of the running build. `None` if memory accounting is disabled
+current_memory_stats: ContextVar[MemoryStats | None] = ContextVar("current_memory_stats", default=None)
+
+
+def peak_rss() -> int | None:
+    """Highest resident set size the process has reached since it started, in bytes. `None` if platform does not
+    provide it."""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ModuleNotFoundError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def write_report(path: str, report: dict):
+    Path(os.path.dirname(os.path.abspath(path))).mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(report, indent=2), encoding="utf8")
+
+
+class MemoryStats(ABC):
+    """Per package memory retained by docs packages and peak memory of build phases traced with `tracemalloc`."""
+
+    def __init__(self):
+        # package -> metric -> bytes (or count for `files`)
+        self.packages: Dict[str, Dict[str, int]] = {}
+        # phase -> {"traced_peak": bytes}
+        self.phases: Dict[str, Dict[str, int]] = {}
+        self.__started = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started = True
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        if self.__started:
+            tracemalloc.stop()
+            self.__started = False
+
+    @staticmethod
+    def count(package: str, metric: str, value: int = 1):
+        stats = current_memory_stats.get()
+        if stats is not None:
+            metrics = stats.packages.setdefault(package, {})
+            metrics[metric] = metrics.get(metric, 0) + value
+
+    @staticmethod
+    def track(package: str, scope: str):
+        stats = current_memory_stats.get()
+        if stats is None:
+            return nullcontext()
+        return stats.retained(package, scope)
+
+    @contextmanager
+    def retained(self, package: str, scope: str):
+        # Comparing traced memory instead of full snapshots - `take_snapshot` walks the whole heap
+        # and would dominate build time when taken around every package
+        before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            MemoryStats.count(package, f"{scope} retained", tracemalloc.get_traced_memory()[0] - before)
+
+    def end_phase(self, phase: str):
+        self.phases[phase] = {"traced_peak": tracemalloc.get_traced_memory()[1]}
+        tracemalloc.reset_peak()
+
+    def to_dict(self):
+        packages = sorted(self.packages, key=lambda package: self.packages[package].get("on_files retained", 0))
+        return {
+            "phases": dict(self.phases),
+            # Not per phase - RSS high-water mark covers the whole process lifetime (e.g. previous `serve` rebuilds)
+            "process_peak_rss": peak_rss(),
+            "packages": {package: dict(self.packages[package]) for package in reversed(packages)},
+        }
+
+    @staticmethod
+    def combine(reports: List[dict]) -> dict:
+        """Report (see `to_dict`) of the build done by several processes. Processes run concurrently, so their peak
+        RSS is summed up, while phases and packages take the largest values of processes."""
+        phases: Dict[str, Dict[str, int]] = {}
+        packages: Dict[str, Dict[str, int]] = {}
+        peaks = [report["process_peak_rss"] for report in reports if report["process_peak_rss"] is not None]
+        for report in reports:
+            for phase, stats in report["phases"].items():
+                traced_peak = max(stats["traced_peak"], phases.get(phase, {}).get("traced_peak", 0))
+                phases[phase] = {"traced_peak": traced_peak}
+            for package, stats in report["packages"].items():
+                metrics = packages.setdefault(package, {})
+                for metric, value in stats.items():
+                    metrics[metric] = max(value, metrics.get(metric, value))
+        ordered = sorted(packages, key=lambda package: packages[package].get("on_files retained", 0), reverse=True)
+        return {
+            "phases": phases,
+            "process_peak_rss": sum(peaks) if len(peaks) > 0 else None,
+            "packages": {package: packages[package] for package in ordered},
+        }
+
+    def format_table(self) -> str:
+        report = self.to_dict()
+        metrics = sorted({metric for package in report["packages"].values() for metric in package})
+        rows = [["package"] + metrics]
+        for package, stats in report["packages"].items():
+            rows.append([package] + [self.__format(metric, stats.get(metric, None)) for metric in metrics])
+        rows.append([])
+        rows.append(["phase", "traced peak"])
+        for phase, stats in report["phases"].items():
+            rows.append([phase, self.__format("", stats["traced_peak"])])
+        if report["process_peak_rss"] is not None:
+            rows.append([])
+            rows.append(["process peak rss", self.__format("", report["process_peak_rss"])])
+        return format_table(rows)
+
+    @staticmethod
+    def __format(metric: str, value: int | None):
+        if value is None:
+            return ""
+        if metric == "files":
+            return str(value)
+        return f"{value / 1024:.1f} KiB"
+
+    def write_json(self, path: str):
+        write_report(path, self.to_dict())
@@ -1,5 +1,7 @@
 import glob
+import logging
 import os
+from contextlib import contextmanager
 from importlib.metadata import EntryPoint
 from pathlib import Path
 
@@ -10,6 +12,33 @@ from mkdocs.plugins import BasePlugin
 from watchdog.events import FileSystemEvent
 
 
+class LogRecordsCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[list] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append([record.name, record.levelno, record.getMessage()])
+
+
+@contextmanager
+def collect_log_records(logger_name: str | None = None, level: int = logging.NOTSET):
+    """Collects messages logged within the logger tree while keeping them logged as usual."""
+    logger = logging.getLogger(logger_name)
+    collector = LogRecordsCollector()
+    collector.setLevel(level)
+    logger.addHandler(collector)
+    try:
+        yield collector.records
+    finally:
+        logger.removeHandler(collector)
+
+
+def replay_log_records(records: list[list]):
+    for name, level, message in records:
+        logging.getLogger(name).log(level, message)
+
+
 def normalize_path(path: str) -> str:
     return os.path.normpath(path).replace("\\", "/")
 
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import glob
+import os
+import time
+from abc import ABC
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import frontmatter
+
+from mkdocs_partial.cache import hash_json
+
+# Changes made within the same timestamp tick as the scan do not change mtime. Entries modified less than this
+# before they were scanned are not trusted (2 seconds is the coarsest mtime resolution of common filesystems)
+RACY_INTERVAL_NS = 2_000_000_000
+
+
+class PackageState(ABC):
+    """Files scanned and pages parsed by a docs package. Kept for the process lifetime, so `serve` rebuilds reuse
+    them: file index is scanned again only if a directory of the package is changed, pages are parsed again only
+    if their file is changed."""
+
+    # (package name, version, config hash) -> state
+    store: Dict[Tuple[str, str, str], PackageState] = {}
+
+    def __init__(self):
+        # Directory -> mtime. Files are added, removed or renamed only with mtime change of their directory
+        self.__directories: Dict[str, int] = {}
+        # Glob pattern -> matched paths
+        self.__index: Dict[str, List[str]] | None = None
+        # Path -> (size, mtime), metadata, content and `frontmatter.dumps` output of the page
+        self.__pages: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get(cls, name: str, version: str | None, config: Any) -> PackageState:
+        key = (name, str(version), hash_json(config))
+        state = cls.store.get(key, None)
+        if state is None:
+            # State of previous version or config of the package is not needed anymore
+            for stale in [stale for stale in cls.store if stale[0] == name]:
+                del cls.store[stale]
+            state = cls.store[key] = PackageState()
+        return state
+
+    def scan(self, docs_path: str, patterns: Tuple[str, ...]) -> Dict[str, List[str]]:
+        """Returns paths matching each of recursive glob `patterns` within `docs_path`."""
+        if self.__index is not None and self.__is_unchanged():
+            return self.__index
+        # Directories are checked before files are matched, so changes made meanwhile are found by the next scan
+        racy = time.time_ns() - RACY_INTERVAL_NS
+        self.__directories = {}
+        for directory in glob.glob(os.path.join(docs_path, "**/"), recursive=True):
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            self.__directories[directory] = None if mtime >= racy else mtime
+        self.__index = {pattern: glob.glob(os.path.join(docs_path, pattern), recursive=True) for pattern in patterns}
+        paths = {path for matches in self.__index.values() for path in matches}
+        self.__pages = {path: entry for path, entry in self.__pages.items() if path in paths}
+        return self.__index
+
+    def read_page(self, path: str) -> frontmatter.Post:
+        """Returns parsed page. Post is a copy, it may be modified by the caller."""
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        entry = self.__pages.get(path, None)
+        if entry is None or entry[0] != key:
+            self.misses += 1
+            post = frontmatter.loads(Path(path).read_text(encoding="utf8"))
+            if stat.st_mtime_ns >= time.time_ns() - RACY_INTERVAL_NS:
+                key = None
+            entry = self.__pages[path] = [key, post.metadata, post.content, None]
+        else:
+            self.hits += 1
+        post = frontmatter.Post(entry[2])
+        post.metadata.update(entry[1])
+        return post
+
+    def dump_page(self, path: str, post: frontmatter.Post) -> str:
+        """Returns `frontmatter.dumps(post)` of the post read with `read_page`. Output is reused while the page is
+        unchanged, so post must depend only on the page and config of the package (e.g. not merged)."""
+        entry = self.__pages[path]
+        if entry[3] is None:
+            entry[3] = frontmatter.dumps(post)
+        return entry[3]
+
+    def __is_unchanged(self) -> bool:
+        for directory, mtime in self.__directories.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import zlib
+from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Ancillary chunks which do not affect how the image is rendered
+METADATA_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME", b"eXIf"}
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE)
+# Part of the cache key, change it when optimization output changes
+OPTIMIZER_VERSION = "1"
+
+
+def default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "mkdocs-partial", "images")
+
+
+def read_chunks(data: bytes) -> List[Tuple[bytes, bytes]]:
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+    chunks = []
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[offset : offset + 8])
+        body = data[offset + 8 : offset + 8 + length]
+        (crc,) = struct.unpack(">I", data[offset + 8 + length : offset + 12 + length])
+        if len(body) != length or zlib.crc32(chunk_type + body) != crc:
+            raise ValueError(f"Corrupted '{chunk_type.decode('latin1')}' chunk")
+        chunks.append((chunk_type, body))
+        offset += 12 + length
+        if chunk_type == b"IEND":
+            break
+    return chunks
+
+
+def write_chunk(chunk_type: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", zlib.crc32(chunk_type + body))
+
+
+def compress(raw: bytes) -> bytes:
+    candidates = []
+    for strategy in ZLIB_STRATEGIES:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        candidates.append(compressor.compress(raw) + compressor.flush())
+    return min(candidates, key=len)
+
+
+def optimize_png(data: bytes) -> bytes:
+    """Recompresses image data with the best of zlib strategies and strips text and time metadata.
+    Pixels are not changed. Returns original data if it can not be optimized."""
+    try:
+        chunks = read_chunks(data)
+        idat = compress(zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT")))
+    except (ValueError, struct.error, zlib.error):
+        return data
+    output = [PNG_SIGNATURE]
+    for chunk_type, body in chunks:
+        if chunk_type in METADATA_CHUNKS:
+            continue
+        if chunk_type == b"IDAT":
+            if idat is not None:
+                output.append(write_chunk(chunk_type, idat))
+                idat = None
+            continue
+        output.append(write_chunk(chunk_type, body))
+    optimized = b"".join(output)
+    return optimized if len(optimized) < len(data) else data
+
+
+class ImageOptimizer(ABC):
+    """Lossless optimization of PNG images at package time. Results are cached by hash of the input,
+    so unchanged images are not optimized again by next package builds."""
+
+    def __init__(self, cache_dir: str | None = None, workers: int | None = None):
+        self.__cache_dir = cache_dir
+        self.__workers = workers
+        self.optimized = 0
+        self.cached = 0
+        self.original_bytes = 0
+        self.optimized_bytes = 0
+
+    def run(self, images: Dict[str, bytes]) -> Dict[str, bytes]:
+        """Takes content of images by path, returns optimized content by path."""
+        result = {}
+        pending = []
+        for path, data in images.items():
+            key = hashlib.sha256(OPTIMIZER_VERSION.encode("utf8") + b"\0" + data).hexdigest()
+            optimized = self.__read_cache(key)
+            if optimized is None:
+                pending.append((path, key))
+            else:
+                self.cached += 1
+                result[path] = optimized
+
+        if len(pending) > 0:
+            workers = self.__workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(pending) // (workers * 4))
+                optimized_images = executor.map(
+                    optimize_png, [images[path] for path, _ in pending], chunksize=chunksize
+                )
+                for (path, key), optimized in zip(pending, optimized_images):
+                    self.optimized += 1
+                    self.__write_cache(key, optimized)
+                    result[path] = optimized
+
+        self.original_bytes += sum(len(data) for data in images.values())
+        self.optimized_bytes += sum(len(data) for data in result.values())
+        return result
+
+    def format_summary(self) -> str:
+        return (
+            f"{self.optimized} images optimized, {self.cached} taken from cache: "
+            f"{self.original_bytes - self.optimized_bytes} bytes saved "
+            f"({self.original_bytes} -> {self.optimized_bytes})"
+        )
+
+    def __get_path(self, key: str) -> str:
+        return os.path.join(self.__cache_dir, key[:2], f"{key}.png")
+
+    def __read_cache(self, key: str) -> bytes | None:
+        if self.__cache_dir is None:
+            return None
+        try:
+            return Path(self.__get_path(key)).read_bytes()
+        except OSError:
+            return None
+
+    def __write_cache(self, key: str, data: bytes):
+        if self.__cache_dir is None:
+            return
+        path = self.__get_path(key)
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+        # Write to temp file first so concurrent package builds never read partially written entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        Path(tmp_path).write_bytes(data)
+        os.replace(tmp_path, path)
@@ -1,26 +1,37 @@
 import glob
 import hashlib
 import importlib
+import json
 import logging
 import os
+import re
+import time
 import zipfile
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from importlib.metadata import entry_points
 from itertools import chain
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import List
+from typing import Dict, List
 
-from packaging.requirements import Requirement
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import SpecifierSet
+from packaging.utils import canonicalize_name
 from packaging.version import Version
 
 from mkdocs_partial import MODULE_NAME_RESTRICTED_CHARS, version
 from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
+from mkdocs_partial.media_store import DIGESTS_FILE
 from mkdocs_partial.mkdcos_helpers import normalize_path
+from mkdocs_partial.packages.image_optimizer import ImageOptimizer
+from mkdocs_partial.search_fragments import FRAGMENT_FILE, build_search_fragment
 from mkdocs_partial.templating.markdown_extension import TemplaterMarkdownExtension
 from mkdocs_partial.templating.templater import Templater
 
+# Comment of requirements file line: whole line or after whitespace
+REQUIREMENT_COMMENT = re.compile(r"(?:^|\s+)#.*$")
+
 
 class Packager(ABC):
     def __init__(self, templates_dir):
@@ -38,6 +49,10 @@ class Packager(ABC):
         add_self_dependency=True,
         requirements_path=None,
         freeze=False,
+        search_index_config=None,
+        optimize_images=False,
+        images_cache_dir=None,
+        templates_cache_dir=None,
         **kwargs,
     ):
         resources_src_dir = os.path.abspath(resources_src_dir)
@@ -53,7 +68,9 @@ class Packager(ABC):
         wheel_filename = os.path.join(output_dir, f"{module_name}-{package_version}-py3-none-any.whl")
         script_dir = os.path.dirname(os.path.realpath(__file__))
         templates_dir = os.path.join(script_dir, os.path.join("templates", self.__templates_dir))
-        templater = Templater(templates_dir=templates_dir).extend(TemplaterMarkdownExtension())
+        templater = Templater(templates_dir=templates_dir, bytecode_cache_dir=templates_cache_dir).extend(
+            TemplaterMarkdownExtension()
+        )
 
         requirements = []
         if requirements_path is not None:
@@ -124,6 +141,10 @@ class Packager(ABC):
                 logging.info(f"Excluded glob {normalize_path(os.path.join(resources_src_dir, exclude))}")
             for exclude in excluded:
                 logging.info(f"Excluding file {exclude}")
+            optimized_images = {}
+            if optimize_images:
+                optimized_images = self.optimize_images(resources_src_dir, excluded, images_cache_dir)
+            media_digests = {}
             for file in glob.glob(os.path.join(resources_src_dir, "**/*"), recursive=True):
                 file = normalize_path(file)
                 if os.path.isfile(file) and file not in excluded:
@@ -133,20 +154,58 @@ class Packager(ABC):
                         path = os.path.join(path, resources_package_dir)
                     path = os.path.join(path, os.path.relpath(file, resources_src_dir))
                     path = normalize_path(path)
-                    record_lines.append(self.write_file(path, Path(file).read_bytes(), zipf))
+                    file_data = optimized_images[file] if file in optimized_images else Path(file).read_bytes()
+                    if file.lower().endswith(".md"):
+                        record_lines.append(self.write_file(path, file_data, zipf))
+                    else:
+                        # Zip keeps modification time with 2 seconds resolution
+                        mtime = int(os.stat(file).st_mtime) // 2 * 2
+                        record_lines.append(self.write_file(path, file_data, zipf, mtime))
+                        # Used for media fingerprints and deduplication, so it is not hashed at site build
+                        relative_path = normalize_path(os.path.relpath(file, resources_src_dir))
+                        media_digests[relative_path] = [len(file_data), mtime, hashlib.sha256(file_data).hexdigest()]
+
+            if len(media_digests) > 0:
+                path = module_name
+                if resources_package_dir is not None and resources_package_dir != "":
+                    path = os.path.join(path, resources_package_dir)
+                path = normalize_path(os.path.join(path, DIGESTS_FILE))
+                record_lines.append(self.write_file(path, bytes(json.dumps(media_digests), "utf8"), zipf))
+
+            if search_index_config is not None:
+                logging.info(f"Building search index fragment with config {search_index_config}")
+                fragment = build_search_fragment(resources_src_dir, search_index_config)
+                path = module_name
+                if resources_package_dir is not None and resources_package_dir != "":
+                    path = os.path.join(path, resources_package_dir)
+                path = normalize_path(os.path.join(path, FRAGMENT_FILE))
+                record_lines.append(self.write_file(path, bytes(json.dumps(fragment), "utf8"), zipf))
 
             zipf.writestr(f"{dist_info_dir}/RECORD", "\n".join(record_lines) + "\n")
 
         logging.info(f"Package is built within {(datetime.now() - start)}. File is written to {wheel_filename}")
 
     @staticmethod
-    def write_file(arcname, file_data, zipf):
+    def optimize_images(resources_src_dir, excluded, cache_dir):
+        images = {}
+        for file in glob.glob(os.path.join(resources_src_dir, "**/*.png"), recursive=True):
+            file = normalize_path(file)
+            if file not in excluded:
+                images[file] = Path(file).read_bytes()
+        optimizer = ImageOptimizer(cache_dir=cache_dir)
+        optimized_images = optimizer.run(images)
+        logging.info(f"Images optimization: {optimizer.format_summary()}")
+        return optimized_images
+
+    @staticmethod
+    def write_file(arcname, file_data, zipf, mtime: int | None = None):
         sha256_hash = hashlib.sha256(file_data).hexdigest()
         file_size = len(file_data)
-        with NamedTemporaryFile("wb", delete_on_close=False) as file:
-            file.write(file_data)
-            file.close()
-            zipf.write(file.name, arcname)
+        # Written from memory, round trip through a temp file costs more than compression of small docs files
+        zip_info = zipfile.ZipInfo(arcname, date_time=time.localtime(mtime)[:6])
+        zip_info.external_attr = 0o100644 << 16
+        zip_info.compress_type = zipf.compression
+        zipf.writestr(zip_info, file_data)
         return f"{arcname},sha256={sha256_hash},{file_size}"
 
     @staticmethod
@@ -161,16 +220,66 @@ class Packager(ABC):
 
     @staticmethod
     def freeze(path):
-        requirements = Packager.parse_requirements(path)
-
-        with open(path, "w") as f_requirements:
-            for requirement in Packager.freeze_requirements(requirements):
-                f_requirements.write(f"{requirement}\n")
+        Packager.freeze_files([path])
         return True, None
 
     @staticmethod
-    def freeze_requirements(requirements: List[Requirement]):
-        plugin_requirements = {}
+    def freeze_files(paths: List[str], workers=None) -> Dict[str, List[str]]:
+        """Pins docs packages in requirements files to installed versions. Installed docs packages are resolved once
+        for all files. Returns changes by path."""
+        versions = Packager.docs_package_versions()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(paths, executor.map(lambda path: Packager.freeze_file(path, versions), paths)))
+
+    @staticmethod
+    def freeze_file(path, versions: Dict[str, str]) -> List[str]:
+        """Pins requirements found in `versions` (canonical name -> version). Only pinned requirements are rewritten,
+        comments, options, blank lines and line endings are kept. File is not written if nothing is changed."""
+        with open(path, encoding="utf8", newline="") as f_requirements:
+            lines = f_requirements.readlines()
+        changes = []
+        for index, line in enumerate(lines):
+            content = line.rstrip("\r\n")
+            text = REQUIREMENT_COMMENT.sub("", content).strip()
+            if text == "" or text.startswith("-"):
+                continue
+            try:
+                requirement = Requirement(text)
+            except InvalidRequirement:
+                continue
+            installed_version = versions.get(canonicalize_name(requirement.name), None)
+            if installed_version is None or requirement.specifier == SpecifierSet(f"=={installed_version}"):
+                continue
+            pinned = Packager.pin_requirement(requirement, installed_version)
+            start = content.index(text)
+            lines[index] = f"{content[:start]}{pinned}{content[start + len(text):]}{line[len(content):]}"
+            changes.append(f"{requirement.name}: {requirement.specifier or '*'} -> =={installed_version}")
+
+        if len(changes) > 0:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf8", newline="") as f_requirements:
+                f_requirements.writelines(lines)
+            os.replace(tmp_path, path)
+        return changes
+
+    @staticmethod
+    def freeze_requirements(requirements: List[Requirement], versions: Dict[str, str] = None):
+        if versions is None:
+            versions = Packager.docs_package_versions()
+        for requirement in requirements:
+            installed_version = versions.get(canonicalize_name(requirement.name), None)
+            yield requirement if installed_version is None else Packager.pin_requirement(requirement, installed_version)
+
+    @staticmethod
+    def pin_requirement(requirement: Requirement, installed_version) -> Requirement:
+        extras = f"[{','.join(sorted(requirement.extras))}]" if requirement.extras else ""
+        marker = f"; {requirement.marker}" if requirement.marker is not None else ""
+        return Requirement(f"{requirement.name}{extras}=={installed_version}{marker}")
+
+    @staticmethod
+    def docs_package_versions() -> Dict[str, str]:
+        """Canonical distribution names of installed docs packages and their versions."""
+        versions = {}
         for mkdocs_plugin in entry_points(group="mkdocs.plugins"):
             try:
                 plugin_class = mkdocs_plugin.load()
@@ -178,12 +287,8 @@ class Packager(ABC):
                 continue
 
             if issubclass(plugin_class, DocsPackagePlugin) and plugin_class != DocsPackagePlugin:
-                plugin_requirements[mkdocs_plugin.dist.name] = Requirement(
-                    f"{mkdocs_plugin.dist.name}=={mkdocs_plugin.dist.version}"
-                )
-
-        for requirement in requirements:
-            yield plugin_requirements.get(requirement.name, requirement)
+                versions[canonicalize_name(mkdocs_plugin.dist.name)] = mkdocs_plugin.dist.version
+        return versions
 
     @staticmethod
     def get_mudules_from_packages(*packages: str):
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import cProfile
+import time
+from abc import ABC
+
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import Files, get_files
+
+from mkdocs_partial.build_stats import BuildStats, current_build_stats
+from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
+from mkdocs_partial.package_state import PackageState
+
+
+class PackagesProfiler(ABC):
+    """Profiles files ingestion (scan, read, frontmatter parse, merge) of docs packages configured for the site."""
+
+    def __init__(self, mkdocs_yaml_path: str):
+        self.__mkdocs_yaml_path = mkdocs_yaml_path
+
+    def profile(self, cprofile_path: str | None = None) -> BuildStats:
+        config = load_config(self.__mkdocs_yaml_path)
+        config.plugins.on_startup(command="build", dirty=False)
+        try:
+            config = config.plugins.on_config(config)
+            packages = {
+                name: plugin
+                for name, plugin in config.plugins.items()
+                if isinstance(plugin, DocsPackagePlugin) and plugin.config.enabled
+            }
+            profiler = cProfile.Profile() if cprofile_path is not None else None
+            if profiler is not None:
+                profiler.enable()
+            try:
+                stats = self.__profile(config, packages)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    profiler.dump_stats(cprofile_path)
+        finally:
+            config.plugins.on_shutdown()
+        return stats
+
+    def __profile(self, config: MkDocsConfig, packages: dict[str, DocsPackagePlugin]) -> BuildStats:
+        stats = BuildStats()
+        site_files = get_files(config)
+
+        # Each package alone on top of the site own files
+        for name, plugin in packages.items():
+            package = plugin.name or name
+            token = current_build_stats.set(BuildStats())
+            PackageState.store.clear()
+            try:
+                start = time.perf_counter()
+                self.__ingest(config, name, plugin, Files(list(site_files)))
+                stats.timings.setdefault(package, {})["isolated"] = [time.perf_counter() - start, 1]
+            finally:
+                current_build_stats.reset(token)
+
+        # All packages together in the order mkdocs runs them, so merges and conflicts are counted
+        files = Files(list(site_files))
+        # Packages are scanned and parsed again, not reused from the passes above
+        PackageState.store.clear()
+        token = current_build_stats.set(stats)
+        try:
+            for name, plugin in packages.items():
+                with stats.timer(plugin.name or name, "on_files"):
+                    files = self.__ingest(config, name, plugin, files)
+        finally:
+            current_build_stats.reset(token)
+        return stats
+
+    @staticmethod
+    def __ingest(config: MkDocsConfig, name: str, plugin: DocsPackagePlugin, files: Files) -> Files:
+        # `File.generated` takes `generated_by` from the plugin currently running an event
+        config.plugins._current_plugin = name
+        try:
+            return plugin.on_files(files, config=config) or files
+        finally:
+            config.plugins._current_plugin = None
@@ -1,5 +1,8 @@
 # pylint: disable=unused-argument
+import os
+import time
 import traceback
+from functools import partial
 from typing import Callable, Dict, List, cast
 
 from mkdocs import plugins
@@ -7,12 +10,21 @@ from mkdocs.config import Config, config_options
 from mkdocs.config.config_options import Plugins
 from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.exceptions import PluginError
-from mkdocs.plugins import BasePlugin, get_plugin_logger
+from mkdocs.plugins import BasePlugin, PluginCollection, get_plugin_logger
+from mkdocs.structure.files import Files, InclusionLevel
 from mkdocs.structure.nav import Navigation
 from mkdocs.structure.pages import Page
 from mkdocs.utils.templates import TemplateContext
 
+from mkdocs_partial.build_metrics import BuildMetrics, directory_size
+from mkdocs_partial.build_stats import BuildStats, current_build_stats
+from mkdocs_partial.cache import PersistentCache
 from mkdocs_partial.docs_package_plugin import DocsPackagePlugin, DocsPackagePluginConfig
+from mkdocs_partial.media_store import MEDIA_DEDUP_MODES, MediaStore, current_media_store
+from mkdocs_partial.memory_stats import MemoryStats, current_memory_stats
+from mkdocs_partial.plugin_registry import PluginRegistry
+from mkdocs_partial.render_cache import RenderCache
+from mkdocs_partial.sharding import current_shard_plan
 
 log = get_plugin_logger("partial_docs")
 
@@ -20,14 +32,33 @@ log = get_plugin_logger("partial_docs")
 class PartialDocsPluginConfig(Config):
     enabled = config_options.Type(bool, default=True)
     packages = config_options.DictOfItems(config_options.SubConfig(DocsPackagePluginConfig), default={})
+    timing = config_options.Type(bool, default=False)
+    timing_report = config_options.Optional(config_options.Type(str))
+    memory = config_options.Type(bool, default=False)
+    memory_report = config_options.Type(str, default="docs_packages_memory.json")
+    metrics_file = config_options.Optional(config_options.Type(str))
+    render_cache_dir = config_options.Optional(config_options.Type(str))
+    media_dedup = config_options.Optional(config_options.Choice(MEDIA_DEDUP_MODES))
 
 
 class PartialDocsPlugin(BasePlugin[PartialDocsPluginConfig]):
     overrides: Dict[str, DocsPackagePluginConfig] = {}
+    # Metrics file path set by site entry point. Takes precedence over `metrics_file` config option
+    metrics_file: str | None = None
 
     def __init__(self):
         self.is_serve = False
         self.is_dirty = False
+        # Kept between livereload rebuilds as the plugin instance is cached by mkdocs
+        self.metrics = BuildMetrics()
+        self.__build_start = self.__phase_start = time.perf_counter()
+        self.__render_cache: RenderCache | None = None
+        # Kept between livereload rebuilds, so digests of unchanged media are reused by the next build
+        self.__media_store: MediaStore | None = None
+
+    @property
+    def cache(self) -> RenderCache | None:
+        return self.__render_cache
 
     def on_startup(self, *, command, dirty):
         if not self.config.enabled:
@@ -36,7 +67,9 @@ class PartialDocsPlugin(BasePlugin[PartialDocsPluginConfig]):
         self.is_dirty = dirty
 
     def on_shutdown(self) -> None:
-        pass
+        current_build_stats.set(None)
+        current_media_store.set(None)
+        self._stop_memory_stats()
 
     def on_page_context(
         self, context: TemplateContext, /, *, page: Page, config: MkDocsConfig, nav: Navigation
@@ -48,6 +81,19 @@ class PartialDocsPlugin(BasePlugin[PartialDocsPluginConfig]):
         if not self.config.enabled:
             return
 
+        self.__build_start = self.__phase_start = time.perf_counter()
+        self.metrics.start_build()
+
+        self.__render_cache = None
+        if self.config.render_cache_dir is not None:
+            self.__render_cache = RenderCache(os.path.join(self._config_dir(config), self.config.render_cache_dir))
+
+        previous_store = self.__media_store
+        self.__media_store = None
+        if self.config.media_dedup is not None:
+            self.__media_store = MediaStore(self.config.media_dedup, previous_store)
+        current_media_store.set(self.__media_store)
+
         global_plugins: Plugins = cast(Plugins, dict(config._schema)["plugins"])
         assert isinstance(global_plugins, Plugins)
 
@@ -74,6 +120,18 @@ class PartialDocsPlugin(BasePlugin[PartialDocsPluginConfig]):
         except Exception:
             raise PluginError(traceback.format_exc())  # pylint: disable=raise-missing-from
 
+        stats = None
+        if self.config.timing:
+            stats = BuildStats()
+            self._instrument(global_plugins.plugins, stats)
+        current_build_stats.set(stats)
+
+        self._stop_memory_stats()
+        if self.config.memory:
+            memory_stats = MemoryStats()
+            current_memory_stats.set(memory_stats)
+            memory_stats.start()
+
         # Invoke `on_startup`
         command = "serve" if self.is_serve else "build"
         for method in global_plugins.plugins.events["startup"]:
@@ -82,10 +140,146 @@ class PartialDocsPlugin(BasePlugin[PartialDocsPluginConfig]):
             if plugin and plugin in self.docs_package_plugins.values():
                 method(command=command, dirty=self.is_dirty)
 
+    # Build phases end after all other handlers of the event, so memory they allocate is accounted to the phase
+    @plugins.event_priority(-1000)
+    def on_pre_build(self, *, config: MkDocsConfig) -> None:
+        self._end_phase("config")
+
+    @plugins.event_priority(-1000)
+    def on_files(self, files: Files, /, *, config: MkDocsConfig) -> Files | None:
+        self._end_phase("files")
+        return files
+
+    @plugins.event_priority(-1000)
+    def on_nav(self, nav: Navigation, /, *, config: MkDocsConfig, files: Files) -> Navigation | None:
+        self._end_phase("nav")
+        return nav
+
+    @plugins.event_priority(-1000)
+    def on_env(self, env, /, *, config: MkDocsConfig, files: Files):
+        self._end_phase("render")
+        plan = current_shard_plan.get()
+        if plan is not None:
+            # Pages and media of other shards are not written
+            for file in files:
+                if not plan.owns(file):
+                    file.inclusion = InclusionLevel.EXCLUDED
+        return env
+
+    @plugins.event_priority(1000)
+    def on_page_markdown(self, markdown: str, /, *, page: Page, config: MkDocsConfig, files: Files) -> str | None:
+        plan = current_shard_plan.get()
+        if plan is not None and not plan.owns(page.file):
+            return plan.stub(markdown)
+        if self.__render_cache is not None and page.meta.get("docs_package", None) is not None:
+            # Rendered when all `on_page_markdown` handlers are done, so cache is keyed by the final markdown
+            page.render = partial(self.__render_cache.render, page)
+        return markdown
+
+    @plugins.event_priority(-1000)
+    def on_page_content(self, html: str, /, *, page: Page, config: MkDocsConfig, files: Files) -> str | None:
+        plan = current_shard_plan.get()
+        if plan is not None and not plan.owns(page.file):
+            # Anchors of stub pages are unknown, so links to them are not validated
+            page.present_anchor_ids = None
+        return html
+
+    @plugins.event_priority(-100)
+    def on_post_build(self, *, config: MkDocsConfig) -> None:
+        self._end_phase("build")
+        memory_stats = current_memory_stats.get()
+        if memory_stats is not None:
+            self._stop_memory_stats()
+            log.info(f"Docs packages memory:\n{memory_stats.format_table()}")
+            path = os.path.join(self._config_dir(config), self.config.memory_report)
+            if self._write_report("memory", path, memory_stats.to_dict(), memory_stats.write_json):
+                log.info(f"Docs packages memory report is written to {path}")
+
+        self._write_metrics(config)
+
+        media_store = current_media_store.get()
+        if media_store is not None and len(media_store.savings) > 0:
+            log.info(f"Docs packages duplicate media:\n{media_store.format_table()}")
+
+        stats = current_build_stats.get()
+        if stats is None:
+            return
+        current_build_stats.set(None)
+        log.info(f"Docs packages timings:\n{stats.format_table()}")
+        if self.config.timing_report is not None:
+            path = os.path.join(self._config_dir(config), self.config.timing_report)
+            if self._write_report("timings", path, stats.to_dict(), stats.write_json):
+                log.info(f"Docs packages timings report is written to {path}")
+
+    def _end_phase(self, phase: str):
+        now = time.perf_counter()
+        self.metrics.phases[phase] = now - self.__phase_start
+        self.__phase_start = now
+        memory_stats = current_memory_stats.get()
+        if memory_stats is not None:
+            memory_stats.end_phase(phase)
+
+    def _write_metrics(self, config: MkDocsConfig):
+        path = PartialDocsPlugin.metrics_file
+        if path is None and self.config.metrics_file is not None:
+            path = os.path.join(self._config_dir(config), self.config.metrics_file)
+        if path is None or not self.config.enabled:
+            return
+
+        self.metrics.observe_build(time.perf_counter() - self.__build_start)
+        for name, plugin in config.plugins.items():
+            if isinstance(plugin, DocsPackagePlugin) and plugin.config.enabled:
+                self.metrics.packages[plugin.name or name] = (plugin.version, plugin.page_count, plugin.media_count)
+            cache = getattr(plugin, "cache", None)
+            if isinstance(cache, PersistentCache):
+                self.metrics.caches[name] = (cache.hits, cache.misses)
+        self.metrics.bytes_written = directory_size(config.site_dir)
+        if self._write_report("metrics", path, self.metrics, self.metrics.write):
+            log.debug(f"Build metrics are written to {path}")
+
+    @staticmethod
+    def _write_report(kind: str, path: str, report, write: Callable[[str], None]) -> bool:
+        plan = current_shard_plan.get()
+        if plan is not None:
+            # Reports of shards are combined and written once by the process building the site (see `build_sharded`)
+            plan.reports[kind] = (path, report)
+            return False
+        write(path)
+        return True
+
+    @staticmethod
+    def _config_dir(config: MkDocsConfig) -> str:
+        return os.getcwd() if config.config_file_path is None else os.path.dirname(config.config_file_path)
+
+    @staticmethod
+    def _stop_memory_stats():
+        memory_stats = current_memory_stats.get()
+        if memory_stats is not None:
+            memory_stats.stop()
+            current_memory_stats.set(None)
+
+    # Events of docs packages and integration shims are timed (see `timed_events`) for plugins named by the stats
+    def _instrument(self, collection: PluginCollection, stats: BuildStats):
+        stats.names = {
+            plugin: plugin.config.name if isinstance(plugin, DocsPackagePlugin) and plugin.config.name else name
+            for name, plugin in collection.items()
+            if self._is_instrumented(plugin)
+        }
+
+    @staticmethod
+    def _is_instrumented(plugin: BasePlugin):
+        return isinstance(plugin, DocsPackagePlugin) or type(plugin).__module__.startswith(
+            "mkdocs_partial.integrations."
+        )
+
     # Load doc package plugins
     def _load(self, option: Plugins) -> List[tuple[str, DocsPackagePlugin]]:
         loaded_plugins = []
+        registry = PluginRegistry.installed()
         for entrypoint in option.installed_plugins.values():
+            if registry is not None and entrypoint.name not in registry.docs_packages:
+                # Frozen site package knows docs packages, other plugins are not imported
+                continue
             try:
                 plugin_class = entrypoint.load()
             except ModuleNotFoundError:
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import importlib.metadata
+import json
+import os
+import sys
+from abc import ABC
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+# Module is imported by `mkdocs_partial` before mkdocs, so it must not import mkdocs or other `mkdocs_partial` modules
+
+REGISTRY_FILE = "plugin_registry.json"
+# Entry point groups mkdocs and markdown scan on start
+GROUPS = ("mkdocs.plugins", "mkdocs.themes", "markdown.extensions")
+
+
+class PluginRegistry(ABC):
+    """Entry points of mkdocs plugins, themes and markdown extensions along with names of docs packages, resolved when
+    frozen site package is built. Frozen executable uses it instead of scanning metadata of all distributions and
+    importing every mkdocs plugin to find docs packages."""
+
+    def __init__(self, registry: dict):
+        self.docs_packages: List[str] = registry["docs_packages"]
+        self.hidden_imports: List[str] = registry["hidden_imports"]
+        self.__entry_points: Dict[str, importlib.metadata.EntryPoints] = {}
+        for group, entry_points in registry["entry_points"].items():
+            items = []
+            for name, value, dist_name, dist_version in entry_points:
+                entry_point = importlib.metadata.EntryPoint(name, value, group)
+                # mkdocs checks distribution of themes, metadata is not read to provide it
+                items.append(entry_point._for(SimpleNamespace(name=dist_name, version=dist_version)))
+            self.__entry_points[group] = importlib.metadata.EntryPoints(items)
+
+    @staticmethod
+    def build(docs_package_class: type) -> dict:
+        """Resolves entry points and docs packages (plugins derived from `docs_package_class`) of the current
+        environment."""
+        registry = {"entry_points": {}, "docs_packages": [], "hidden_imports": set()}
+        for group in GROUPS:
+            registry["entry_points"][group] = []
+            for entry_point in importlib.metadata.entry_points(group=group):
+                dist = entry_point.dist
+                registry["entry_points"][group].append(
+                    [
+                        entry_point.name,
+                        entry_point.value,
+                        None if dist is None else dist.name,
+                        None if dist is None else dist.version,
+                    ]
+                )
+                # Entry points are loaded by name, so modules are not found by PyInstaller analysis
+                registry["hidden_imports"].add(entry_point.module)
+                if group != "mkdocs.plugins":
+                    continue
+                try:
+                    plugin_class = entry_point.load()
+                except ModuleNotFoundError:
+                    continue
+                if (
+                    isinstance(plugin_class, type)
+                    and issubclass(plugin_class, docs_package_class)
+                    and plugin_class != docs_package_class
+                ):
+                    registry["docs_packages"].append(entry_point.name)
+        registry["hidden_imports"] = sorted(registry["hidden_imports"])
+        return registry
+
+    @staticmethod
+    def write(path: str, registry: dict):
+        Path(path).write_text(json.dumps(registry, indent=2), encoding="utf8")
+
+    @classmethod
+    def load(cls, path: str) -> PluginRegistry:
+        return cls(json.loads(Path(path).read_text(encoding="utf8")))
+
+    def entry_points(self, group: str) -> importlib.metadata.EntryPoints:
+        return self.__entry_points[group]
+
+    def install(self):
+        """Serves entry points of registered groups from the registry. Has to be called before mkdocs is imported,
+        as mkdocs binds `importlib.metadata.entry_points` on import."""
+        discover = importlib.metadata.entry_points
+
+        def entry_points(**params):
+            if set(params) == {"group"} and params["group"] in self.__entry_points:
+                return self.__entry_points[params["group"]]
+            return discover(**params)
+
+        # Registry is known from the installed function, so it can not get out of sync with entry points served
+        entry_points.plugin_registry = self
+        importlib.metadata.entry_points = entry_points
+
+    @staticmethod
+    def installed() -> PluginRegistry | None:
+        """Registry installed for the running process. `None` if entry points are discovered at runtime."""
+        return getattr(importlib.metadata.entry_points, "plugin_registry", None)
+
+    @classmethod
+    def install_frozen(cls):
+        # PyInstaller bootloader sets `sys.frozen` and `sys._MEIPASS` to the directory of bundled files
+        if not getattr(sys, "frozen", False) or PluginRegistry.installed() is not None:
+            return
+        path = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(sys.executable)), "mkdocs_partial", REGISTRY_FILE)
+        if os.path.isfile(path):
+            cls.load(path).install()
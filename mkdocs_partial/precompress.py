@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from mkdocs_partial.mkdcos_helpers import normalize_path
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def get_encoders() -> Dict[str, Callable[[bytes], bytes]]:
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli  # pylint: disable=import-outside-toplevel
+
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+    except ModuleNotFoundError:
+        pass
+    return encoders
+
+
+def is_up_to_date(path: str, compressed_path: str) -> bool:
+    # Compressed siblings get mtime of the source file
+    try:
+        return os.stat(compressed_path).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(path: str, suffixes: List[str]) -> List[Tuple[str, int, int]]:
+    """Writes compressed siblings of the file if they are smaller than the file.
+    Returns list of (suffix, original size, compressed size) for all suffixes."""
+    encoders = get_encoders()
+    stat = os.stat(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    result = []
+    for suffix in suffixes:
+        compressed = encoders[suffix](data)
+        result.append((suffix, len(data), len(compressed)))
+        if len(compressed) >= len(data):
+            continue
+        compressed_path = path + suffix
+        tmp_path = f"{compressed_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, compressed_path)
+    return result
+
+
+def manifest_path(site_dir: str) -> str:
+    # Next to the site directory, so it is not published with the site
+    return f"{os.path.abspath(site_dir)}.precompress.json"
+
+
+class Precompressor(ABC):
+    """Writes `.gz` (and `.br` if `brotli` is installed) siblings of text files of the built site,
+    so web server may serve them as is (nginx `gzip_static`, `brotli_static`).
+
+    Files which do not get smaller are recorded to the manifest next to the site directory with their mtime,
+    so they are not compressed again until changed."""
+
+    def __init__(self, min_size: int = 1024, workers: int | None = None):
+        self.__min_size = min_size
+        self.__workers = workers
+        self.compressed = 0
+        self.skipped = 0
+        self.original_bytes: Dict[str, int] = {}
+        self.compressed_bytes: Dict[str, int] = {}
+        # Paths of written compressed siblings
+        self.written: List[str] = []
+        # Paths of deleted stale compressed siblings
+        self.removed: List[str] = []
+        # Site relative path of compressed sibling -> mtime of the file it was not smaller than
+        self.__incompressible: Dict[str, int] = {}
+
+    def run(self, site_dir: str):
+        suffixes = list(get_encoders().keys())
+        previous = self.__load_manifest(site_dir)
+        pending = []
+        for root, _, files in os.walk(site_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                if not file.lower().endswith(COMPRESSIBLE):
+                    continue
+                if os.path.getsize(path) < self.__min_size:
+                    for suffix in suffixes:
+                        self.__remove(path + suffix)
+                    continue
+                mtime = os.stat(path).st_mtime_ns
+                outdated = []
+                for suffix in suffixes:
+                    key = normalize_path(os.path.relpath(path + suffix, site_dir))
+                    if previous.get(key, None) == mtime and not os.path.exists(path + suffix):
+                        self.__incompressible[key] = mtime
+                    elif not is_up_to_date(path, path + suffix):
+                        outdated.append(suffix)
+                if len(outdated) == 0:
+                    self.skipped += 1
+                else:
+                    pending.append((path, outdated, mtime))
+
+        if len(pending) > 0:
+            workers = self.__workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(pending) // (workers * 4))
+                paths, outdated_suffixes, mtimes = zip(*pending)
+                results = executor.map(compress_file, paths, outdated_suffixes, chunksize=chunksize)
+                for path, mtime, result in zip(paths, mtimes, results):
+                    self.compressed += 1
+                    for suffix, original, compressed in result:
+                        if compressed >= original:
+                            self.__incompressible[normalize_path(os.path.relpath(path + suffix, site_dir))] = mtime
+                            self.__remove(path + suffix)
+                            continue
+                        self.written.append(path + suffix)
+                        self.original_bytes[suffix] = self.original_bytes.get(suffix, 0) + original
+                        self.compressed_bytes[suffix] = self.compressed_bytes.get(suffix, 0) + compressed
+
+        if len(self.__incompressible) > 0 or len(previous) > 0:
+            Path(manifest_path(site_dir)).write_text(json.dumps(self.__incompressible, indent=2), encoding="utf8")
+
+    def __remove(self, compressed_path: str):
+        # Sibling written for previous content of the file would be served instead of the file
+        if os.path.exists(compressed_path):
+            os.remove(compressed_path)
+            self.removed.append(compressed_path)
+
+    @staticmethod
+    def __load_manifest(site_dir: str) -> Dict[str, int]:
+        try:
+            return json.loads(Path(manifest_path(site_dir)).read_text(encoding="utf8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def format_summary(self) -> str:
+        saved = ", ".join(
+            f"{suffix} {original - self.compressed_bytes[suffix]} bytes saved "
+            f"({original} -> {self.compressed_bytes[suffix]})"
+            for suffix, original in sorted(self.original_bytes.items())
+        )
+        return f"{self.compressed} files precompressed, {self.skipped} up to date" + (f": {saved}" if saved else "")
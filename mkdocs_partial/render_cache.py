@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from contextvars import ContextVar
+
+import markdown
+import mkdocs
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.plugins import get_plugin_logger
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.pages import Page
+from mkdocs.structure.toc import AnchorLink, TableOfContents
+
+from mkdocs_partial.cache import PersistentCache, file_hash, hash_text, stable_json
+from mkdocs_partial.mkdcos_helpers import collect_log_records, replay_log_records
+from mkdocs_partial.version import __version__
+
+log = get_plugin_logger("partial_docs")
+
+# Files opened for reading while page is rendered in the current context, `None` if reads are not recorded
+read_files: ContextVar[set[str] | None] = ContextVar("render_cache_read_files", default=None)
+# Modules imported lazily by extensions are covered by their versions
+CODE_SUFFIXES = (".py", ".pyc", ".pyd", ".so")
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT
+
+
+def record_read(event: str, args: tuple):
+    # Audit hook, so files read by markdown extensions (e.g. `pymdownx.snippets`) are known for any extension
+    if event != "open":
+        return
+    paths = read_files.get()
+    if paths is None:
+        return
+    path, mode, flags = args
+    if isinstance(path, int) or path is None:
+        return
+    if (mode is None and flags & WRITE_FLAGS) or (mode is not None and any(char in mode for char in "wax+")):
+        return
+    path = os.path.abspath(os.fsdecode(path))
+    if not path.endswith(CODE_SUFFIXES):
+        paths.add(path)
+
+
+sys.addaudithook(record_read)
+
+
+def content_hash(path: str) -> str | None:
+    try:
+        return file_hash(path)
+    except OSError:
+        return None
+
+
+def link_target(file: File | None) -> list | None:
+    # Rendered link depends on target url and whether target is excluded from the site
+    return None if file is None else [file.url, file.inclusion.is_excluded()]
+
+
+class RecordingFiles:
+    """`Files` proxy recording link targets looked up while page is rendered."""
+
+    def __init__(self, files: Files):
+        self.__files = files
+        self.lookups: dict[str, list | None] = {}
+
+    def get_file_from_path(self, path: str) -> File | None:
+        file = self.__files.get_file_from_path(path)
+        self.lookups[path] = link_target(file)
+        return file
+
+    def __getattr__(self, name):
+        return getattr(self.__files, name)
+
+    def __iter__(self):
+        return iter(self.__files)
+
+    def __len__(self):
+        return len(self.__files)
+
+    def __contains__(self, path):
+        return path in self.__files
+
+
+def dump_toc(items: list[AnchorLink]) -> list:
+    return [[item.title, item.id, item.level, dump_toc(item.children)] for item in items]
+
+
+def load_toc(items: list) -> list[AnchorLink]:
+    result = []
+    for title, anchor_id, level, children in items:
+        item = AnchorLink(title, anchor_id, level)
+        item.children = load_toc(children)
+        result.append(item)
+    return result
+
+
+class RenderCache(PersistentCache):
+    """Persistent cache of markdown rendered to html for docs package pages.
+
+    Entry is keyed by page markdown (after `on_page_markdown`, so macros output is the part of it), page location,
+    markdown extensions config and versions. Link targets looked up and files read (e.g. snippets) while rendering
+    are stored with the entry, entry is reused only if all of them still resolve to the same urls and content.
+
+    Extensions added by plugins as instances (e.g. `mkdocstrings`) may read files once and reuse them for
+    other pages, so pages are not cached if any of them is configured.
+    """
+
+    def __init__(self, cache_dir: str):
+        super().__init__(cache_dir)
+        self.__settings_hash = None
+        self.__enabled = None
+
+    def is_enabled(self, config: MkDocsConfig) -> bool:
+        if self.__enabled is None:
+            extensions = [extension for extension in config.markdown_extensions if not isinstance(extension, str)]
+            self.__enabled = len(extensions) == 0
+            if not self.__enabled:
+                log.info(
+                    "Render cache is not used, since markdown extensions "
+                    f"{', '.join(type(extension).__name__ for extension in extensions)} are configured by plugins"
+                )
+        return self.__enabled
+
+    def settings_hash(self, config: MkDocsConfig) -> str:
+        if self.__settings_hash is None:
+            extensions = [extension for extension in config.markdown_extensions if isinstance(extension, str)]
+            versions = {
+                module: str(getattr(sys.modules.get(module, None), "__version__", None))
+                for module in sorted({extension.split(".")[0] for extension in extensions})
+            }
+            self.__settings_hash = hash_text(
+                __version__,
+                mkdocs.__version__,
+                markdown.__version__,
+                stable_json(versions),
+                stable_json(config.markdown_extensions),
+                stable_json(config.mdx_configs),
+                str(config.use_directory_urls),
+                stable_json(config.validation),
+                # Links to anchors are collected by mkdocs only if anchors validation messages are not suppressed
+                str(logging.getLogger("mkdocs.structure.pages").getEffectiveLevel() > logging.DEBUG),
+            )
+        return self.__settings_hash
+
+    def render(self, page: Page, config: MkDocsConfig, files: Files):
+        if not self.is_enabled(config):
+            Page.render(page, config, files)
+            return
+        key = hash_text(
+            self.settings_hash(config),
+            page.file.src_uri,
+            page.file.url,
+            str(page.file.inclusion.is_excluded()),
+            page.markdown,
+        )
+        entry = self.get(key)
+        if entry is not None:
+            if all(
+                link_target(files.get_file_from_path(path)) == target for path, target in entry["links"].items()
+            ) and all(content_hash(path) == digest for path, digest in entry["reads"].items()):
+                self.restore(page, files, entry)
+                return
+            # Outgoing link target is added, removed or moved or read file is changed since the entry is stored
+            self.hits -= 1
+            self.misses += 1
+
+        recording_files = RecordingFiles(files)
+        paths = set()
+        token = read_files.set(paths)
+        try:
+            with collect_log_records(level=logging.INFO) as records:
+                Page.render(page, config, recording_files)
+        finally:
+            read_files.reset(token)
+        links_to_anchors = page.links_to_anchors
+        if links_to_anchors is not None:
+            links_to_anchors = {file.src_uri: links for file, links in links_to_anchors.items()}
+        self.set(
+            key,
+            {
+                "content": page.content,
+                "toc": dump_toc(page.toc.items),
+                "title": page._title_from_render,
+                "anchors": sorted(page.present_anchor_ids),
+                "links_to_anchors": links_to_anchors,
+                "links": recording_files.lookups,
+                "reads": {path: content_hash(path) for path in sorted(paths)},
+                "warnings": records,
+            },
+        )
+
+    @staticmethod
+    def restore(page: Page, files: Files, entry: dict):
+        page.content = entry["content"]
+        page.toc = TableOfContents(load_toc(entry["toc"]))
+        page._title_from_render = entry["title"]
+        page.present_anchor_ids = set(entry["anchors"])
+        if entry["links_to_anchors"] is not None:
+            page.links_to_anchors = {
+                files.get_file_from_path(src_uri): links for src_uri, links in entry["links_to_anchors"].items()
+            }
+        # Broken links are reported on each build, not only when page is rendered
+        replay_log_records(entry["warnings"])
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+from abc import ABC
+from pathlib import Path
+from typing import Tuple
+
+import mkdocs
+from mkdocs import plugins
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.plugins import BasePlugin
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.pages import Page
+from mkdocs.utils.yaml import yaml_load
+
+from mkdocs_partial.cache import hash_text, stable_json
+from mkdocs_partial.version import __version__
+
+# Fragment is stored within package docs directory. Hidden files are neither globbed as docs nor packaged as resources
+FRAGMENT_FILE = ".search_fragment.json"
+SEARCH_PLUGINS = ("search", "material/search")
+
+
+def get_search_plugin(config: MkDocsConfig) -> Tuple[str | None, BasePlugin | None]:
+    for name in SEARCH_PLUGINS:
+        plugin = config.plugins.get(name, None)
+        if plugin is not None and plugin.config.get("enabled", True):
+            return name, plugin
+    return None, None
+
+
+def fragment_key(config: MkDocsConfig) -> str | None:
+    """Hash of the config search index entries depend on except page content."""
+    name, plugin = get_search_plugin(config)
+    if plugin is None:
+        return None
+    search_module = sys.modules.get(type(plugin).__module__.split(".")[0], None)
+    return hash_text(
+        __version__,
+        mkdocs.__version__,
+        name,
+        str(getattr(search_module, "__version__", None)),
+        stable_json(dict(plugin.config)),
+        str(config.theme.name),
+        stable_json(config.markdown_extensions),
+        stable_json(config.mdx_configs),
+    )
+
+
+def page_hash(page: Page) -> str:
+    # Search entries are produced from rendered html, toc, title and meta. `docs_package` meta is the plugin name
+    # which differs between the package build and the site build
+    meta = {key: value for key, value in page.meta.items() if key != "docs_package"}
+    return hash_text(page.content or "", str(page.title), stable_json(meta))
+
+
+class SearchFragments(ABC):
+    """Replaces indexing of docs package pages with search index entries stored in the package.
+
+    Entries are reused only if page rendered within the site is identical to the one rendered when the package
+    was built, so pages changed by merges, macros or site links are indexed as usual.
+    """
+
+    MARKER = "_partial_docs_search_fragments"
+
+    def __init__(self, search_index, key: str):
+        self.__search_index = search_index
+        self.__add_entry_from_context = search_index.add_entry_from_context
+        search_index.add_entry_from_context = self.add_entry_from_context
+        self.__pages: dict[File, dict] = {}
+        self.key = key
+        self.recorded: dict[str, dict] | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def install(cls, config: MkDocsConfig) -> SearchFragments | None:
+        """Returns fragments of the current search index. `None` if search plugin is not configured."""
+        _, plugin = get_search_plugin(config)
+        search_index = getattr(plugin, "search_index", None)
+        if search_index is None:
+            return None
+        fragments = getattr(search_index, cls.MARKER, None)
+        if fragments is None:
+            fragments = cls(search_index, fragment_key(config))
+            setattr(search_index, cls.MARKER, fragments)
+        return fragments
+
+    def load(self, path: str) -> dict[str, dict] | None:
+        """Loads fragment pages keyed by path relative to package docs directory.
+        `None` if fragment is built with different config."""
+        fragment = json.loads(Path(path).read_text(encoding="utf8"))
+        if fragment.get("key", None) != self.key:
+            return None
+        return fragment.get("pages", {})
+
+    def register(self, file: File, page_fragment: dict):
+        self.__pages[file] = page_fragment
+
+    def record(self):
+        self.recorded = {}
+
+    @property
+    def entries(self) -> list:
+        # mkdocs search keeps entries in `_entries`, material search in `entries`
+        entries = getattr(self.__search_index, "entries", None)
+        return entries if entries is not None else self.__search_index._entries
+
+    def add_entry_from_context(self, page: Page):
+        content_hash = None
+        page_fragment = self.__pages.get(page.file, None)
+        if page_fragment is not None:
+            content_hash = page_hash(page)
+            if page_fragment["hash"] == content_hash:
+                self.hits += 1
+                self.entries.extend({**doc, "location": page.url + doc["location"]} for doc in page_fragment["docs"])
+                if self.recorded is not None:
+                    self.recorded[page.file.src_uri] = page_fragment
+                return
+            self.misses += 1
+
+        if self.recorded is None:
+            self.__add_entry_from_context(page)
+            return
+
+        if content_hash is None:
+            content_hash = page_hash(page)
+        start = len(self.entries)
+        self.__add_entry_from_context(page)
+        # Locations are stored relative to page url, so fragment does not depend on package directory within site
+        self.recorded[page.file.src_uri] = {
+            "hash": content_hash,
+            "docs": [{**doc, "location": doc["location"][len(page.url) :]} for doc in self.entries[start:]],
+        }
+
+
+class SearchFragmentRecorder(BasePlugin):
+    """Records search index entries of pages while package docs are built."""
+
+    def __init__(self):
+        self.fragments: SearchFragments | None = None
+
+    @plugins.event_priority(-100)
+    def on_files(self, files: Files, /, *, config: MkDocsConfig) -> Files | None:
+        self.fragments = SearchFragments.install(config)
+        if self.fragments is not None:
+            self.fragments.record()
+        return files
+
+
+def build_search_fragment(docs_path: str, mkdocs_yaml_path: str) -> dict:
+    """Builds package docs with theme, markdown extensions and search plugin configured in `mkdocs_yaml_path`
+    and returns search index fragment of the package."""
+    with open(mkdocs_yaml_path, encoding="utf8") as file:
+        configured_plugins = (yaml_load(file) or {}).get("plugins", None) or []
+    if isinstance(configured_plugins, dict):
+        configured_plugins = [{name: value} for name, value in configured_plugins.items()]
+    search_plugins = [
+        plugin
+        for plugin in configured_plugins
+        if (plugin if isinstance(plugin, str) else next(iter(plugin), None)) in SEARCH_PLUGINS
+    ]
+    if len(search_plugins) == 0:
+        raise ValueError(f"{mkdocs_yaml_path} does not configure search plugin")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = os.path.join(tmp, "docs")
+        os.makedirs(docs_dir)
+        config = load_config(
+            mkdocs_yaml_path,
+            docs_dir=docs_dir,
+            site_dir=os.path.join(tmp, "site"),
+            strict=False,
+            plugins=search_plugins + [{"docs_package": {"docs_path": docs_path, "directory": ""}}],
+        )
+        recorder = SearchFragmentRecorder()
+        config.plugins["search_fragment_recorder"] = recorder
+        config.plugins.on_startup(command="build", dirty=False)
+        try:
+            build(config)
+        finally:
+            config.plugins.on_shutdown()
+
+    if recorder.fragments is None:
+        raise ValueError(f"search plugin configured in {mkdocs_yaml_path} is disabled")
+    return {"key": recorder.fragments.key, "pages": recorder.fragments.recorded}
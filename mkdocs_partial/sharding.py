@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from mkdocs import utils
+from mkdocs.__main__ import build_command as mkdocs_build_command
+from mkdocs.config.base import load_config
+from mkdocs.contrib.search.search_index import SearchIndex
+from mkdocs.structure.files import File
+
+from mkdocs_partial.build_metrics import BuildMetrics, directory_size
+from mkdocs_partial.build_stats import BuildStats
+from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
+from mkdocs_partial.memory_stats import MemoryStats, write_report
+
+SITEMAP_URL = re.compile(r"<url>.*?</url>", flags=re.DOTALL)
+MARKDOWN_H1 = re.compile(r"^#[^#].*$", flags=re.MULTILINE)
+
+log = logging.getLogger(__name__)
+
+# Plan of the shard built by current process. `None` if the site is not built with shards
+current_shard_plan: ContextVar[ShardPlan | None] = ContextVar("current_shard_plan", default=None)
+
+
+class ShardPlan(ABC):
+    """Assignment of docs packages to shards of the site build.
+
+    Each shard ingests all docs packages, so navigation, links and merged pages are the same as for the whole
+    site build, while only pages and media of packages assigned to the shard are rendered and written.
+    Files which are not generated by docs packages (site root, theme, blog) are owned by the first shard.
+    """
+
+    def __init__(self, shard: int, assignment: Dict[str, int]):
+        self.shard = shard
+        self.assignment = assignment
+        # Reports of `partial_docs` plugin (kind -> (path, report)) collected by the shard. Written once for all
+        # shards by the process building the site
+        self.reports: Dict[str, Tuple[str, object]] = {}
+
+    def owns(self, file: File) -> bool:
+        return self.assignment.get(file.generated_by, 0) == self.shard
+
+    @staticmethod
+    def stub(markdown: str) -> str:
+        # Pages of other shards are rendered only to get the title for navigation
+        h1 = MARKDOWN_H1.search(markdown)
+        return "" if h1 is None else h1.group(0)
+
+
+def plan_shards(mkdocs_yaml_path: str, shards: int) -> Dict[str, int]:
+    """Assigns docs packages configured for the site to shards balancing count of markdown files."""
+    config = load_config(mkdocs_yaml_path)
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        config = config.plugins.on_config(config)
+        sizes = {
+            name: len(glob.glob(os.path.join(plugin.docs_path, "**/*.md"), recursive=True))
+            for name, plugin in config.plugins.items()
+            if isinstance(plugin, DocsPackagePlugin) and plugin.config.enabled
+        }
+        site_size = len(glob.glob(os.path.join(config.docs_dir, "**/*.md"), recursive=True))
+    finally:
+        config.plugins.on_shutdown()
+
+    # Largest packages first to the least loaded shard. First shard also renders site own pages
+    loads = [site_size] + [0] * (shards - 1)
+    assignment = {}
+    for name, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        shard = loads.index(min(loads))
+        assignment[name] = shard
+        loads[shard] += size
+    log.info(f"Docs packages are split to {shards} shards with {loads} markdown files")
+    return assignment
+
+
+def build_shard(site_root: str, argv: List[str], site_dir: str, plan: ShardPlan) -> Dict[str, Tuple[str, object]]:
+    os.chdir(site_root)
+    token = current_shard_plan.set(plan)
+    try:
+        # Last `--site-dir` wins, so the one from user arguments is overridden
+        mkdocs_build_command.main(args=list(argv) + ["--site-dir", site_dir], standalone_mode=False)
+    finally:
+        current_shard_plan.reset(token)
+    return plan.reports
+
+
+def build_sharded(
+    site_root: str, site_dir: str, argv: List[str], shards: int, initializer: Callable = None, initargs: tuple = ()
+):  # pylint: disable=too-many-positional-arguments
+    """Builds the site with `shards` processes. `initializer` is called in each process before the build
+    to apply overrides of the caller."""
+    start = time.perf_counter()
+    assignment = plan_shards(os.path.join(site_root, "mkdocs.yml"), shards)
+    staging_dirs = [f"{site_dir}.shard-{shard}" for shard in range(shards)]
+    try:
+        with ProcessPoolExecutor(max_workers=shards, initializer=initializer, initargs=initargs) as executor:
+            futures = [
+                executor.submit(build_shard, site_root, argv, staging_dir, ShardPlan(shard, assignment))
+                for shard, staging_dir in enumerate(staging_dirs)
+            ]
+            reports = [future.result() for future in futures]
+        merge_shards(staging_dirs, site_dir)
+        write_reports(reports, site_dir, time.perf_counter() - start)
+    finally:
+        for staging_dir in staging_dirs:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def merge_shards(staging_dirs: List[str], site_dir: str):
+    """Moves shards output to `site_dir`. Files produced by several shards are taken from the first one,
+    except sitemap and search index which are recombined."""
+    if os.path.isdir(site_dir):
+        shutil.rmtree(site_dir)
+    sitemaps = []
+    search_indexes = []
+    for staging_dir in staging_dirs:
+        for root, _, files in os.walk(staging_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                relative_path = os.path.relpath(path, staging_dir).replace("\\", "/")
+                if relative_path == "sitemap.xml":
+                    sitemaps.append(Path(path).read_text(encoding="utf8"))
+                elif relative_path == "search/search_index.json":
+                    search_indexes.append(json.loads(Path(path).read_text(encoding="utf8")))
+                dest = os.path.join(site_dir, relative_path)
+                if not os.path.exists(dest):
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.move(path, dest)
+
+    if len(sitemaps) > 0:
+        merge_sitemaps(sitemaps, os.path.join(site_dir, "sitemap.xml"))
+    if len(search_indexes) > 0:
+        merge_search_indexes(search_indexes, os.path.join(site_dir, "search", "search_index.json"))
+
+
+def merge_sitemaps(sitemaps: List[str], path: str):
+    urls = list(dict.fromkeys(url for sitemap in sitemaps for url in SITEMAP_URL.findall(sitemap)))
+    # Every shard renders sitemap with the same template, so the first one is used as a frame for all urls
+    frame = SITEMAP_URL.sub("", sitemaps[0])
+    closing = frame.rindex("</urlset>")
+    output = frame[:closing].rstrip() + "\n    " + "\n    ".join(urls) + "\n" + frame[closing:]
+    utils.write_file(output.encode("utf8"), path)
+    with open(f"{path}.gz", "wb") as file:
+        with gzip.GzipFile(fileobj=file, filename=f"{path}.gz", mode="wb", mtime=utils.get_build_timestamp()) as gz:
+            gz.write(output.encode("utf8"))
+
+
+class MergedSearchIndex(SearchIndex):
+    """Search index of all shards. Prebuilt index of each shard covers only its own pages,
+    so it is built again for merged docs the same way as `search` plugin does it."""
+
+    def __init__(self, config: dict, docs: List[dict]):
+        super().__init__(**config)
+        self._entries.extend(docs)
+
+
+def merge_search_indexes(search_indexes: List[dict], path: str):
+    locations = set()
+    docs = []
+    for search_index in search_indexes:
+        for doc in search_index.get("docs", []):
+            if doc["location"] not in locations:
+                locations.add(doc["location"])
+                docs.append(doc)
+    # Config is the same for all shards. Index written by `material/search` has no `prebuild_index` in it
+    config = search_indexes[0].get("config", {})
+    if config.get("prebuild_index", False):
+        output = MergedSearchIndex(config, docs).generate_search_index()
+    else:
+        merged = {key: value for key, value in search_indexes[0].items() if key != "index"}
+        merged["docs"] = docs
+        output = json.dumps(merged, separators=(",", ":"), default=str)
+    utils.write_file(output.encode("utf8"), path)
+
+
+def write_reports(reports: List[Dict[str, Tuple[str, object]]], site_dir: str, seconds: float):
+    """Writes timings, memory and metrics reports of shards combined to a single report of each kind."""
+    timings = [report["timings"] for report in reports if "timings" in report]
+    if len(timings) > 0:
+        stats = BuildStats()
+        for _, report in timings:
+            stats.merge(report)
+        stats.write_json(timings[0][0])
+        log.info(f"Docs packages timings report is written to {timings[0][0]}")
+
+    memory = [report["memory"] for report in reports if "memory" in report]
+    if len(memory) > 0:
+        write_report(memory[0][0], MemoryStats.combine([report for _, report in memory]))
+        log.info(f"Docs packages memory report is written to {memory[0][0]}")
+
+    metrics = [report["metrics"] for report in reports if "metrics" in report]
+    if len(metrics) > 0:
+        build_metrics = BuildMetrics.combine([report for _, report in metrics])
+        build_metrics.observe_build(seconds)
+        build_metrics.bytes_written = directory_size(site_dir)
+        build_metrics.write(metrics[0][0])
+        log.debug(f"Build metrics are written to {metrics[0][0]}")
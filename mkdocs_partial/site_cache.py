@@ -0,0 +1,211 @@
+# pylint: disable=duplicate-code
+from __future__ import annotations
+
+import hashlib
+import inspect
+import logging
+import os
+import re
+import shutil
+from abc import ABC
+from importlib.metadata import PackageNotFoundError, entry_points, packages_distributions, version
+from typing import Iterable, List
+
+import yaml
+from mkdocs.plugins import get_plugins
+from mkdocs.utils.yaml import get_yaml_loader
+
+from mkdocs_partial.cache import hash_json
+from mkdocs_partial.docs_package_plugin import DocsPackagePlugin, DocsPackagePluginConfig
+from mkdocs_partial.partial_docs_plugin import PartialDocsPluginConfig
+from mkdocs_partial.version import __version__
+
+ENV_TAG = re.compile(r"!ENV\s+\[?\s*([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def hash_directory(path: str, exclude: Iterable[str] = ()) -> str:
+    """Hash of relative paths and content of all files within the directory. Hidden directories (e.g. `.git` or
+    temporary build directories) and `exclude` paths are skipped."""
+    exclude = {os.path.normcase(os.path.abspath(excluded)) for excluded in exclude}
+    sha256 = hashlib.sha256()
+    for root, directories, files in os.walk(path):
+        directories[:] = sorted(
+            directory
+            for directory in directories
+            if directory != "__pycache__"
+            and not directory.startswith(".")
+            and os.path.normcase(os.path.abspath(os.path.join(root, directory))) not in exclude
+        )
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            if os.path.normcase(os.path.abspath(file_path)) in exclude:
+                continue
+            sha256.update(os.path.relpath(file_path, path).replace("\\", "/").encode("utf8"))
+            sha256.update(b"\0")
+            with open(file_path, "rb") as stream:
+                while chunk := stream.read(1024 * 1024):
+                    sha256.update(chunk)
+            sha256.update(b"\0")
+    return sha256.hexdigest()
+
+
+def load_mkdocs_yaml(mkdocs_yaml: str) -> dict:
+    try:
+        config = yaml.load(mkdocs_yaml, Loader=get_yaml_loader()) or {}
+    except yaml.YAMLError:
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def markdown_distributions(mkdocs_yaml: str) -> List[list]:
+    """Names and versions of distributions providing markdown extensions configured with `mkdocs.yml` and Markdown
+    itself, so upgrade of any of them changes the fingerprint."""
+    extensions = load_mkdocs_yaml(mkdocs_yaml).get("markdown_extensions", None) or []
+    if isinstance(extensions, dict):
+        extensions = list(extensions)
+    names = [extension if isinstance(extension, str) else next(iter(extension), None) for extension in extensions]
+    # Short names (e.g. `toc`) are registered as entry points, others are module paths
+    registered = {entrypoint.name: entrypoint.module for entrypoint in entry_points(group="markdown.extensions")}
+    modules = {"markdown"} | {registered.get(name, name).split(".")[0] for name in names if isinstance(name, str)}
+    providers = packages_distributions()
+    result = set()
+    for module in modules:
+        for dist in providers.get(module, []):
+            try:
+                result.add((dist, version(dist)))
+            except PackageNotFoundError:
+                continue
+    return [list(item) for item in sorted(result)]
+
+
+def build_outputs(site_root: str, mkdocs_yaml: str) -> List[str]:
+    """Paths of caches and reports written by the build that are configured with plugin options of `mkdocs.yml`."""
+    config = load_mkdocs_yaml(mkdocs_yaml)
+    plugins = config.get("plugins", None) or []
+    if isinstance(plugins, dict):
+        plugins = [{name: options} for name, options in plugins.items()]
+    outputs = []
+    for plugin in plugins:
+        name, options = (plugin, {}) if isinstance(plugin, str) else next(iter(plugin.items()), (None, {}))
+        options = options if isinstance(options, dict) else {}
+        if name == "partial_docs":
+            partial_docs = PartialDocsPluginConfig()
+            partial_docs.load_dict(options)
+            partial_docs.validate()
+            paths = [
+                partial_docs.render_cache_dir,
+                partial_docs.timing_report,
+                partial_docs.metrics_file,
+                partial_docs.memory_report,
+            ]
+        elif name == "spellcheck":
+            paths = [options.get("cache_dir", None)]
+        else:
+            continue
+        outputs += [os.path.join(site_root, path) for path in paths if isinstance(path, str)]
+    return outputs
+
+
+class SiteCache(ABC):
+    """Cache of built site output keyed by fingerprint of everything the build depends on."""
+
+    def __init__(self, cache_dir: str, limit: int = 5):
+        self.__cache_dir = cache_dir
+        self.__limit = limit
+        self.__log = logging.getLogger(__name__)
+
+    def fingerprint(
+        self,
+        site_root: str,
+        site_dir: str,
+        argv: List[str],
+        overrides: dict[str, DocsPackagePluginConfig],
+        *,
+        outputs: Iterable[str] = (),
+    ) -> str:
+        """Fingerprint of the build. Files written by the build itself (`site_dir`, cache directory, changes manifest
+        and other `outputs`, caches and reports of plugins) are not part of it."""
+        mkdocs_yaml_path = os.path.join(site_root, "mkdocs.yml")
+        with open(mkdocs_yaml_path, encoding="utf8") as file:
+            mkdocs_yaml = file.read()
+
+        packages = []
+        plugins = []
+        for name, entrypoint in sorted(get_plugins().items()):
+            dist = entrypoint.dist
+            plugins.append([name, dist.name if dist else None, dist.version if dist else None])
+            try:
+                plugin_class = entrypoint.load()
+            except ModuleNotFoundError:
+                continue
+            if issubclass(plugin_class, DocsPackagePlugin) and plugin_class != DocsPackagePlugin:
+                package_dir = os.path.dirname(os.path.realpath(inspect.getfile(plugin_class)))
+                packages.append([name, hash_directory(package_dir)])
+        themes = sorted(
+            [entrypoint.name, entrypoint.dist.name if entrypoint.dist else None, entrypoint.dist.version]
+            for entrypoint in entry_points(group="mkdocs.themes")
+            if entrypoint.dist is not None
+        )
+        local_docs = sorted(
+            [name, override.directory, hash_directory(override.docs_path) if override.docs_path else None]
+            for name, override in overrides.items()
+        )
+
+        return hash_json(
+            {
+                "version": __version__,
+                "argv": argv,
+                "mkdocs.yml": mkdocs_yaml,
+                # `!ENV` values are resolved by mkdocs at build time, so they are part of the site content
+                "env": {name: os.environ.get(name, None) for name in sorted(set(ENV_TAG.findall(mkdocs_yaml)))},
+                "site_root": hash_directory(
+                    site_root,
+                    exclude=[site_dir, self.__cache_dir, *outputs, *build_outputs(site_root, mkdocs_yaml)],
+                ),
+                "packages": packages,
+                "plugins": plugins,
+                "markdown": markdown_distributions(mkdocs_yaml),
+                "themes": themes,
+                "local_docs": local_docs,
+            }
+        )
+
+    def restore(self, fingerprint: str, site_dir: str) -> bool:
+        entry = os.path.join(self.__cache_dir, fingerprint)
+        if not os.path.isdir(entry):
+            return False
+        if os.path.isdir(site_dir):
+            shutil.rmtree(site_dir)
+        shutil.copytree(entry, site_dir)
+        # Entries are evicted by last use
+        os.utime(entry)
+        self.__log.info(f"Site is restored from cache entry {fingerprint}")
+        return True
+
+    def store(self, fingerprint: str, site_dir: str):
+        entry = os.path.join(self.__cache_dir, fingerprint)
+        if os.path.isdir(entry) or not os.path.isdir(site_dir):
+            return
+        os.makedirs(self.__cache_dir, exist_ok=True)
+        # Copy to temp directory first so concurrent builds never restore partially written entry
+        tmp_entry = f"{entry}.{os.getpid()}.tmp"
+        shutil.copytree(site_dir, tmp_entry)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # Same entry stored by concurrent build
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        self.__log.info(f"Site is stored to cache entry {fingerprint}")
+        os.utime(entry)
+        self.evict()
+
+    def evict(self):
+        entries = [
+            os.path.join(self.__cache_dir, entry)
+            for entry in os.listdir(self.__cache_dir)
+            if not entry.endswith(".tmp") and os.path.isdir(os.path.join(self.__cache_dir, entry))
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for entry in entries[self.__limit :]:
+            shutil.rmtree(entry, ignore_errors=True)
+            self.__log.info(f"Site cache entry {os.path.basename(entry)} is evicted")
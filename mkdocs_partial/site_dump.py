@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from mkdocs_partial.cache import file_hash
+from mkdocs_partial.mkdcos_helpers import normalize_path
+from mkdocs_partial.precompress import COMPRESSED_SUFFIXES, is_up_to_date
+
+# `ioctl` request cloning file content on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+class SiteDump(ABC):
+    """Copies site files to the output directory skipping files which are already up to date."""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        delete: bool = False,
+        link: bool = False,
+        checksum: bool = False,
+        keep_compressed: bool = False,
+    ):  # pylint: disable=too-many-positional-arguments
+        self.__workers = workers
+        self.__keep_compressed = keep_compressed
+        self.__delete = delete
+        self.__link = link
+        self.__checksum = checksum
+        self.__reflink = os.name == "posix"
+        self.copied = 0
+        self.skipped = 0
+        self.deleted = 0
+        # Output directory relative paths of added, changed and removed files
+        self.changes: Dict[str, List[str]] = {"added": [], "changed": [], "removed": []}
+
+    def dump(self, source_dir: str, output_dir: str):
+        source_dir = normalize_path(source_dir)
+        output_dir = normalize_path(output_dir)
+        files = []
+        directories = {output_dir}
+        for path in glob.glob(os.path.join(source_dir, "**/*"), recursive=True):
+            path = normalize_path(path)
+            dest = normalize_path(os.path.join(output_dir, os.path.relpath(path, source_dir)))
+            if os.path.isdir(path):
+                directories.add(dest)
+            else:
+                directories.add(os.path.dirname(dest))
+                files.append((path, dest))
+
+        for directory in sorted(directories):
+            os.makedirs(directory, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            for (_, dest), change in zip(files, executor.map(lambda item: self.copy(*item), files)):
+                if change is not None:
+                    self.copied += 1
+                    self.changes[change].append(normalize_path(os.path.relpath(dest, output_dir)))
+                else:
+                    self.skipped += 1
+
+        if self.__delete:
+            self.delete_stale(output_dir, {dest for _, dest in files} | directories)
+
+    def is_up_to_date(self, path: str, dest: str) -> bool:
+        try:
+            dest_stat = os.stat(dest)
+        except FileNotFoundError:
+            return False
+        stat = os.stat(path)
+        if dest_stat.st_ino == stat.st_ino and dest_stat.st_dev == stat.st_dev:
+            return True
+        if dest_stat.st_size != stat.st_size:
+            return False
+        if self.__checksum:
+            return file_hash(path) == file_hash(dest)
+        # Copies keep source mtime. Whole seconds are compared as some filesystems do not store nanoseconds
+        return int(dest_stat.st_mtime) == int(stat.st_mtime)
+
+    def copy(self, path: str, dest: str) -> str | None:
+        """Returns `added` or `changed` if file is copied, `None` if it is up to date."""
+        if self.is_up_to_date(path, dest):
+            return None
+        change = "changed" if os.path.lexists(dest) else "added"
+        # Existing file is replaced, not overwritten, so content shared by a hardlink is never modified
+        tmp_dest = f"{dest}.{os.getpid()}.tmp"
+        try:
+            if self.__link:
+                try:
+                    os.link(path, tmp_dest)
+                except OSError:
+                    self.copy_file(path, tmp_dest)
+            else:
+                self.copy_file(path, tmp_dest)
+            os.replace(tmp_dest, dest)
+        finally:
+            if os.path.lexists(tmp_dest):
+                os.remove(tmp_dest)
+        return change
+
+    def copy_file(self, path: str, dest: str):
+        if self.__reflink:
+            try:
+                import fcntl  # pylint: disable=import-outside-toplevel
+
+                with open(path, "rb") as source, open(dest, "wb") as target:
+                    fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+                shutil.copystat(path, dest)
+                return
+            except (ModuleNotFoundError, OSError):
+                # Filesystem does not support reflinks, there is no point to try it for other files
+                self.__reflink = False
+        shutil.copy2(path, dest)
+
+    def delete_stale(self, output_dir: str, keep: set[str]):
+        paths = [normalize_path(path) for path in glob.glob(os.path.join(output_dir, "**/*"), recursive=True)]
+        # Deepest paths first, so directories are empty when their turn comes
+        for path in sorted(paths, key=len, reverse=True):
+            if path in keep:
+                continue
+            base_path, suffix = os.path.splitext(path)
+            if self.__keep_compressed and suffix in COMPRESSED_SUFFIXES and base_path in keep:
+                if is_up_to_date(base_path, path):
+                    # Precompressed sibling of the unchanged site file
+                    continue
+            if os.path.isdir(path) and not os.path.islink(path):
+                if len(os.listdir(path)) == 0:
+                    os.rmdir(path)
+                    self.deleted += 1
+            else:
+                os.remove(path)
+                self.deleted += 1
+                self.changes["removed"].append(normalize_path(os.path.relpath(path, output_dir)))
@@ -1,10 +1,11 @@
 # pylint: disable=duplicate-code
-import glob
 import inspect
+import json
 import logging
 import os
 import shutil
 import sys
+import tempfile
 from abc import ABC
 from argparse import ArgumentParser, ArgumentTypeError
 from pathlib import Path
@@ -17,7 +18,13 @@ from mkdocs_partial.argparse_types import directory
 from mkdocs_partial.docs_package_plugin import DocsPackagePlugin, DocsPackagePluginConfig
 from mkdocs_partial.entry_point import add_command_parser
 from mkdocs_partial.mkdcos_helpers import normalize_path
+from mkdocs_partial.packages_profiler import PackagesProfiler
 from mkdocs_partial.partial_docs_plugin import PartialDocsPlugin
+from mkdocs_partial.plugin_registry import PluginRegistry
+from mkdocs_partial.precompress import Precompressor
+from mkdocs_partial.sharding import build_sharded
+from mkdocs_partial.site_cache import SiteCache
+from mkdocs_partial.site_dump import SiteDump
 
 
 class IgnoreUnknownTagsLoader(yaml.SafeLoader):  # pylint: disable=too-many-ancestors
@@ -46,6 +53,15 @@ def local_docs(value: str, check_path: bool = True):
     return plugin, normalize_path(path), docs_directory
 
 
+def register_local_docs(value):
+    if value is not None:
+        plugin, docs_path, docs_directory = value
+        override = DocsPackagePluginConfig()
+        override.docs_path = docs_path
+        override.directory = docs_directory
+        PartialDocsPlugin.overrides[plugin] = override
+
+
 class SiteEntryPoint(ABC):
 
     def __init__(self, version, site_root=None, prog=None):
@@ -74,12 +90,43 @@ class SiteEntryPoint(ABC):
             func=lambda args, argv: self.mkdocs(mkdocs_serve_command, args, argv),
         )
 
-        self.add_mkdocs_command_parser(
+        build_command = self.add_mkdocs_command_parser(
             subparsers,
             "build",
             "execute mkdocs build",
             func=lambda args, argv: self.mkdocs(mkdocs_build_command, args, argv),
         )
+        build_command.add_argument(
+            "--cache-dir",
+            required=False,
+            help="restores site from the cache directory instead of building it if neither site root, "
+            "nor installed docs packages and plugins, nor build arguments changed since cached build",
+        )
+        build_command.add_argument(
+            "--cache-limit", required=False, type=int, default=5, help="Max site builds to keep in cache. Default - 5"
+        )
+        build_command.add_argument(
+            "--shards",
+            required=False,
+            type=int,
+            default=1,
+            help="splits docs packages across the number of processes, each rendering its subset of pages "
+            "to the staging directory merged to `site_dir` when done. Default - 1",
+        )
+        build_command.add_argument(
+            "--write-if-changed",
+            action="store_true",
+            help="builds site to the staging directory and updates `site_dir` only with files which content changed, "
+            "so unchanged files keep their mtime and are not transferred by deploy. "
+            "Files which are not the part of the site anymore are deleted. Hidden files and directories are kept",
+        )
+        build_command.add_argument(
+            "--changes-manifest",
+            required=False,
+            help="json file to write added, changed and removed `site_dir` paths to with `--write-if-changed`. "
+            "Default - `<site_dir>.changes.json`",
+        )
+        self.add_precompress_arguments(build_command)
 
         self.add_command_parser(subparsers, "list", "lists partial docs plugins", func=self.list)
         self.add_command_parser(subparsers, "version", "outputs site version", func=self.version)
@@ -88,6 +135,38 @@ class SiteEntryPoint(ABC):
         dump_command.add_argument(
             "--output", required=False, type=directory, help="Output directory. Default - Current directory"
         )
+        dump_command.add_argument(
+            "--delete",
+            action="store_true",
+            help="deletes files within output directory which are not the part of the site. "
+            "Hidden files and directories are kept",
+        )
+        dump_command.add_argument(
+            "--checksum",
+            action="store_true",
+            help="compares content hash of files already existing in output directory instead of size and mtime",
+        )
+        dump_command.add_argument(
+            "--link",
+            action="store_true",
+            help="hardlinks files instead of copying them when output directory is on the same filesystem. "
+            "Dumped files share content with installed site package, so they must not be modified in place",
+        )
+        dump_command.add_argument(
+            "--workers", required=False, type=int, help="Copy threads. Default - number of CPUs + 4, up to 32"
+        )
+        self.add_precompress_arguments(dump_command)
+
+        profile_command = self.add_command_parser(
+            subparsers,
+            "profile",
+            "profiles files ingestion of docs packages configured for the site, each package alone and all together",
+            func=self.profile,
+        )
+        self.add_site_arguments(profile_command)
+        profile_command.add_argument(
+            "--cprofile", required=False, help="writes cProfile stats of files ingestion to the file"
+        )
 
         args, argv = parser.parse_known_args()
 
@@ -115,6 +194,17 @@ class SiteEntryPoint(ABC):
     @staticmethod
     def add_mkdocs_command_parser(subparsers, name, help_text, func):
         command_parser = add_command_parser(subparsers, name, help_text, func)
+        SiteEntryPoint.add_site_arguments(command_parser)
+        command_parser.add_argument(
+            "--metrics-file",
+            required=False,
+            help="writes build metrics in Prometheus/OpenMetrics text format to the file after every build "
+            "(and every livereload rebuild for `serve`), e.g. for node-exporter textfile collector",
+        )
+        return command_parser
+
+    @staticmethod
+    def add_site_arguments(command_parser):
         command_parser.add_argument(
             "--local-docs",
             required=False,
@@ -132,10 +222,30 @@ class SiteEntryPoint(ABC):
             type=directory,
             help="loads local directory as site `docs_dir` instead of the content packed with " "site package",
         )
-        return command_parser
+
+    @staticmethod
+    def add_precompress_arguments(command_parser):
+        command_parser.add_argument(
+            "--precompress",
+            action="store_true",
+            help="writes `.gz` (and `.br` if `brotli` is installed) siblings of html, css, js, json and svg files, "
+            "so web server may serve them without compressing on request (e.g. nginx `gzip_static`)",
+        )
+        command_parser.add_argument(
+            "--precompress-min-size",
+            required=False,
+            type=int,
+            default=1024,
+            help="Min size in bytes of file to precompress. Default - 1024",
+        )
 
     @staticmethod
     def list(args, argv):  # pylint: disable=unused-argument
+        registry = PluginRegistry.installed()
+        if registry is not None:
+            for name in registry.docs_packages:
+                print(name)
+            return True, None
         for name, entrypoint in get_plugins().items():
             try:
                 plugin_class = entrypoint.load()
@@ -150,7 +260,154 @@ class SiteEntryPoint(ABC):
         return True, None
 
     def mkdocs(self, command, args, argv):
+        site_root_path, error = self.prepare_site(args)
+        if error is not None:
+            return False, error
+
+        if args.metrics_file is not None:
+            PartialDocsPlugin.metrics_file = os.path.abspath(args.metrics_file)
 
+        cache = None
+        if getattr(args, "cache_dir", None) is not None:
+            cache = SiteCache(os.path.abspath(args.cache_dir), args.cache_limit)
+
+        fingerprint = None
+
+        current_dir = os.getcwd()
+        os.chdir(site_root_path)
+        try:
+            os.chdir(site_root_path)
+            Path(site_root_path).mkdir(parents=True, exist_ok=True)
+            site_dir = self.get_site_dir(site_root_path, argv)
+            if cache is not None:
+                outputs = [self.changes_manifest_path(args, site_dir)]
+                if PartialDocsPlugin.metrics_file is not None:
+                    outputs.append(PartialDocsPlugin.metrics_file)
+                fingerprint = cache.fingerprint(
+                    site_root_path, site_dir, argv, PartialDocsPlugin.overrides, outputs=outputs
+                )
+            build_dir = site_dir
+            if getattr(args, "write_if_changed", False):
+                # Same filesystem as `site_dir`, so changed files are moved there with hardlinks
+                Path(os.path.dirname(site_dir)).mkdir(parents=True, exist_ok=True)
+                build_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(site_dir)}.", dir=os.path.dirname(site_dir))
+                argv = argv + ["--site-dir", build_dir]
+            try:
+                return self.build(command, args, argv, site_root_path, build_dir, site_dir, cache, fingerprint)
+            finally:
+                if build_dir != site_dir:
+                    shutil.rmtree(build_dir, ignore_errors=True)
+        finally:
+            os.chdir(current_dir)
+
+    def build(
+        self, command, args, argv, site_root_path, build_dir, site_dir, cache, fingerprint
+    ):  # pylint: disable=too-many-positional-arguments,too-many-arguments
+        if cache is not None and cache.restore(fingerprint, build_dir):
+            # Cached build may be done without precompression
+            self.write_output(args, build_dir, site_dir)
+            return True, None
+        if getattr(args, "shards", 1) > 1:
+            build_sharded(
+                os.path.abspath(site_root_path),
+                build_dir,
+                argv,
+                args.shards,
+                initializer=register_local_docs,
+                initargs=(args.local_docs,),
+            )
+            self.complete_build(args, build_dir, site_dir, cache, fingerprint)
+            return True, None
+        try:
+            command(argv)  # pylint: disable=too-many-function-args
+        except SystemExit as e:
+            # Click commands exit when done
+            if e.code in (0, None):
+                self.complete_build(args, build_dir, site_dir, cache, fingerprint)
+            raise
+        return False, ""
+
+    def complete_build(
+        self, args, build_dir, site_dir, cache, fingerprint
+    ):  # pylint: disable=too-many-positional-arguments,too-many-arguments
+        self.write_output(args, build_dir, site_dir)
+        if cache is not None:
+            cache.store(fingerprint, site_dir)
+
+    def write_output(self, args, build_dir, site_dir):
+        if build_dir == site_dir:
+            self.precompress(args, site_dir)
+            return
+        site_dump = SiteDump(delete=True, link=True, checksum=True, keep_compressed=args.precompress)
+        site_dump.dump(build_dir, site_dir)
+        precompressor = self.precompress(args, site_dir)
+        changes = site_dump.changes
+        if precompressor is not None:
+            changed = set(changes["changed"])
+            removed = set(changes["removed"])
+            for path in precompressor.written:
+                path = normalize_path(os.path.relpath(path, site_dir))
+                if path in removed:
+                    # Stale sibling deleted by the dump is written again
+                    changes["removed"].remove(path)
+                    changes["changed"].append(path)
+                else:
+                    # Sibling of changed file is rewritten, others are written for the first time
+                    changes["changed" if os.path.splitext(path)[0] in changed else "added"].append(path)
+            for path in precompressor.removed:
+                changes["removed"].append(normalize_path(os.path.relpath(path, site_dir)))
+        changes = {change: sorted(paths) for change, paths in changes.items()}
+        manifest_path = self.changes_manifest_path(args, site_dir)
+        Path(manifest_path).write_text(json.dumps(changes, indent=2), encoding="utf8")
+        self.logger.info(
+            f"Site is written to {site_dir}: {len(changes['added'])} files added, {len(changes['changed'])} changed, "
+            f"{len(changes['removed'])} removed, {site_dump.skipped} unchanged. "
+            f"Changes manifest is written to {manifest_path}"
+        )
+
+    @staticmethod
+    def changes_manifest_path(args, site_dir) -> str:
+        manifest_path = getattr(args, "changes_manifest", None)
+        if manifest_path is None:
+            manifest_path = f"{site_dir}.changes.json"
+        return os.path.abspath(manifest_path)
+
+    def precompress(self, args, output_dir) -> Precompressor | None:
+        if not getattr(args, "precompress", False):
+            return None
+        precompressor = Precompressor(min_size=args.precompress_min_size)
+        precompressor.run(output_dir)
+        self.logger.info(f"Site is precompressed: {precompressor.format_summary()}")
+        return precompressor
+
+    @staticmethod
+    def get_site_dir(site_root_path, argv):
+        parser = ArgumentParser(add_help=False)
+        parser.add_argument("-d", "--site-dir")
+        site_dir = parser.parse_known_args(argv)[0].site_dir
+        if site_dir is None:
+            with open(os.path.join(site_root_path, "mkdocs.yml")) as file:
+                site_dir = (yaml.load(file, Loader=IgnoreUnknownTagsLoader) or {}).get("site_dir", None) or "site"
+        return os.path.abspath(os.path.join(site_root_path, site_dir))
+
+    def profile(self, args, argv):  # pylint: disable=unused-argument
+        site_root_path, error = self.prepare_site(args)
+        if error is not None:
+            return False, error
+
+        cprofile_path = None if args.cprofile is None else os.path.abspath(args.cprofile)
+        current_dir = os.getcwd()
+        os.chdir(site_root_path)
+        try:
+            stats = PackagesProfiler(os.path.join(site_root_path, "mkdocs.yml")).profile(cprofile_path)
+        finally:
+            os.chdir(current_dir)
+        if cprofile_path is not None:
+            self.logger.info(f"cProfile stats are written to {cprofile_path}")
+        return True, stats.format_table()
+
+    # Resolves site root and registers `--local-docs` override. Returns site root path and error if any
+    def prepare_site(self, args):
         site_root_path = args.site_root
         if site_root_path is None:
             site_root_path = self.__default_site_root
@@ -158,31 +415,17 @@ class SiteEntryPoint(ABC):
         self.logger.info(f"site root: {site_root_path}")
         mkdocs_yaml_path = os.path.join(site_root_path, "mkdocs.yml")
         if not os.path.isfile(mkdocs_yaml_path):
-            return False, "Site root does not have mkdocs.yml"
+            return site_root_path, "Site root does not have mkdocs.yml"
 
         with open(mkdocs_yaml_path) as file:
             mkdocs_yaml = yaml.load(file, Loader=IgnoreUnknownTagsLoader)
 
         plugins = mkdocs_yaml.get("plugins", [])
         if not any("partial_docs" in plugin for plugin in plugins):
-            return False, f"{mkdocs_yaml_path} must define 'partial_docs' plugin"
+            return site_root_path, f"{mkdocs_yaml_path} must define 'partial_docs' plugin"
 
-        if args.local_docs is not None:
-            plugin, docs_path, docs_directory = args.local_docs
-            override = DocsPackagePluginConfig()
-            override.docs_path = docs_path
-            override.directory = docs_directory
-            PartialDocsPlugin.overrides[plugin] = override
-
-        current_dir = os.getcwd()
-        os.chdir(site_root_path)
-        try:
-            os.chdir(site_root_path)
-            Path(site_root_path).mkdir(parents=True, exist_ok=True)
-            command(argv)  # pylint: disable=too-many-function-args
-        finally:
-            os.chdir(current_dir)
-        return False, ""
+        register_local_docs(args.local_docs)
+        return site_root_path, None
 
     def dump(self, args, argv):  # pylint: disable=unused-argument
         output = args.output
@@ -190,17 +433,19 @@ class SiteEntryPoint(ABC):
             output = os.getcwd()
         output = normalize_path(output)
 
-        for path in glob.glob(os.path.join(self.__default_site_root, "**/*"), recursive=True):
-            path = normalize_path(path)
-            dest = os.path.relpath(path, self.__default_site_root)
-            dest = os.path.join(output, dest)
-            dest = normalize_path(dest)
-            if os.path.isdir(path):
-                os.makedirs(dest, exist_ok=True)
-            else:
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
-                shutil.copy(path, dest)
-
+        site_dump = SiteDump(
+            workers=args.workers,
+            delete=args.delete,
+            link=args.link,
+            checksum=args.checksum,
+            keep_compressed=args.precompress,
+        )
+        site_dump.dump(self.__default_site_root, output)
+        self.logger.info(
+            f"Site is dumped to {output}: {site_dump.copied} files copied, {site_dump.skipped} up to date, "
+            f"{site_dump.deleted} stale deleted"
+        )
+        self.precompress(args, output)
         return True, ""
 
 
@@ -1,6 +1,7 @@
 import os
 from abc import ABC
 from argparse import ArgumentError
+from collections import OrderedDict
 from io import StringIO
 from pathlib import Path
 from typing import Callable, Dict
@@ -9,9 +10,19 @@ import jinja2
 
 from mkdocs_partial.templating.templater_extension import TemplaterExtension
 
+# Compiled string templates kept by Templater instance
+STRING_TEMPLATES_CACHE_SIZE = 256
+
 
 class Templater(ABC):
-    def __init__(self, templates_dir, template_filters: Dict[str, Callable] = None, output_path=None, **template_args):
+    def __init__(  # pylint: disable=too-many-positional-arguments
+        self,
+        templates_dir,
+        template_filters: Dict[str, Callable] = None,
+        output_path=None,
+        bytecode_cache_dir=None,
+        **template_args,
+    ):
         if template_filters is None:
             template_filters = {}
         if output_path is None:
@@ -19,9 +30,19 @@ class Templater(ABC):
         self.output_path = output_path
         self.templates_dir = templates_dir
         template_loader = jinja2.FileSystemLoader(searchpath=templates_dir)
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            # Compiled file templates are reused by next runs while template source is not modified
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
         self.__template_environment = jinja2.Environment(
-            loader=template_loader, trim_blocks=True, lstrip_blocks=False, newline_sequence="\r\n"
+            loader=template_loader,
+            trim_blocks=True,
+            lstrip_blocks=False,
+            newline_sequence="\r\n",
+            bytecode_cache=bytecode_cache,
         )
+        self.__string_templates: OrderedDict[str, jinja2.Template] = OrderedDict()
         self.__template_args = template_args
         filters = {}
         filters.update(template_filters)
@@ -31,6 +52,7 @@ class Templater(ABC):
     def extend(self, extension: TemplaterExtension):
         for name, method in extension.filters:
             self.__template_environment.filters[name] = method
+        self.__string_templates.clear()
         self.__template_args.update(extension.args)
         return self
 
@@ -56,6 +78,10 @@ class Templater(ABC):
         return stream.read()
 
     def template_string(self, template, **args):
+        environment = self.__template_environment
+        if environment.variable_start_string not in template and environment.block_start_string not in template:
+            # Plain string (e.g. wheel path without placeholders) renders to itself
+            return template
         stream = StringIO()
         self.__template(template, stream, is_str=True, **args)
         stream.seek(0)
@@ -68,9 +94,16 @@ class Templater(ABC):
         args = dict(args)
         args.update(self.__template_args)
         template_vars.update(args)
-        template = (
-            self.__template_environment.from_string(template)
-            if is_str
-            else self.__template_environment.get_template(template)
-        )
+        template = self.__from_string(template) if is_str else self.__template_environment.get_template(template)
         template.stream(template_vars).dump(stream)
+
+    def __from_string(self, source: str) -> jinja2.Template:
+        template = self.__string_templates.get(source, None)
+        if template is None:
+            template = self.__template_environment.from_string(source)
+            self.__string_templates[source] = template
+            if len(self.__string_templates) > STRING_TEMPLATES_CACHE_SIZE:
+                self.__string_templates.popitem(last=False)
+        else:
+            self.__string_templates.move_to_end(source)
+        return template
@@ -0,0 +1,24 @@
+from mkdocs_partial.build_metrics import BuildMetrics
+
+
+def test_format():
+    metrics = BuildMetrics()
+    metrics.observe_build(0.7)
+    metrics.observe_build(3)
+    metrics.start_build()
+    metrics.phases["files"] = 0.25
+    metrics.packages['my "docs"'] = ("1.0.0", 10, 2)
+    metrics.caches["spellcheck"] = (3, 1)
+
+    lines = metrics.format().splitlines()
+
+    assert 'mkdocs_partial_build_phase_seconds{phase="files"} 0.25' in lines
+    assert 'mkdocs_partial_build_seconds_bucket{le="0.5"} 0' in lines
+    assert 'mkdocs_partial_build_seconds_bucket{le="1.0"} 1' in lines
+    assert 'mkdocs_partial_build_seconds_bucket{le="5.0"} 2' in lines
+    assert 'mkdocs_partial_build_seconds_bucket{le="+Inf"} 2' in lines
+    assert "mkdocs_partial_build_seconds_count 2" in lines
+    assert 'mkdocs_partial_package_info{package="my \\"docs\\"",version="1.0.0"} 1' in lines
+    assert 'mkdocs_partial_package_pages{package="my \\"docs\\""} 10' in lines
+    assert 'mkdocs_partial_cache_hit_ratio{cache="spellcheck"} 0.75' in lines
+    assert "mkdocs_partial_builds_total 2" in lines
@@ -0,0 +1,62 @@
+import json
+import threading
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial.build_stats import BuildStats
+
+
+def test_timings_of_config_without_file(tmp_path, monkeypatch):
+    Path(tmp_path, "package").mkdir()
+    Path(tmp_path, "package", "index.md").write_text("# Package\n", encoding="utf8")
+    Path(tmp_path, "docs").mkdir()
+    Path(tmp_path, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    # Paths of reports are relative to the working directory if config is not loaded from file
+    monkeypatch.chdir(tmp_path)
+    config = MkDocsConfig()
+    config.load_dict(
+        {
+            "site_name": "test",
+            "docs_dir": str(tmp_path / "docs"),
+            "site_dir": str(tmp_path / "site"),
+            "plugins": [
+                {"partial_docs": {"timing": True, "timing_report": "timings.json", "metrics_file": "metrics.prom"}},
+                {"docs_package": {"name": "package", "docs_path": str(tmp_path / "package"), "directory": "package"}},
+            ],
+        }
+    )
+    errors, _ = config.validate()
+    assert errors == []
+    # Config assembled in code may have no file path at all
+    config.config_file_path = None
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+
+    report = json.loads(Path(tmp_path, "timings.json").read_text(encoding="utf8"))
+    assert report["package"]["hooks"]["on_files"]["calls"] == 1
+    # Page events are called for every page of the site
+    assert report["package"]["hooks"]["on_page_content"]["calls"] == 2
+    assert report["package"]["counters"]["files"] == 1
+    assert Path(tmp_path, "metrics.prom").is_file()
+
+
+def test_timings_of_concurrent_hooks():
+    stats = BuildStats()
+
+    def run():
+        for _ in range(1000):
+            with stats.timer("package", "on_page_content"):
+                pass
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.timings["package"]["on_page_content"][1] == 8000
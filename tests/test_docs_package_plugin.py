@@ -1,11 +1,18 @@
+import contextvars
 import importlib.metadata
+import os
 
 import pytest
 from mkdocs.config.config_options import Plugins
 from mkdocs.config.defaults import MkDocsConfig
 from mkdocs.plugins import PluginCollection
 
-from mkdocs_partial.docs_package_plugin import DocsPackagePlugin, DocsPackagePluginConfig
+from mkdocs_partial.docs_package_plugin import (
+    DocsPackageDirPlaceholder,
+    DocsPackagePlugin,
+    DocsPackagePluginConfig,
+    current_package,
+)
 
 
 @pytest.mark.parametrize(
@@ -60,6 +67,18 @@ def test_get_edit_url_template_path(directory, path, url_template_path):
     assert plugin.get_edit_url_template_path(path) == url_template_path
 
 
+def test_current_package_is_context_local():
+    class Package:
+        docs_path = "package"
+
+    def resolve():
+        current_package.set(Package())
+        return os.fspath(DocsPackageDirPlaceholder())
+
+    assert contextvars.copy_context().run(resolve) == "package"
+    assert os.fspath(DocsPackageDirPlaceholder()) != "package"
+
+
 # def test_investigation():
 #     installed_dists = list(importlib.metadata.distributions())
 #     a=any(distribution for distribution in  installed_dists  if  distribution.name=="organisation-registry" )
@@ -0,0 +1,33 @@
+import struct
+import zlib
+
+from mkdocs_partial.packages.image_optimizer import PNG_SIGNATURE, ImageOptimizer, read_chunks, write_chunk
+
+
+def create_png(width: int = 64, height: int = 64) -> bytes:
+    # 8-bit RGB, each row is prefixed with filter type 0
+    raw = b"".join(b"\0" + bytes(value for x in range(width) for value in (x % 7, y % 5, 128)) for y in range(height))
+    return (
+        PNG_SIGNATURE
+        + write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + write_chunk(b"tEXt", b"Software\0Screenshot tool")
+        + write_chunk(b"IDAT", zlib.compress(raw, 0))
+        + write_chunk(b"IEND", b"")
+    )
+
+
+def test_png_is_optimized_losslessly(tmp_path):
+    png = create_png()
+    optimizer = ImageOptimizer(cache_dir=str(tmp_path), workers=1)
+    optimized = optimizer.run({"img/logo.png": png, "img/broken.png": b"not a png"})
+
+    assert optimized["img/broken.png"] == b"not a png"
+    assert len(optimized["img/logo.png"]) < len(png)
+    chunks = dict(read_chunks(optimized["img/logo.png"]))
+    assert b"tEXt" not in chunks
+    assert zlib.decompress(chunks[b"IDAT"]) == zlib.decompress(dict(read_chunks(png))[b"IDAT"])
+    assert (optimizer.optimized, optimizer.cached) == (2, 0)
+
+    optimizer = ImageOptimizer(cache_dir=str(tmp_path), workers=1)
+    assert optimizer.run({"img/logo.png": png}) == {"img/logo.png": optimized["img/logo.png"]}
+    assert (optimizer.optimized, optimizer.cached) == (0, 1)
@@ -0,0 +1,97 @@
+import struct
+import zlib
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial import image_size
+from mkdocs_partial.image_size import ImageSizes, add_image_attributes, read_image_size
+from mkdocs_partial.packages.image_optimizer import PNG_SIGNATURE, write_chunk
+
+MKDOCS_YML = """site_name: test
+plugins:
+  - docs_package:
+      docs_path: {docs_path}
+      directory: package
+      image_attributes: true
+"""
+
+
+def create_png(width: int, height: int) -> bytes:
+    return (
+        PNG_SIGNATURE
+        + write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + write_chunk(b"IDAT", zlib.compress(b"\0" * (width + 1) * height))
+        + write_chunk(b"IEND", b"")
+    )
+
+
+def test_read_image_size(tmp_path):
+    Path(tmp_path, "image.png").write_bytes(create_png(640, 480))
+    # APP0 segment followed by baseline frame header
+    jpeg = b"\xff\xd8\xff\xe0\x00\x04\x00\x00\xff\xc0\x00\x11\x08" + struct.pack(">HH", 300, 200) + b"\x03"
+    Path(tmp_path, "image.jpg").write_bytes(jpeg)
+    Path(tmp_path, "sized.svg").write_text('<?xml version="1.0"?>\n<svg width="120px" height="60"/>')
+    Path(tmp_path, "view_box.svg").write_text('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 12"></svg>')
+    Path(tmp_path, "relative.svg").write_text('<svg width="100%" height="100%"></svg>')
+
+    assert read_image_size(str(tmp_path / "image.png")) == (640, 480)
+    assert read_image_size(str(tmp_path / "image.jpg")) == (200, 300)
+    assert read_image_size(str(tmp_path / "sized.svg")) == (120, 60)
+    assert read_image_size(str(tmp_path / "view_box.svg")) == (24, 12)
+    assert read_image_size(str(tmp_path / "relative.svg")) is None
+
+
+def test_add_image_attributes():
+    sizes = {"package/img/logo.png": (64, 32)}
+    html = add_image_attributes(
+        '<img alt="Logo" src="../img/logo.png" /><img src="https://example.com/img/logo.png">'
+        '<img src="../img/logo.png" width="10" loading="eager">',
+        sizes,
+        "package/page/",
+    )
+    assert html == (
+        '<img width="64" height="32" loading="lazy" decoding="async" alt="Logo" src="../img/logo.png" />'
+        '<img src="https://example.com/img/logo.png">'
+        '<img decoding="async" src="../img/logo.png" width="10" loading="eager">'
+    )
+
+
+def test_package_images_get_attributes(tmp_path):
+    docs_path = tmp_path / "package"
+    Path(docs_path, "img").mkdir(parents=True)
+    Path(docs_path, "index.md").write_text("# Package\n\n![Logo](img/logo.png)\n", encoding="utf8")
+    Path(docs_path, "img", "logo.png").write_bytes(create_png(64, 32))
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(MKDOCS_YML.format(docs_path=docs_path.as_posix()), encoding="utf8")
+
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+    html = Path(site_root, "site", "package", "index.html").read_text(encoding="utf8")
+    assert '<img width="64" height="32" loading="lazy" decoding="async" alt="Logo" src="img/logo.png" />' in html
+
+
+def test_image_sizes_of_previous_build_are_reused(tmp_path, monkeypatch):
+    Path(tmp_path, "kept.png").write_bytes(create_png(64, 32))
+    Path(tmp_path, "removed.png").write_bytes(create_png(16, 16))
+    sizes = ImageSizes()
+    sizes.start_build()
+    assert sizes.get(str(tmp_path / "kept.png")) == (64, 32)
+    assert sizes.get(str(tmp_path / "removed.png"), "digest") == (16, 16)
+
+    monkeypatch.setattr(image_size, "read_image_size", lambda path: None)
+    sizes.start_build()
+    assert sizes.get(str(tmp_path / "kept.png")) == (64, 32)
+    # Sizes of images which are not added by the build are dropped
+    assert len(sizes.sizes) == 1
+    sizes.start_build()
+    assert sizes.get(str(tmp_path / "removed.png"), "digest") is None
@@ -0,0 +1,106 @@
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from mkdocs.config.base import load_config
+from mkdocs.structure.files import File, Files
+
+from mkdocs_partial.integrations.macros_plugin_shim import MacrosPluginShim
+from mkdocs_partial.mkdcos_helpers import collect_log_records
+
+
+@pytest.fixture(name="site")
+def fixture_site(tmp_path, monkeypatch):
+    resolved = []
+    resolve = getattr(MacrosPluginShim, "_MacrosPluginShim__resolve")
+
+    def counting_resolve(self, page_dir, name, value):
+        resolved.append((page_dir, name, value))
+        return resolve(self, page_dir, name, value)
+
+    monkeypatch.setattr(MacrosPluginShim, "_MacrosPluginShim__resolve", counting_resolve)
+    Path(tmp_path, "docs").mkdir()
+    Path(tmp_path, "mkdocs.yml").write_text("site_name: test\nplugins:\n  - macros\n", encoding="utf8")
+    config = load_config(str(tmp_path / "mkdocs.yml"))
+    shim = config.plugins["macros"]
+    assert isinstance(shim, MacrosPluginShim)
+    config.plugins.on_config(config)
+    return shim, config, resolved
+
+
+def set_page(shim: MacrosPluginShim, src_path: str, package: str | None = "docs"):
+    shim._page = SimpleNamespace(
+        file=SimpleNamespace(src_path=src_path), meta={} if package is None else {"docs_package": package}
+    )
+
+
+def post_build_warnings(config) -> list[str]:
+    with collect_log_records("mkdocs.plugins.partial_docs", logging.WARNING) as warnings:
+        config.plugins.on_post_build(config=config)
+    return [message for _, _, message in warnings]
+
+
+def test_links_are_resolved_once_per_page_directory(site):
+    shim, _, resolved = site
+    shim.register_docs_package("docs", SimpleNamespace(directory="/guide/", version="1.0"))
+
+    for page in ("guide/a.md", "guide/b.md", "guide/a.md"):
+        set_page(shim, page)
+        assert shim.package_link("target.md") == "target.md"
+    set_page(shim, "other/c.md")
+    assert shim.package_link("target.md") == "../guide/target.md"
+    assert shim.package_link("target.md", "docs") == "../guide/target.md"
+
+    assert resolved == [("guide", "docs", "target.md"), ("other", "docs", "target.md")]
+
+
+def test_links_are_resolved_again_when_packages_or_files_change(site):
+    shim, config, resolved = site
+    set_page(shim, "other/c.md")
+    shim.register_docs_package("docs", SimpleNamespace(directory="guide", version="1.0"))
+    assert shim.package_link("target.md") == "../guide/target.md"
+    shim.register_docs_package("docs", SimpleNamespace(directory="reference", version="1.0"))
+    assert shim.package_link("target.md") == "../reference/target.md"
+    assert len(resolved) == 2
+
+    # Links are validated once files of the build are known
+    shim.on_nav(None, config, Files([File.generated(config, "reference/target.md", content="# Target")]))
+    assert shim.package_link("target.md") == "../reference/target.md"
+    assert shim.package_link("missing.md#anchor") == "../reference/missing.md#anchor"
+    set_page(shim, "other/d.md")
+    assert shim.package_link("missing.md#anchor") == "../reference/missing.md#anchor"
+    assert len(resolved) == 4
+    assert post_build_warnings(config) == [
+        "partial_docs: Docs package macros issues:\n"
+        "  Package docs does not have 'missing.md#anchor' page (used on other/c.md, other/d.md)"
+    ]
+
+    # Next build starts with empty cache and no known files
+    config.plugins.on_config(config)
+    assert shim.package_link("missing.md#anchor") == "../reference/missing.md#anchor"
+    assert len(resolved) == 5
+    assert post_build_warnings(config) == []
+
+
+def test_unknown_packages_are_reported_once(site):
+    shim, config, resolved = site
+    shim.register_docs_package("docs", SimpleNamespace(directory="guide", version="1.0"))
+    set_page(shim, "index.md", package=None)
+    assert shim.package_link("target.md") == "target.md"
+    assert shim.package_version() == ""
+    assert shim.package_version("docs") == "1.0"
+
+    for page in ("guide/index.md", "guide/other.md"):
+        set_page(shim, page)
+        assert shim.package_link("target.md", "other") == "target.md"
+        assert shim.package_version("other") == ""
+    # Unknown package is resolved once per page directory as well
+    assert len(resolved) == 1
+    assert post_build_warnings(config) == [
+        "partial_docs: Docs package macros issues:\n"
+        "  Package other is not installed (used on guide/index.md, guide/other.md)\n"
+        "  `package_link` may be used only on pages managed with `docs_package` plugin (used on index.md)\n"
+        "  name arg is mandatory for `package_version` when used on pages which are not managed with "
+        "`docs_package` plugin (used on index.md)"
+    ]
@@ -0,0 +1,140 @@
+import json
+import os
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial import media_store
+from mkdocs_partial.cache import file_hash
+from mkdocs_partial.media_store import DIGESTS_FILE, MediaStore, current_media_store
+
+MKDOCS_YML = """site_name: test
+plugins:
+  - partial_docs:
+      {options}
+  - docs_package:
+      name: first
+      docs_path: {first}
+      directory: first
+  - docs_package:
+      name: second
+      docs_path: {second}
+      directory: second
+"""
+
+
+def create_site(tmp_path: Path, options: str) -> Path:
+    for package in ("first", "second"):
+        Path(tmp_path, package, "img").mkdir(parents=True, exist_ok=True)
+        Path(tmp_path, package, "index.md").write_text(f"# {package}\n\n![Logo](img/logo.png)\n", encoding="utf8")
+        Path(tmp_path, package, "img", "logo.png").write_bytes(b"png")
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True, exist_ok=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(
+        MKDOCS_YML.format(
+            options=options, first=(tmp_path / "first").as_posix(), second=(tmp_path / "second").as_posix()
+        ),
+        encoding="utf8",
+    )
+    return site_root
+
+
+def build_site(site_root: Path) -> MediaStore:
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        build(config)
+        return current_media_store.get()
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+
+
+def write_digests(docs_path: Path, path: str, digest: str):
+    stat = os.stat(Path(docs_path, path))
+    Path(docs_path, DIGESTS_FILE).write_text(json.dumps({path: [stat.st_size, int(stat.st_mtime), digest]}))
+
+
+def test_duplicate_media_is_hardlinked(tmp_path):
+    site_root = create_site(tmp_path, "media_dedup: hardlink")
+    store = build_site(site_root)
+    assert store.savings == {"second": [1, 3]}
+    first = Path(site_root, "site", "first", "img", "logo.png")
+    second = Path(site_root, "site", "second", "img", "logo.png")
+    assert second.read_bytes() == b"png"
+    assert os.path.samefile(first, second)
+    assert 'src="img/logo.png"' in Path(site_root, "site", "second", "index.html").read_text(encoding="utf8")
+
+
+def test_manifest_digest_is_verified_for_duplicates(tmp_path):
+    site_root = create_site(tmp_path, "media_dedup: hardlink")
+    Path(tmp_path, "second", "img", "logo.png").write_bytes(b"gif")
+    for package in ("first", "second"):
+        write_digests(Path(tmp_path, package), "img/logo.png", "0123456789abcdef")
+    store = build_site(site_root)
+    assert store.savings == {}
+    assert Path(site_root, "site", "first", "img", "logo.png").read_bytes() == b"png"
+    assert Path(site_root, "site", "second", "img", "logo.png").read_bytes() == b"gif"
+
+
+def test_duplicate_media_url_is_rewritten(tmp_path):
+    site_root = create_site(tmp_path, "media_dedup: url")
+    build_site(site_root)
+    assert Path(site_root, "site", "first", "img", "logo.png").read_bytes() == b"png"
+    assert not Path(site_root, "site", "second", "img").exists()
+    assert 'src="../first/img/logo.png"' in Path(site_root, "site", "second", "index.html").read_text(encoding="utf8")
+
+
+def test_media_is_fingerprinted(tmp_path):
+    site_root = create_site(tmp_path, "enabled: true")
+    mkdocs_yml = Path(site_root, "mkdocs.yml").read_text(encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(mkdocs_yml + "      fingerprint_media: true\n", encoding="utf8")
+    # Digest from the package manifest is used as long as size and modification time of the file match
+    write_digests(Path(tmp_path, "second"), "img/logo.png", "0123456789abcdef")
+    build_site(site_root)
+
+    assert Path(site_root, "site", "first", "img", "logo.png").is_file()
+    assert Path(site_root, "site", "second", "img", "logo.01234567.png").read_bytes() == b"png"
+    assert not Path(site_root, "site", "second", "img", "logo.png").exists()
+    html = Path(site_root, "site", "second", "index.html").read_text(encoding="utf8")
+    assert 'src="img/logo.01234567.png"' in html
+
+    Path(tmp_path, "second", "img", "logo.png").write_bytes(b"jpeg")
+    build_site(site_root)
+    html = Path(site_root, "site", "second", "index.html").read_text(encoding="utf8")
+    assert 'src="img/logo.41e5787e.png"' in html
+
+    # File of the same size modified after packaging is hashed again, whatever the manifest modification time is
+    logo = Path(tmp_path, "second", "img", "logo.png")
+    logo.write_bytes(b"gif")
+    write_digests(Path(tmp_path, "second"), "img/logo.png", "0123456789abcdef")
+    stat = os.stat(logo)
+    os.utime(logo, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+    build_site(site_root)
+    html = Path(site_root, "site", "second", "index.html").read_text(encoding="utf8")
+    assert f'src="img/logo.{file_hash(str(logo))[:8]}.png"' in html
+
+
+def test_digests_of_previous_build_are_reused(tmp_path, monkeypatch):
+    kept = tmp_path / "kept.png"
+    kept.write_bytes(b"kept")
+    removed = tmp_path / "removed.png"
+    removed.write_bytes(b"removed")
+    previous = MediaStore()
+    previous.digest(str(kept))
+    previous.digest(str(removed))
+    removed.unlink()
+
+    hashed = []
+    monkeypatch.setattr(media_store, "file_hash", lambda path: hashed.append(path) or "changed")
+    store = MediaStore(previous=previous)
+    assert store.digest(str(kept)) == file_hash(str(kept))
+    assert hashed == []
+    kept.write_bytes(b"changed")
+    assert store.digest(str(kept)) == "changed"
+    assert hashed == [str(kept)]
+    # Only digests of media added by the build are passed to the next one
+    assert {path for path, _, _ in store.digests} == {str(kept)}
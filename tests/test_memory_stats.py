@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+MKDOCS_YML = """site_name: test
+plugins:
+  - partial_docs:
+      memory: true
+  - docs_package:
+      name: package
+      docs_path: {docs_path}
+      directory: package
+"""
+
+
+def test_memory_report_is_not_published(tmp_path):
+    Path(tmp_path, "package").mkdir()
+    Path(tmp_path, "package", "index.md").write_text("# Package\n", encoding="utf8")
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(
+        MKDOCS_YML.format(docs_path=(tmp_path / "package").as_posix()), encoding="utf8"
+    )
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+
+    assert not Path(site_root, "site", "docs_packages_memory.json").exists()
+    report = json.loads(Path(site_root, "docs_packages_memory.json").read_text(encoding="utf8"))
+    assert report["packages"]["package"]["files"] == 1
+    assert set(report["phases"]) == {"config", "files", "nav", "render", "build"}
+    assert all(set(phase) == {"traced_peak"} for phase in report["phases"].values())
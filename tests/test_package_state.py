@@ -0,0 +1,88 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import Files
+
+from mkdocs_partial.package_state import PackageState
+
+
+def age(*paths):
+    # Files modified right before they are scanned are not trusted by the state
+    past = time.time() - 60
+    for path in paths:
+        os.utime(path, (past, past))
+
+
+def test_scan_is_reused_until_directory_changes(tmp_path):
+    Path(tmp_path, "guide").mkdir()
+    Path(tmp_path, "index.md").write_text("# Home\n", encoding="utf8")
+    age(tmp_path, tmp_path / "guide")
+    state = PackageState()
+
+    index = state.scan(str(tmp_path), ("**/*.md",))
+    assert [os.path.basename(path) for path in index["**/*.md"]] == ["index.md"]
+    assert state.scan(str(tmp_path), ("**/*.md",)) is index
+
+    Path(tmp_path, "guide", "install.md").write_text("# Install\n", encoding="utf8")
+    index = state.scan(str(tmp_path), ("**/*.md",))
+    assert sorted(os.path.basename(path) for path in index["**/*.md"]) == ["index.md", "install.md"]
+
+
+def test_page_is_parsed_again_when_changed(tmp_path):
+    path = str(tmp_path / "index.md")
+    Path(path).write_text("---\ntitle: Home\n---\n# Home\n", encoding="utf8")
+    age(path)
+    state = PackageState()
+
+    post = state.read_page(path)
+    post.metadata["partial"] = True
+    content = state.dump_page(path, post)
+    post = state.read_page(path)
+    assert "partial" not in post.metadata
+    assert state.dump_page(path, post) == content
+    assert (state.hits, state.misses) == (1, 1)
+
+    Path(path).write_text("---\ntitle: Changed\n---\n# Home\n", encoding="utf8")
+    post = state.read_page(path)
+    assert state.read_page(path).metadata["title"] == "Changed"
+    assert post.metadata["title"] == "Changed"
+    assert "Changed" in state.dump_page(path, post)
+    # Just modified page is parsed again until its mtime is older than timestamp resolution
+    assert (state.hits, state.misses) == (1, 3)
+
+
+def test_state_is_keyed_by_version_and_config():
+    PackageState.store.clear()
+    state = PackageState.get("docs", "1.0.0", {"directory": "docs"})
+    assert PackageState.get("docs", "1.0.0", {"directory": "docs"}) is state
+    assert PackageState.get("docs", "1.0.1", {"directory": "docs"}) is not state
+    assert len(PackageState.store) == 1
+    PackageState.store.clear()
+
+
+@pytest.mark.parametrize("command, kept", [("build", False), ("serve", True)])
+def test_state_is_kept_for_serve_only(tmp_path, command, kept):
+    Path(tmp_path, "package").mkdir()
+    Path(tmp_path, "package", "index.md").write_text("# Package\n", encoding="utf8")
+    Path(tmp_path, "site", "docs").mkdir(parents=True)
+    mkdocs_yml = "site_name: test\nplugins:\n  - docs_package:\n      name: first\n"
+    mkdocs_yml += f"      docs_path: {(tmp_path / 'package').as_posix()}\n      directory: first\n"
+    Path(tmp_path, "site", "mkdocs.yml").write_text(mkdocs_yml, encoding="utf8")
+    PackageState.store.clear()
+
+    config = load_config(str(tmp_path / "site" / "mkdocs.yml"))
+    config.plugins.on_startup(command=command, dirty=False)
+    try:
+        config = config.plugins.on_config(config)
+        files = config.plugins.on_files(Files([]), config=config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+
+    assert [file.src_uri for file in files] == ["first/index.md"]
+    assert (len(PackageState.store) == 1) == kept
+    PackageState.store.clear()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import time
+import zipfile
+from pathlib import Path
+
+from mkdocs_partial.packages.packager import Packager
+from mkdocs_partial.templating.templater import Templater
+
+
+def pack(source, output, **kwargs):
+    Packager("docs-package").pack(
+        package_name="docs-test",
+        package_version="1.0.0",
+        package_description=None,
+        output_dir=str(output),
+        resources_src_dir=str(source),
+        resources_package_dir="docs",
+        directory='"test"',
+        edit_url_template="None",
+        title="None",
+        blog_categories="None",
+        **kwargs,
+    )
+    return os.path.join(output, "docs_test-1.0.0-py3-none-any.whl")
+
+
+def test_string_templates(tmp_path):
+    templater = Templater(templates_dir=str(tmp_path), name="test")
+    assert templater.template_string("docs/index.md") == "docs/index.md"
+    assert templater.template_string("{{ name }}/index.md") == "test/index.md"
+    assert templater.template_string("{{ name }}/index.md", name="other") == "test/index.md"
+    assert templater.template_string("{% if name %}{{ name }}{% endif %}") == "test"
+
+
+def test_pack_with_templates_cache(tmp_path):
+    source = tmp_path / "docs"
+    Path(source, "img").mkdir(parents=True)
+    Path(source, "index.md").write_text("# Home\n", encoding="utf8")
+    Path(source, "img", "logo.png").write_bytes(b"png")
+    cache = tmp_path / "cache"
+
+    for _ in range(2):
+        wheel = pack(source, tmp_path, templates_cache_dir=str(cache))
+
+    assert len(os.listdir(cache)) > 0
+    with zipfile.ZipFile(wheel) as zipf:
+        assert zipf.read("docs_test/docs/index.md") == b"# Home\n"
+        assert zipf.read("docs_test/docs/img/logo.png") == b"png"
+        assert "docs_test/__init__.py" in zipf.namelist()
+        assert zipf.getinfo("docs_test/docs/index.md").external_attr >> 16 == 0o100644
+        record = zipf.read("docs_test-1.0.0.dist-info/RECORD").decode("utf8").splitlines()
+        for line in record:
+            path, digest, size = line.split(",")
+            data = zipf.read(path)
+            assert digest == f"sha256={hashlib.sha256(data).hexdigest()}"
+            assert int(size) == len(data)
+        # Media keeps modification time recorded to the manifest when extracted with timestamps
+        size, mtime, digest = json.loads(zipf.read("docs_test/docs/.media_digests.json"))["img/logo.png"]
+        assert (size, digest) == (3, hashlib.sha256(b"png").hexdigest())
+        assert mtime == int(os.stat(Path(source, "img", "logo.png")).st_mtime) // 2 * 2
+        assert zipf.getinfo("docs_test/docs/img/logo.png").date_time == time.localtime(mtime)[:6]
+
+
+def test_freeze_keeps_formatting(tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    content = (
+        "# Docs packages\r\n"
+        "--index-url https://example.com/simple\r\n"
+        "\r\n"
+        "docs_first >=1.0  # pinned by release\r\n"
+        "docs-second[extra]; python_version >= '3.8'\r\n"
+        "docs-third==2.0\r\n"
+        "mkdocs >=1.6\r\n"
+    )
+    requirements.write_bytes(content.encode("utf8"))
+    versions = {"docs-first": "1.2.0", "docs-second": "0.3", "docs-third": "2.0"}
+
+    changes = Packager.freeze_file(str(requirements), versions)
+    assert changes == ["docs_first: >=1.0 -> ==1.2.0", "docs-second: * -> ==0.3"]
+    assert requirements.read_bytes().decode("utf8") == (
+        "# Docs packages\r\n"
+        "--index-url https://example.com/simple\r\n"
+        "\r\n"
+        "docs_first==1.2.0  # pinned by release\r\n"
+        'docs-second[extra]==0.3; python_version >= "3.8"\r\n'
+        "docs-third==2.0\r\n"
+        "mkdocs >=1.6\r\n"
+    )
+    assert Packager.freeze_file(str(requirements), versions) == []
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from mkdocs_partial.docs_package_plugin import DocsPackagePlugin
+from mkdocs_partial.plugin_registry import REGISTRY_FILE, PluginRegistry
+
+# Stands in for PyInstaller bootloader: sets `sys.frozen` and `sys._MEIPASS` before anything is imported
+STARTUP = """
+import importlib.metadata
+import json
+import sys
+import time
+
+start = time.perf_counter()
+if {frozen}:
+    sys.frozen = True
+    sys._MEIPASS = {bundle!r}
+scans = []
+discover = importlib.metadata.distributions
+importlib.metadata.distributions = lambda **params: scans.append(params) or discover(**params)
+
+# Imported first as by the entry point of site package
+from mkdocs_partial.site_entry_point import SiteEntryPoint
+from mkdocs_partial.plugin_registry import PluginRegistry
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+
+config = load_config("mkdocs.yml")
+config.plugins.on_startup(command="build", dirty=False)
+build(config)
+config.plugins.on_shutdown()
+plugin_modules = {{ep.module for ep in importlib.metadata.entry_points(group="mkdocs.plugins")}}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "scans": len(scans),
+    "frozen": PluginRegistry.installed() is not None,
+    "plugin_modules": sorted(module for module in plugin_modules if module in sys.modules),
+}}))
+"""
+
+
+def start_site(site_root: Path, bundle: Path, frozen: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP.format(frozen=frozen, bundle=str(bundle))],
+        cwd=site_root,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def test_frozen_startup_uses_registry(tmp_path):
+    bundle = tmp_path / "bundle"
+    Path(bundle, "mkdocs_partial").mkdir(parents=True)
+    registry = PluginRegistry.build(DocsPackagePlugin)
+    PluginRegistry.write(str(bundle / "mkdocs_partial" / REGISTRY_FILE), registry)
+    assert "mkdocs_partial.partial_docs_plugin" in registry["hidden_imports"]
+
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text("site_name: test\nplugins:\n  - search\n  - partial_docs\n")
+
+    runtime = start_site(site_root, bundle, frozen=False)
+    frozen = start_site(site_root, bundle, frozen=True)
+
+    assert not runtime["frozen"] and runtime["scans"] > 0
+    assert frozen["frozen"] and frozen["scans"] == 0
+    # Only configured plugins are imported, docs packages are known without importing every plugin
+    assert frozen["plugin_modules"] == sorted(
+        ["mkdocs.contrib.search", "mkdocs_partial.partial_docs_plugin", "mkdocs_partial.docs_package_plugin"]
+    )
+    assert os.path.isfile(site_root / "site" / "index.html")
+    print(f"startup with runtime discovery {runtime['seconds']:.3f}s, frozen {frozen['seconds']:.3f}s")
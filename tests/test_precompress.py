@@ -0,0 +1,64 @@
+import gzip
+import json
+import os
+from pathlib import Path
+
+from mkdocs_partial.precompress import Precompressor, manifest_path
+
+HTML = "<html><body>" + "<p>compressible text</p>" * 100 + "</body></html>"
+
+
+def test_precompress(tmp_path):
+    Path(tmp_path, "search").mkdir()
+    Path(tmp_path, "index.html").write_text(HTML, encoding="utf8")
+    Path(tmp_path, "search", "search_index.json").write_text('{"docs": []}', encoding="utf8")
+    Path(tmp_path, "logo.png").write_bytes(HTML.encode("utf8"))
+
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(tmp_path))
+    assert (precompressor.compressed, precompressor.skipped) == (1, 0)
+    assert gzip.decompress(Path(tmp_path, "index.html.gz").read_bytes()).decode("utf8") == HTML
+    # Too small and not compressible files are skipped
+    assert not Path(tmp_path, "search", "search_index.json.gz").exists()
+    assert not Path(tmp_path, "logo.png.gz").exists()
+    assert precompressor.original_bytes[".gz"] == len(HTML)
+    assert "bytes saved" in precompressor.format_summary()
+
+    # Unchanged files are not compressed again
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(tmp_path))
+    assert (precompressor.compressed, precompressor.skipped) == (0, 1)
+
+    Path(tmp_path, "index.html").write_text(HTML + "<!-- changed -->", encoding="utf8")
+    stat = os.stat(Path(tmp_path, "index.html"))
+    os.utime(Path(tmp_path, "index.html"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(tmp_path))
+    assert (precompressor.compressed, precompressor.skipped) == (1, 0)
+    assert gzip.decompress(Path(tmp_path, "index.html.gz").read_bytes()).decode("utf8").endswith("<!-- changed -->")
+
+
+def test_precompress_removes_stale_siblings(tmp_path):
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+    Path(site_dir, "index.html").write_text(HTML, encoding="utf8")
+    Path(site_dir, "data.json").write_bytes(os.urandom(2048))
+    # Siblings of previous content of the files
+    Path(site_dir, "data.json.gz").write_bytes(b"gz")
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(site_dir))
+    assert precompressor.removed == [str(Path(site_dir, "data.json.gz"))]
+    assert not Path(site_dir, "data.json.gz").exists()
+    assert Path(site_dir, "index.html.gz").exists()
+
+    # Files which are not smaller compressed are recorded and not compressed again until changed
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(site_dir))
+    assert (precompressor.compressed, precompressor.skipped) == (0, 2)
+    assert "data.json.gz" in json.loads(Path(manifest_path(str(site_dir))).read_text(encoding="utf8"))
+
+    Path(site_dir, "index.html").write_text("<html></html>", encoding="utf8")
+    precompressor = Precompressor(min_size=100, workers=1)
+    precompressor.run(str(site_dir))
+    assert precompressor.compressed == 0
+    assert not Path(site_dir, "index.html.gz").exists()
@@ -0,0 +1,80 @@
+import logging
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial.mkdcos_helpers import collect_log_records
+
+MKDOCS_YML = """site_name: test
+plugins:
+  - redirects:
+      redirect_maps:
+        guide/mapped.md: index.md
+  - docs_package:
+      name: first
+      docs_path: {first}
+      directory: guide
+  - docs_package:
+      name: second
+      docs_path: {second}
+      directory: guide
+"""
+
+
+def create_site(tmp_path: Path) -> Path:
+    pages = {
+        "first": "---\nredirects: [legacy.md, old.md, second.md, mapped.md]\n---\n# First\n",
+        "second": "---\nredirects: [old.md]\n---\n# Second\n",
+    }
+    for package, content in pages.items():
+        Path(tmp_path, package).mkdir()
+        Path(tmp_path, package, f"{package}.md").write_text(content, encoding="utf8")
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(
+        MKDOCS_YML.format(first=(tmp_path / "first").as_posix(), second=(tmp_path / "second").as_posix()),
+        encoding="utf8",
+    )
+    return site_root
+
+
+def build_site(site_root: Path) -> list[str]:
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        with collect_log_records("mkdocs.plugins.partial_docs", logging.WARNING) as warnings:
+            build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+    return [message for _, _, message in warnings]
+
+
+def redirect_target(site_root: Path, path: str) -> str:
+    html = Path(site_root, "site", path, "index.html").read_text(encoding="utf8")
+    return html.split('<link rel="canonical" href="', 1)[1].split('"', 1)[0]
+
+
+def test_redirects_are_registered_in_batch(tmp_path):
+    site_root = create_site(tmp_path)
+    warnings = build_site(site_root)
+
+    # Conflicts of the whole build are reported with a single warning
+    assert len(warnings) == 1
+    summary, *conflicts = warnings[0].splitlines()
+    assert summary == "partial_docs: 3 redirect(s) skipped due to conflicts:"
+    assert [conflict.strip() for conflict in conflicts] == [
+        "'guide/old.md' -> 'guide/second.md' from 'second' conflicts with redirect to 'guide/first.md' from 'first'",
+        "'guide/second.md' -> 'guide/first.md' from 'first' conflicts with existing page",
+        "'guide/mapped.md' -> 'guide/first.md' from 'first' conflicts with `redirect_maps` entry to 'index.md'",
+    ]
+
+    assert redirect_target(site_root, "guide/legacy") == "../first/"
+    # The first registered redirect wins
+    assert redirect_target(site_root, "guide/old") == "../first/"
+    assert redirect_target(site_root, "guide/mapped") == "../../"
+    second = Path(site_root, "site", "guide", "second", "index.html").read_text(encoding="utf8")
+    assert 'id="second">Second</h1>' in second
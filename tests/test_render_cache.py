@@ -0,0 +1,108 @@
+import logging
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial.mkdcos_helpers import collect_log_records
+
+MKDOCS_YML = """site_name: test
+extra:
+  release: "{release}"
+plugins:
+  - macros
+  - partial_docs:
+      render_cache_dir: .render-cache
+  - docs_package:
+      docs_path: {docs_path}
+      directory: package
+"""
+
+
+def create_site(tmp_path: Path, release: str = "1.0") -> Path:
+    docs_path = tmp_path / "package"
+    docs_path.mkdir(exist_ok=True)
+    Path(docs_path, "index.md").write_text("# Package\n\nReleased {{ config.extra.release }}.\n", encoding="utf8")
+    Path(docs_path, "page.md").write_text("# Page\n\n[Target](target.md), [Index](index.md#package)\n", encoding="utf8")
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True, exist_ok=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(
+        MKDOCS_YML.format(release=release, docs_path=docs_path.as_posix()), encoding="utf8"
+    )
+    return site_root
+
+
+def build_site(site_root: Path):
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        with collect_log_records("mkdocs.structure.pages", logging.WARNING) as warnings:
+            build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+    cache = config.plugins["partial_docs"].cache
+    return cache.hits, cache.misses, [message for _, _, message in warnings]
+
+
+def read_page(site_root: Path, path: str) -> str:
+    return Path(site_root, "site", path, "index.html").read_text(encoding="utf8")
+
+
+def test_unchanged_pages_are_reused(tmp_path):
+    site_root = create_site(tmp_path)
+    hits, misses, warnings = build_site(site_root)
+    assert (hits, misses) == (0, 2)
+    assert len(warnings) == 1 and "'target.md'" in warnings[0]
+    expected = read_page(site_root, "package/page")
+
+    hits, misses, cached_warnings = build_site(site_root)
+    assert (hits, misses) == (2, 0)
+    # Broken link is reported for cached page as well
+    assert cached_warnings == warnings
+    assert read_page(site_root, "package/page") == expected
+
+
+def test_changed_link_target_invalidates_page(tmp_path):
+    site_root = create_site(tmp_path)
+    build_site(site_root)
+    assert 'href="target.md"' in read_page(site_root, "package/page")
+
+    Path(site_root, "docs", "package").mkdir()
+    Path(site_root, "docs", "package", "target.md").write_text("# Target\n", encoding="utf8")
+    hits, misses, warnings = build_site(site_root)
+    assert (hits, misses) == (1, 1)
+    assert warnings == []
+    assert 'href="../target/"' in read_page(site_root, "package/page")
+
+
+def test_changed_macro_output_invalidates_page(tmp_path):
+    site_root = create_site(tmp_path, release="1.0")
+    build_site(site_root)
+    assert "Released 1.0." in read_page(site_root, "package")
+
+    site_root = create_site(tmp_path, release="2.0")
+    hits, misses, _ = build_site(site_root)
+    assert (hits, misses) == (1, 1)
+    assert "Released 2.0." in read_page(site_root, "package")
+
+
+def test_changed_snippet_invalidates_page(tmp_path):
+    site_root = create_site(tmp_path)
+    Path(tmp_path, "package", "snippet.txt").write_text("OLD SNIPPET\n", encoding="utf8")
+    Path(tmp_path, "package", "index.md").write_text('# Package\n\n--8<-- "snippet.txt"\n', encoding="utf8")
+    mkdocs_yml = Path(site_root, "mkdocs.yml").read_text(encoding="utf8")
+    mkdocs_yml += "markdown_extensions:\n  - pymdownx.snippets:\n      base_path: !docs_package_relative\n"
+    Path(site_root, "mkdocs.yml").write_text(mkdocs_yml, encoding="utf8")
+    build_site(site_root)
+    assert "OLD SNIPPET" in read_page(site_root, "package")
+
+    Path(tmp_path, "package", "snippet.txt").write_text("NEW SNIPPET\n", encoding="utf8")
+    hits, misses, _ = build_site(site_root)
+    assert (hits, misses) == (1, 1)
+    assert "NEW SNIPPET" in read_page(site_root, "package")
+
+    hits, misses, _ = build_site(site_root)
+    assert (hits, misses) == (2, 0)
@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+from mkdocs.commands.build import build
+from mkdocs.config.base import load_config
+from mkdocs.config.defaults import MkDocsConfig
+
+from mkdocs_partial.search_fragments import FRAGMENT_FILE, build_search_fragment
+
+
+def build_site(site_root: Path):
+    config = load_config(str(site_root / "mkdocs.yml"))
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        build(config)
+    finally:
+        config.plugins.on_shutdown()
+        MkDocsConfig.plugins.plugin_cache.clear()
+    search_index = json.loads(Path(config.site_dir, "search", "search_index.json").read_text(encoding="utf8"))
+    return search_index, getattr(config.plugins["search"].search_index, "_partial_docs_search_fragments", None)
+
+
+def test_search_fragment(tmp_path):
+    docs_path = tmp_path / "package"
+    Path(docs_path, "guide").mkdir(parents=True)
+    Path(docs_path, "index.md").write_text("# Package\n\nIntro.\n\n## Install\n\nInstall text.\n", encoding="utf8")
+    Path(docs_path, "guide", "page.md").write_text("# Guide\n\nGuide text.\n", encoding="utf8")
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(
+        "site_name: test\n"
+        "plugins:\n"
+        "  - search\n"
+        "  - docs_package:\n"
+        f"      docs_path: {docs_path.as_posix()}\n"
+        "      directory: package\n",
+        encoding="utf8",
+    )
+
+    fragment = build_search_fragment(str(docs_path), str(site_root / "mkdocs.yml"))
+    assert sorted(fragment["pages"].keys()) == ["guide/page.md", "index.md"]
+    assert [doc["location"] for doc in fragment["pages"]["index.md"]["docs"]] == ["", "#package", "#install"]
+
+    expected, _ = build_site(site_root)
+    Path(docs_path, FRAGMENT_FILE).write_text(json.dumps(fragment), encoding="utf8")
+    search_index, fragments = build_site(site_root)
+    assert search_index == expected
+    assert (fragments.hits, fragments.misses) == (2, 0)
+
+    # Changed page is indexed as usual
+    Path(docs_path, "guide", "page.md").write_text("# Guide\n\nChanged text.\n", encoding="utf8")
+    search_index, fragments = build_site(site_root)
+    assert (fragments.hits, fragments.misses) == (1, 1)
+    assert "Changed text." in [doc["text"] for doc in search_index["docs"]]
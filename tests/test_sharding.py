@@ -0,0 +1,171 @@
+import gzip
+import json
+import re
+import shutil
+from importlib.util import find_spec
+from pathlib import Path
+
+import pytest
+
+from mkdocs_partial.build_metrics import directory_size
+from mkdocs_partial.sharding import ShardPlan, build_sharded, merge_search_indexes, merge_shards
+
+SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{urls}
+</urlset>
+"""
+
+SITE_MKDOCS_YML = """site_name: test
+site_url: https://example.com/
+{theme}plugins:
+  - {search}
+  - partial_docs{partial_docs}
+"""
+
+MATERIAL_SEARCH_CONFIG = {
+    "lang": ["en"],
+    "separator": "[\\s\\-]+",
+    "pipeline": ["stopWordFilter"],
+    "fields": {"title": {"boost": 1000.0}, "text": {"boost": 1.0}, "tags": {"boost": 1000000.0}},
+}
+
+
+def write_shard(path: Path, page: str):
+    Path(path, page).mkdir(parents=True)
+    Path(path, page, "index.html").write_text(page, encoding="utf8")
+    Path(path, "404.html").write_text(str(path), encoding="utf8")
+    Path(path, "sitemap.xml").write_text(
+        SITEMAP.format(urls=f"    <url>\n         <loc>https://example.com/{page}/</loc>\n    </url>"), encoding="utf8"
+    )
+    Path(path, "search").mkdir()
+    search_index = {
+        "config": {"lang": ["en"], "prebuild_index": False},
+        "docs": [{"location": f"{page}/", "text": page, "title": page}],
+    }
+    Path(path, "search", "search_index.json").write_text(json.dumps(search_index), encoding="utf8")
+
+
+def test_merge_shards(tmp_path):
+    write_shard(tmp_path / "shard-0", "first")
+    write_shard(tmp_path / "shard-1", "second")
+    site_dir = tmp_path / "site"
+
+    merge_shards([str(tmp_path / "shard-0"), str(tmp_path / "shard-1")], str(site_dir))
+
+    assert Path(site_dir, "first", "index.html").read_text(encoding="utf8") == "first"
+    assert Path(site_dir, "second", "index.html").read_text(encoding="utf8") == "second"
+    assert Path(site_dir, "404.html").read_text(encoding="utf8") == str(tmp_path / "shard-0")
+    sitemap = Path(site_dir, "sitemap.xml").read_text(encoding="utf8")
+    assert "https://example.com/first/" in sitemap and "https://example.com/second/" in sitemap
+    assert Path(site_dir, "sitemap.xml.gz").is_file()
+    search_index = json.loads(Path(site_dir, "search", "search_index.json").read_text(encoding="utf8"))
+    assert [doc["location"] for doc in search_index["docs"]] == ["first/", "second/"]
+    assert search_index["config"] == {"lang": ["en"], "prebuild_index": False}
+    assert "index" not in search_index
+
+
+def test_merge_material_search_indexes(tmp_path):
+    path = tmp_path / "search_index.json"
+    search_indexes = [
+        {"config": MATERIAL_SEARCH_CONFIG, "docs": [{"location": "", "title": "Home", "text": ""}]},
+        {
+            "config": MATERIAL_SEARCH_CONFIG,
+            "docs": [
+                {"location": "", "title": "Home", "text": ""},
+                {"location": "first/", "title": "First", "text": "<p>First</p>", "tags": ["tag"]},
+            ],
+        },
+    ]
+
+    merge_search_indexes(search_indexes, str(path))
+
+    search_index = json.loads(path.read_text(encoding="utf8"))
+    assert search_index == {
+        "config": MATERIAL_SEARCH_CONFIG,
+        "docs": [
+            {"location": "", "title": "Home", "text": ""},
+            {"location": "first/", "title": "First", "text": "<p>First</p>", "tags": ["tag"]},
+        ],
+    }
+
+
+def test_stub():
+    assert ShardPlan.stub("---\n## Sub\n# Title {: #id }\ntext\n# Other") == "# Title {: #id }"
+    assert ShardPlan.stub("text only") == ""
+
+
+def create_site(tmp_path: Path, search="search", theme="", partial_docs="") -> Path:
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    mkdocs_yml = SITE_MKDOCS_YML.format(search=search, theme=theme, partial_docs=partial_docs)
+    for package in ("first", "second"):
+        Path(tmp_path, package).mkdir()
+        Path(tmp_path, package, "index.md").write_text(f"# {package.title()}\n\nText of {package}\n", encoding="utf8")
+        mkdocs_yml += f"  - docs_package:\n      name: {package}\n      docs_path: {(tmp_path / package).as_posix()}\n"
+        mkdocs_yml += f"      directory: {package}\n"
+    Path(site_root, "mkdocs.yml").write_text(mkdocs_yml, encoding="utf8")
+    return site_root
+
+
+@pytest.mark.parametrize(
+    "search, theme",
+    [
+        ("search:\n      prebuild_index: false", ""),
+        pytest.param(
+            "search:\n      prebuild_index: true",
+            "",
+            marks=pytest.mark.skipif(shutil.which("node") is None, reason="node is required"),
+        ),
+        pytest.param(
+            "material/search",
+            "theme: material\n",
+            marks=pytest.mark.skipif(find_spec("material") is None, reason="mkdocs-material is required"),
+        ),
+    ],
+)
+def test_sharded_build(tmp_path, search, theme):
+    site_root = create_site(tmp_path, search, theme)
+    site_dir = tmp_path / "output"
+
+    build_sharded(str(site_root), str(site_dir), [], 2)
+
+    for page in ("", "first/", "second/"):
+        assert Path(site_dir, page, "index.html").is_file()
+    sitemap = Path(site_dir, "sitemap.xml").read_text(encoding="utf8")
+    locations = [f"https://example.com/{page}" for page in ("", "first/", "second/")]
+    assert sorted(re.findall(r"<loc>(.*?)</loc>", sitemap)) == locations
+    assert gzip.decompress(Path(site_dir, "sitemap.xml.gz").read_bytes()).decode("utf8") == sitemap
+    search_index = json.loads(Path(site_dir, "search", "search_index.json").read_text(encoding="utf8"))
+    pages = [doc["location"] for doc in search_index["docs"] if "#" not in doc["location"]]
+    assert sorted(pages) == ["", "first/", "second/"]
+    assert "Text of second" in [doc["text"] for doc in search_index["docs"] if doc["location"] == "second/"][0]
+    if "prebuild_index: true" in search:
+        # Prebuilt index of shards is built again for all pages
+        vectors = [ref for ref, _ in search_index["index"]["fieldVectors"]]
+        assert {"text/first/", "text/second/"} <= set(vectors)
+    else:
+        assert "index" not in search_index
+    assert not list(tmp_path.glob("output.shard-*"))
+
+
+def test_sharded_build_reports(tmp_path):
+    partial_docs = ":\n      timing: true\n      timing_report: timings.json\n      memory: true\n"
+    partial_docs += "      metrics_file: metrics.prom"
+    site_root = create_site(tmp_path, partial_docs=partial_docs)
+    site_dir = tmp_path / "output"
+
+    build_sharded(str(site_root), str(site_dir), [], 2)
+
+    # Both shards ingest all docs packages, so their calls are summed up
+    timings = json.loads(Path(site_root, "timings.json").read_text(encoding="utf8"))
+    assert timings["first"]["hooks"]["on_files"]["calls"] == 2
+    assert timings["second"]["hooks"]["on_files"]["calls"] == 2
+    memory = json.loads(Path(site_root, "docs_packages_memory.json").read_text(encoding="utf8"))
+    assert {"first", "second"} <= set(memory["packages"])
+    assert "render" in memory["phases"]
+    metrics = Path(site_root, "metrics.prom").read_text(encoding="utf8")
+    assert "mkdocs_partial_builds_total 1\n" in metrics
+    assert f"mkdocs_partial_site_bytes {directory_size(str(site_dir))}\n" in metrics
+    assert 'mkdocs_partial_package_pages{package="first"} 1\n' in metrics
@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+from mkdocs_partial import site_cache
+from mkdocs_partial.site_cache import SiteCache, hash_directory, markdown_distributions
+
+MKDOCS_YML = """site_name: test
+plugins:
+  - spellcheck:
+      cache_dir: spellcheck-cache
+  - partial_docs:
+      render_cache_dir: render-cache
+      timing_report: reports/timings.json
+      metrics_file: metrics.prom
+      memory: true
+"""
+
+
+def test_hash_directory(tmp_path):
+    Path(tmp_path, "docs").mkdir()
+    Path(tmp_path, "docs", "index.md").write_text("# Index", encoding="utf8")
+    Path(tmp_path, "site").mkdir()
+    Path(tmp_path, "site", "index.html").write_text("<h1>Index</h1>", encoding="utf8")
+
+    expected = hash_directory(str(tmp_path), exclude=[os.path.join(tmp_path, "site")])
+    Path(tmp_path, "site", "index.html").write_text("<h1>Changed</h1>", encoding="utf8")
+    assert hash_directory(str(tmp_path), exclude=[os.path.join(tmp_path, "site")]) == expected
+
+    Path(tmp_path, "docs", "index.md").write_text("# Changed", encoding="utf8")
+    assert hash_directory(str(tmp_path), exclude=[os.path.join(tmp_path, "site")]) != expected
+
+
+def test_fingerprint_ignores_build_outputs(tmp_path):
+    site_root = tmp_path / "site"
+    Path(site_root, "docs").mkdir(parents=True)
+    Path(site_root, "docs", "index.md").write_text("# Index", encoding="utf8")
+    Path(site_root, "mkdocs.yml").write_text(MKDOCS_YML, encoding="utf8")
+    site_dir = os.path.join(site_root, "site")
+    cache = SiteCache(str(tmp_path / "cache"))
+
+    def fingerprint():
+        return cache.fingerprint(str(site_root), site_dir, ["build"], {}, outputs=[f"{site_dir}.changes.json"])
+
+    expected = fingerprint()
+    for path in [
+        "site/index.html",
+        "site.changes.json",
+        ".git/index",
+        ".site.abc123/index.html",
+        "render-cache/ab/abcd.json",
+        "spellcheck-cache/ab/abcd.json",
+        "reports/timings.json",
+        "metrics.prom",
+        "docs_packages_memory.json",
+    ]:
+        Path(site_root, path).parent.mkdir(parents=True, exist_ok=True)
+        Path(site_root, path).write_text("output", encoding="utf8")
+    assert fingerprint() == expected
+
+    Path(site_root, "docs", "index.md").write_text("# Changed", encoding="utf8")
+    assert fingerprint() != expected
+
+
+def test_store_restore_evict(tmp_path):
+    cache = SiteCache(str(tmp_path / "cache"), limit=1)
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+    Path(site_dir, "index.html").write_text("first", encoding="utf8")
+
+    assert not cache.restore("first", str(site_dir))
+    cache.store("first", str(site_dir))
+    Path(site_dir, "index.html").write_text("second", encoding="utf8")
+    Path(site_dir, "stale.html").write_text("stale", encoding="utf8")
+
+    assert cache.restore("first", str(site_dir))
+    assert Path(site_dir, "index.html").read_text(encoding="utf8") == "first"
+    assert not Path(site_dir, "stale.html").exists()
+
+    cache.store("second", str(site_dir))
+    assert os.listdir(tmp_path / "cache") == ["second"]
+
+
+def test_fingerprint_includes_markdown_extension_versions(tmp_path, monkeypatch):
+    Path(tmp_path, "docs").mkdir()
+    mkdocs_yml = "site_name: test\nmarkdown_extensions:\n  - toc\n  - pymdownx.snippets:\n      check_paths: true\n"
+    Path(tmp_path, "mkdocs.yml").write_text(mkdocs_yml, encoding="utf8")
+    assert [dist for dist, _ in markdown_distributions(mkdocs_yml)] == ["Markdown", "pymdown-extensions"]
+    cache = SiteCache(str(tmp_path / "cache"))
+    expected = cache.fingerprint(str(tmp_path), str(tmp_path / "site"), ["build"], {})
+
+    installed = site_cache.version
+    monkeypatch.setattr(site_cache, "version", lambda dist: "0.0" if dist == "pymdown-extensions" else installed(dist))
+    assert cache.fingerprint(str(tmp_path), str(tmp_path / "site"), ["build"], {}) != expected
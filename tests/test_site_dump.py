@@ -0,0 +1,105 @@
+import os
+from pathlib import Path
+
+from mkdocs_partial.site_dump import SiteDump
+
+
+def create_site(path: Path):
+    Path(path, "docs", "img").mkdir(parents=True)
+    Path(path, "mkdocs.yml").write_text("site_name: test\n", encoding="utf8")
+    Path(path, "docs", "index.md").write_text("# Home\n", encoding="utf8")
+    Path(path, "docs", "img", "logo.png").write_bytes(b"png")
+
+
+def test_dump_is_incremental(tmp_path):
+    source = tmp_path / "site"
+    output = tmp_path / "output"
+    create_site(source)
+
+    site_dump = SiteDump()
+    site_dump.dump(str(source), str(output))
+    assert (site_dump.copied, site_dump.skipped) == (3, 0)
+    assert Path(output, "docs", "img", "logo.png").read_bytes() == b"png"
+
+    Path(source, "docs", "index.md").write_text("# Changed\n", encoding="utf8")
+    site_dump = SiteDump()
+    site_dump.dump(str(source), str(output))
+    assert (site_dump.copied, site_dump.skipped) == (1, 2)
+    assert Path(output, "docs", "index.md").read_text(encoding="utf8") == "# Changed\n"
+    assert site_dump.changes == {"added": [], "changed": ["docs/index.md"], "removed": []}
+
+
+def test_dump_checksum(tmp_path):
+    source = tmp_path / "site"
+    output = tmp_path / "output"
+    create_site(source)
+    SiteDump().dump(str(source), str(output))
+
+    # Same size and mtime, different content
+    stat = os.stat(Path(source, "docs", "img", "logo.png"))
+    Path(output, "docs", "img", "logo.png").write_bytes(b"gif")
+    os.utime(Path(output, "docs", "img", "logo.png"), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    site_dump = SiteDump(checksum=True)
+    site_dump.dump(str(source), str(output))
+    assert (site_dump.copied, site_dump.skipped) == (1, 2)
+    assert Path(output, "docs", "img", "logo.png").read_bytes() == b"png"
+
+
+def test_dump_delete_stale(tmp_path):
+    source = tmp_path / "site"
+    output = tmp_path / "output"
+    create_site(source)
+    Path(output, "docs", "removed").mkdir(parents=True)
+    Path(output, "docs", "removed", "page.md").write_text("# Removed\n", encoding="utf8")
+    Path(output, ".git").mkdir()
+    Path(output, ".git", "HEAD").write_text("ref", encoding="utf8")
+
+    site_dump = SiteDump(delete=True)
+    site_dump.dump(str(source), str(output))
+    assert site_dump.deleted == 2
+    assert site_dump.changes["removed"] == ["docs/removed/page.md"]
+    assert sorted(site_dump.changes["added"]) == ["docs/img/logo.png", "docs/index.md", "mkdocs.yml"]
+    assert not Path(output, "docs", "removed").exists()
+    assert Path(output, ".git", "HEAD").is_file()
+    assert Path(output, "docs", "index.md").is_file()
+
+
+def test_dump_delete_keeps_precompressed(tmp_path):
+    source = tmp_path / "site"
+    output = tmp_path / "output"
+    create_site(source)
+    Path(output, "docs").mkdir(parents=True)
+    Path(output, "docs", "index.md.gz").write_bytes(b"gz")
+    stat = os.stat(Path(source, "docs", "index.md"))
+    os.utime(Path(output, "docs", "index.md.gz"), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    Path(output, "docs", "removed.md.gz").write_bytes(b"gz")
+    # Sibling compressed from previous content of the file
+    Path(output, "mkdocs.yml.gz").write_bytes(b"gz")
+    stat = os.stat(Path(source, "mkdocs.yml"))
+    os.utime(Path(output, "mkdocs.yml.gz"), ns=(stat.st_atime_ns, stat.st_mtime_ns - 1_000_000_000))
+
+    site_dump = SiteDump(delete=True, keep_compressed=True)
+    site_dump.dump(str(source), str(output))
+    assert Path(output, "docs", "index.md.gz").is_file()
+    assert not Path(output, "docs", "removed.md.gz").exists()
+    assert not Path(output, "mkdocs.yml.gz").exists()
+    assert site_dump.changes["removed"] == ["docs/removed.md.gz", "mkdocs.yml.gz"]
+
+
+def test_dump_link(tmp_path):
+    source = tmp_path / "site"
+    output = tmp_path / "output"
+    create_site(source)
+
+    SiteDump(link=True).dump(str(source), str(output))
+    assert os.path.samefile(Path(source, "docs", "index.md"), Path(output, "docs", "index.md"))
+
+    # Outdated file is replaced, not overwritten, so content shared by a hardlink is not modified
+    victim = tmp_path / "installed.png"
+    victim.write_bytes(b"installed")
+    Path(output, "docs", "img", "logo.png").unlink()
+    os.link(victim, Path(output, "docs", "img", "logo.png"))
+    SiteDump().dump(str(source), str(output))
+    assert victim.read_bytes() == b"installed"
+    assert Path(output, "docs", "img", "logo.png").read_bytes() == b"png"
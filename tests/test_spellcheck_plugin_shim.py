@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.pages import Page
+
+import mkdocs_partial
+
+pytest.importorskip("symspellpy")
+
+# pylint: disable=wrong-import-position
+from mkdocs_partial.integrations.spellcheck_plugin_shim import SPELLCHECK_LOGGER, SpellCheckShim  # noqa: E402
+
+PAGES = {
+    "index.md": "<p>Helo wrold</p>",
+    "guide/setup.md": "<p>Instal the pakage</p><!-- spellcheck: disable --><p>ignord</p>",
+    "guide/usage.md": "<p>Correct text only</p>",
+    "faq.md": "<p>Frequantly askd questions about mkdocs</p>",
+}
+
+
+@pytest.fixture
+def mkdocs_config(tmp_path):
+    config = MkDocsConfig()
+    config.load_dict({"site_name": "test", "docs_dir": str(tmp_path)})
+    config.validate()
+    config.plugins._current_plugin = "docs-package"
+    return config
+
+
+@pytest.fixture
+def shim_active():
+    active = mkdocs_partial.SpellCheckShimActive
+    mkdocs_partial.SpellCheckShimActive = True
+    yield
+    mkdocs_partial.SpellCheckShimActive = active
+
+
+def spellcheck(config, caplog, **options):
+    plugin = SpellCheckShim()
+    plugin.load_config({"known_words": ["mkdocs"], **options})
+    plugin.on_config(config)
+    files = Files([File.generated(config, src_uri=path, content="") for path in PAGES])
+    files.append(File.generated(config, src_uri="known_words.txt", content="questions"))
+    plugin.on_files(files, config=config)
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=SPELLCHECK_LOGGER):
+        for file in files:
+            page = Page(None, file, config)
+            page.meta = {}
+            plugin.on_page_content(PAGES[file.src_uri], page=page)
+        plugin.on_post_build(config=config)
+    return [record.getMessage() for record in caplog.records if record.name.startswith(SPELLCHECK_LOGGER)]
+
+
+@pytest.mark.usefixtures("shim_active")
+def test_parallel_spellcheck_output_matches_serial(mkdocs_config, caplog):
+    serial = spellcheck(mkdocs_config, caplog)
+    parallel = spellcheck(mkdocs_config, caplog, workers=2)
+
+    assert len(serial) > 0
+    assert parallel == serial
+
+
+@pytest.mark.usefixtures("shim_active")
+def test_cached_spellcheck_output_matches_serial(mkdocs_config, caplog, tmp_path):
+    serial = spellcheck(mkdocs_config, caplog)
+    cold = spellcheck(mkdocs_config, caplog, cache_dir=str(tmp_path / "cache"), workers=2)
+    warm = spellcheck(mkdocs_config, caplog, cache_dir=str(tmp_path / "cache"))
+
+    assert cold == serial
+    assert warm == serial